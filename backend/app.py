@@ -1,13 +1,448 @@
-from flask import Flask, jsonify, request
+import atexit
+import base64
+import concurrent.futures
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import uuid
+from collections import deque
+from time import perf_counter
+from flask import Flask, Response, abort, g, jsonify, request, stream_with_context
 from flask_cors import cross_origin
-from sudoku import Sudoku
+from sudoku import SIZES, Geometry, Sudoku
+from boardCache import BoardCache
+from boardCorpus import BoardCorpus
+from boardPool import BoardPool
+from gameSessions import Game, MemorySessionStore, SqliteSessionStore
+from concurrent.futures.process import BrokenProcessPool
+from generationExecutor import GenerationExecutor, batchJob
+from metrics import Metrics, RequestProfiler
 
 # Domains that the application will accept requests from.
 localFrontendURL = "http://localhost:4200"
 containerFrontendURL = "http://frontend:4200"
 
+# Pre-generated board pool settings. A pool size of 0 disables the pool.
+poolSize = int(os.environ.get("SUDOKU_POOL_SIZE", "64"))
+poolWorkers = int(os.environ.get("SUDOKU_POOL_WORKERS", "1"))
+poolProcesses = os.environ.get("SUDOKU_POOL_PROCESSES", "0") == "1"
+
+# Path of a precomputed board corpus built by boardCorpus.py, without extension. Empty generates boards instead.
+corpusPath = os.environ.get("SUDOKU_CORPUS", "")
+
+# Generation executor settings. 0 workers generates in the request thread, the default is one worker per core.
+executorWorkers = int(os.environ.get("SUDOKU_EXECUTOR_WORKERS", str(os.cpu_count() or 1)))
+executorTimeout = float(os.environ.get("SUDOKU_EXECUTOR_TIMEOUT", "2.5"))
+executorRecycle = int(os.environ.get("SUDOKU_EXECUTOR_RECYCLE", "1000"))
+
+# Most seeded boards kept in the response cache, and how long clients and proxies may cache seeded responses.
+seedCacheSize = int(os.environ.get("SUDOKU_SEED_CACHE_SIZE", "1024"))
+seedMaxAge = 86400
+
+# Most boards a single batch request can ask for, and the number of boards sent to the client at a time.
+maxBatch = int(os.environ.get("SUDOKU_MAX_BATCH", "1000"))
+batchFlushEvery = 16
+
+# Default, smallest, and largest time budgets for puzzle generation, in milliseconds. The smallest leaves time to remove
+# values down to typical clue counts, and the largest is kept under the frontend's 3 second timeout.
+puzzleBudget = 2000
+minPuzzleBudget = 200
+maxPuzzleBudget = 2500
+
+# Default and largest time budgets for completing grids, in milliseconds. Kept under the executor's timeout.
+completeBudget = 1000
+maxCompleteBudget = 2000
+
+# Game session settings. Games are kept in this process unless SUDOKU_GAME_STORE gives the path of a SQLite file
+# shared by every server process. Games expire SUDOKU_GAME_TTL seconds after they were last used, and either store
+# holds at most SUDOKU_GAME_SESSIONS games.
+gameStorePath = os.environ.get("SUDOKU_GAME_STORE", "")
+gameTTL = float(os.environ.get("SUDOKU_GAME_TTL", "3600"))
+gameSessions = int(os.environ.get("SUDOKU_GAME_SESSIONS", "10000"))
+
+# Set SUDOKU_METRICS to 1 to record metrics and serve them on /metrics. SUDOKU_PROFILE_EVERY=N writes cProfile stats
+# for one in every N requests to SUDOKU_PROFILE_DIR.
+metricsEnabled = os.environ.get("SUDOKU_METRICS", "0") == "1"
+profileEvery = int(os.environ.get("SUDOKU_PROFILE_EVERY", "0"))
+profileDirectory = os.environ.get("SUDOKU_PROFILE_DIR", tempfile.gettempdir())
+
 app = Flask(__name__)
 
+boardPool = None
+boardPoolLock = threading.Lock()
+generationExecutor = None
+generationExecutorLock = threading.Lock()
+seedCache = BoardCache(size=seedCacheSize)
+gameStore = (SqliteSessionStore(gameStorePath, size=gameSessions, ttl=gameTTL) if gameStorePath else
+             MemorySessionStore(size=gameSessions, ttl=gameTTL))
+
+metrics = Metrics(enabled=metricsEnabled)
+metrics.describe("sudoku_request_seconds", "Time spent handling requests, by endpoint and status.")
+metrics.describe("sudoku_executor_seconds", "Time spent waiting for the generation executor, including queueing.")
+metrics.describe("sudoku_generation_seconds", "Time spent generating a grid, by endpoint and block of the fixed value.")
+metrics.describe("sudoku_generations_total", "Grids generated, by endpoint and block of the fixed value.")
+metrics.describe("sudoku_search_nodes_total", "Values tried while branching in fillGrid.")
+metrics.describe("sudoku_backtracks_total", "Values tried in fillGrid that led to a contradiction.")
+metrics.describe("sudoku_fill_block_seconds_total", "Time spent placing the fixed value and filling blocks 0, 4 and 8.")
+metrics.describe("sudoku_fill_grid_seconds_total", "Time spent in fillGrid.")
+metrics.describe("sudoku_serialise_seconds", "Time spent encoding a grid for the response, by format.")
+profiler = RequestProfiler(every=profileEvery, directory=profileDirectory)
+
+# The corpus is mapped at startup, so server processes forked afterwards share its pages.
+boardCorpus = BoardCorpus(corpusPath) if corpusPath else None
+
+def getExecutor():
+    """
+    Description:
+        Gets the generation executor, creating it on first use so that its worker processes are created after any
+        server fork.
+    Returns:
+        The GenerationExecutor.
+    """
+    global generationExecutor
+    if (generationExecutor is None):
+        with generationExecutorLock:
+            if (generationExecutor is None):
+                generationExecutor = GenerationExecutor(workers=executorWorkers, timeout=executorTimeout,
+                                                        recycleAfter=executorRecycle)
+    return generationExecutor
+
+def recordGeneration(stats, endpoint, position=None, size=9):
+    """
+    Description:
+        Records the search and timing counters of a generation in the metrics.
+    Parameters:
+        stats (dict): The stats of the Sudoku that generated the grid.
+        endpoint (string): The endpoint the grid was generated for.
+        position (int): The position of the fixed value, or None for a grid without a fixed value.
+        size (int): The size of the grid.
+    """
+    geometry = Geometry.forSize(size)
+    if (position is None):
+        block = "none"
+    elif (position < 0 or position >= geometry.cells):
+        block = "invalid"
+    else:
+        block = str(geometry.blocks[position])
+    labels = (("endpoint", endpoint), ("size", str(size)), ("block", block))
+    metrics.increment("sudoku_generations_total", labels)
+    metrics.increment("sudoku_search_nodes_total", labels, stats["nodes"])
+    metrics.increment("sudoku_backtracks_total", labels, stats["backtracks"])
+    metrics.increment("sudoku_fill_block_seconds_total", labels, stats["blockTime"])
+    metrics.increment("sudoku_fill_grid_seconds_total", labels, stats["gridTime"])
+    metrics.observe("sudoku_generation_seconds", stats["blockTime"] + stats["gridTime"], labels)
+
+def generateGrid(method, args, endpoint, position=None, size=9):
+    """
+    Description:
+        Runs a Sudoku generation method with the generation executor, recording its stats if metrics are enabled.
+    Parameters:
+        method (string): The name of the Sudoku method to run, e.g. "generate" or "generateFixed".
+        args (tuple): The arguments to pass to the method.
+        endpoint (string): The endpoint the grid is generated for.
+        position (int): The position of the fixed value, or None for a grid without a fixed value.
+        size (int): The size of the grid to generate.
+    Returns:
+        Returns a int array representing a sudoku grid.
+    """
+    if (not metrics.enabled):
+        return getExecutor().run(method, args, size=size)
+
+    start = perf_counter()
+    gridData, stats = getExecutor().run(method, args, withStats=True, size=size)
+    metrics.observe("sudoku_executor_seconds", perf_counter() - start, (("endpoint", endpoint),))
+    recordGeneration(stats, endpoint, position, size)
+    return gridData
+
+def generatePuzzleGrid(clues, budget, endpoint):
+    """
+    Description:
+        Generates a puzzle with a unique solution with the generation executor, recording its stats if metrics are
+        enabled.
+    Parameters:
+        clues (int): The number of given values to aim for.
+        budget (int): The most milliseconds to spend removing values.
+        endpoint (string): The endpoint the puzzle is generated for.
+    Returns:
+        A tuple of the puzzle and its solution.
+    """
+    timeBudget = max(budget, 0) / 1000
+    if (not metrics.enabled):
+        return getExecutor().generatePuzzle(clues, timeBudget)
+
+    start = perf_counter()
+    result, stats = getExecutor().generatePuzzle(clues, timeBudget, withStats=True)
+    metrics.observe("sudoku_executor_seconds", perf_counter() - start, (("endpoint", endpoint),))
+    recordGeneration(stats, endpoint)
+    return result
+
+def generateOnExecutor(endpoint="pool"):
+    """
+    Description:
+        Generates a sudoku grid for the board pool with the generation executor.
+    Parameters:
+        endpoint (string): Label of the endpoint the generation is recorded under. Refills are recorded as "pool",
+            and grids made on a pool miss under the endpoint that missed.
+    Returns:
+        Returns a int array representing a sudoku grid.
+    """
+    return generateGrid("generate", (None,), endpoint)
+
+@atexit.register
+def shutdown():
+    """
+    Description:
+        Stops the board pool and the generation executor's worker processes.
+    """
+    if (boardPool is not None):
+        boardPool.stop()
+    if (generationExecutor is not None):
+        generationExecutor.shutdown()
+
+def gridFormat():
+    """
+    Description:
+        Determines the format a grid should be sent in, from the "format" parameter or else the Accept header.
+    Returns:
+        "json" for an array of 81 numbers, "base64" for a base64 string of the packed grid, or "packed" for the 41
+        bytes of the packed grid.
+    """
+    requestedFormat = request.args.get('format', default=None)
+    if (requestedFormat in ("json", "base64", "packed")):
+        return requestedFormat
+    if (request.accept_mimetypes.best_match(["application/json", "application/octet-stream"]) == "application/octet-stream"):
+        return "packed"
+    return "json"
+
+def gridResponse(gridData, successString):
+    """
+    Description:
+        Creates the response for a grid in the format requested by the client. Grids that are not 9X9 are always
+        sent as JSON, along with their size.
+    Parameters:
+        gridData (int[]): The sudoku grid to be sent.
+        successString (string): "true" if the grid was generated successfully, otherwise "false".
+    Returns:
+        The response holding the grid.
+    """
+    start = perf_counter() if metrics.enabled else 0
+    responseFormat = gridFormat() if len(gridData) == 81 else "json"
+    if (len(gridData) != 81):
+        response = jsonify(data=list(gridData), size=int(round(len(gridData) ** 0.5)), success=successString)
+    elif (responseFormat == "packed"):
+        response = Response(Sudoku.encodeGrid(gridData), mimetype="application/octet-stream")
+        response.headers["X-Success"] = successString
+    elif (responseFormat == "base64"):
+        packedGrid = base64.b64encode(Sudoku.encodeGrid(gridData)).decode("ascii")
+        response = jsonify(data=packedGrid, format="base64", success=successString)
+    else:
+        response = jsonify(data=list(gridData), success=successString)
+    response.headers["Vary"] = "Accept"
+    if (metrics.enabled):
+        metrics.observe("sudoku_serialise_seconds", perf_counter() - start, (("format", responseFormat),))
+    return response
+
+def generationTimedOut():
+    """
+    Description:
+        Creates the response used when generation takes longer than the executor's timeout.
+    Returns:
+        A failed response with a grid of all 0s and a 503 status.
+    """
+    return jsonify(data=[0 for i in range(0, 81)], success="false"), 503
+
+def unsupportedSize():
+    """
+    Description:
+        Creates the response used when a grid size that cannot be generated is requested.
+    Returns:
+        A failed response with a grid of all 0s.
+    """
+    return jsonify(data=[0 for i in range(0, 81)], success="false")
+
+def batchEncoder(responseFormat):
+    """
+    Description:
+        Gets how the boards of a batch are sent in a format: newline delimited JSON, or back to back as 41 byte packed
+        records.
+    Parameters:
+        responseFormat (string): "json", "base64", or "packed", as chosen by gridFormat.
+    Returns:
+        A tuple of the mimetype, a function encoding a grid as a record, and the string or bytes joining records.
+    """
+    if (responseFormat == "packed"):
+        return "application/octet-stream", Sudoku.encodeGrid, b""
+    if (responseFormat == "base64"):
+        encode = lambda gridData: json.dumps(dict(data=base64.b64encode(Sudoku.encodeGrid(gridData)).decode("ascii"),
+                                                  format="base64", success="true")) + "\n"
+    else:
+        encode = lambda gridData: json.dumps(dict(data=gridData, success="true")) + "\n"
+    return "application/x-ndjson", encode, ""
+
+def takeBoards(count, position=None, value=None):
+    """
+    Description:
+        Takes up to a number of ready boards from the corpus, or else from the board pool, without generating any.
+        Pool boards are relabelled so that the position holds the value.
+    Parameters:
+        count (int): The most boards to take.
+        position (int): The position of the fixed value, or None for boards without a fixed value.
+        value (int): The value that is fixed.
+    Returns:
+        An array of grids, shorter than count when not enough boards are ready.
+    """
+    boards = []
+    if (boardCorpus is not None):
+        while (len(boards) < count):
+            gridData = boardCorpus.randomBoard() if position is None else boardCorpus.randomFixedBoard(position, value)
+            if (gridData is None):
+                break
+            boards.append(gridData)
+        return boards
+
+    pool = getBoardPool()
+    while (pool is not None and len(boards) < count):
+        gridData = pool.get(generate=False)
+        if (gridData is None):
+            break
+        boards.append(gridData if position is None else Sudoku.relabelGrid(gridData, position, value))
+    return boards
+
+def batchChunks(count):
+    """
+    Description:
+        Splits the boards of a batch that have to be generated into the chunks sent to the generation executor.
+    Parameters:
+        count (int): The number of boards to generate.
+    Returns:
+        An array of chunk sizes, each at most batchFlushEvery.
+    """
+    return [min(batchFlushEvery, count - start) for start in range(0, count, batchFlushEvery)]
+
+def seededBoard(seed, position=None, value=None, size=9):
+    """
+    Description:
+        Creates the response for a seeded grid. Seeded grids are served from the seed cache, and are sent with an
+        ETag and Cache-Control header so that clients and proxies can cache them too.
+    Parameters:
+        seed (int): Seed for the random number generator.
+        position (int): The position of the fixed value, or None for a grid without a fixed value.
+        value (int): The value that is fixed.
+        size (int): The size of the grid.
+    Returns:
+        The response holding the grid, or a 304 response if the client already has it.
+    """
+    if (position is None):
+        generator = lambda: tuple(generateGrid("generate", (seed,), "board", size=size))
+    else:
+        generator = lambda: tuple(generateGrid("generateFixed", (position, value, seed), "fixedBoard", position, size))
+    gridData = seedCache.get((seed, position, value, size), generator)
+
+    successString = "true" if gridData[0] != 0 else "false"
+    response = gridResponse(gridData, successString)
+    response.set_etag("{}-{}".format(hashlib.sha1(bytes(gridData)).hexdigest(), gridFormat()))
+    response.headers["Cache-Control"] = "public, max-age={}".format(seedMaxAge)
+    return response.make_conditional(request)
+
+def readGivens(body):
+    """
+    Description:
+        Reads the grid size and the given values from the JSON body of a request. Raises a ValueError if they are
+        malformed.
+    Parameters:
+        body (dict): The JSON body, holding "givens", either an object from positions to values or a list of
+            [position, value] pairs, and optionally "size".
+    Returns:
+        A tuple of the size and a list of (position, value) pairs.
+    """
+    try:
+        size = int(body.get('size', 9))
+        givens = body.get('givens', {})
+        pairs = givens.items() if isinstance(givens, dict) else givens
+        givens = [(int(position), int(value)) for position, value in pairs]
+    except (TypeError, ValueError):
+        raise ValueError("Malformed givens")
+    if (size not in SIZES):
+        raise ValueError("Unsupported grid size {}".format(size))
+    return size, givens
+
+def getBoardPool():
+    """
+    Description:
+        Gets the board pool, starting it on first use so that its workers are created after any server fork.
+    Returns:
+        The running BoardPool, or None if the pool is disabled.
+    """
+    global boardPool
+    if (boardPool is None and poolSize > 0):
+        with boardPoolLock:
+            if (boardPool is None):
+                pool = BoardPool(size=poolSize, workers=poolWorkers, useProcesses=poolProcesses,
+                                 generator=generateOnExecutor)
+                pool.start()
+                boardPool = pool
+    return boardPool
+
+def profileName():
+    """
+    Description:
+        Names the current request's profile after its endpoint.
+    Returns:
+        The name, without slashes.
+    """
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    return endpoint.strip("/").replace("/", "-") or "index"
+
+@app.before_request
+def startRequest():
+    """
+    Description:
+        Starts timing the request if metrics are enabled, and profiling it if it is sampled.
+    """
+    if (metrics.enabled):
+        g.requestStart = perf_counter()
+    g.profile = profiler.start()
+
+@app.after_request
+def finishRequest(response):
+    """
+    Description:
+        Records the request's latency and writes its profile if it was sampled. Streamed responses are timed until
+        their first chunk is ready, but are profiled until the stream is exhausted.
+    Parameters:
+        response (Response): The response to the request.
+    Returns:
+        The response.
+    """
+    profile = g.pop("profile", None)
+    if (not metrics.enabled and profile is None):
+        return response
+
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    if (metrics.enabled and "requestStart" in g):
+        metrics.observe("sudoku_request_seconds", perf_counter() - g.requestStart,
+                        (("endpoint", endpoint), ("status", str(response.status_code))))
+    if (profile is not None):
+        if (response.is_streamed):
+            response.response = profiler.stream(profile, profileName(), response.response)
+        else:
+            profiler.finish(profile, profileName())
+    return response
+
+@app.teardown_request
+def stopProfiling(error):
+    """
+    Description:
+        Stops and writes the request's profile if finishRequest did not, for example because the view raised.
+    Parameters:
+        error (Exception): The exception that ended the request, or None.
+    """
+    profile = g.pop("profile", None)
+    if (profile is not None):
+        profiler.finish(profile, profileName())
+
 # A simple index.
 @app.route('/')
 @cross_origin([localFrontendURL, containerFrontendURL])
@@ -18,22 +453,285 @@ def index():
 @app.route('/sudoku/board', methods=['GET'])
 @cross_origin([localFrontendURL, containerFrontendURL])
 def getBoard():
-    sudoku = Sudoku()
-    return jsonify(data=sudoku.generate(), success="true")
+    seed = request.args.get('seed', default=None, type=int)
+    size = request.args.get('size', default=9, type=int)
+    if (size not in SIZES):
+        return unsupportedSize()
+
+    try:
+        if (seed is not None):
+            return seededBoard(seed, size=size)
+
+        # The corpus and the pool only hold 9X9 grids.
+        if (size != 9):
+            return gridResponse(generateGrid("generate", (None,), "board", size=size), "true")
+        if (boardCorpus is not None):
+            return gridResponse(boardCorpus.randomBoard(), "true")
+        pool = getBoardPool()
+        gridData = generateGrid("generate", (None,), "board") if pool is None else pool.get(endpoint="board")
+    except concurrent.futures.TimeoutError:
+        return generationTimedOut()
+    return gridResponse(gridData, "true")
+
+# RESTful API endpoint for getting the depth and hit/miss counts of the board pool and the seed cache.
+@app.route('/sudoku/pool', methods=['GET'])
+@cross_origin([localFrontendURL, containerFrontendURL])
+def getPoolStats():
+    pool = getBoardPool()
+    if (pool is None):
+        return jsonify(size=0, depth=0, hits=0, misses=0, seedCache=seedCache.stats(), success="false")
+    return jsonify(success="true", seedCache=seedCache.stats(), **pool.stats())
 
 # Restful API endpoint for getting a sudoku grid with a fixed position.
 @app.route('/sudoku/fixedBoard', methods=['GET'])
 @cross_origin([localFrontendURL, containerFrontendURL])
 def getFixedBoard():
-    sudoku = Sudoku()
-
     # Get parameter values.
     position = request.args.get('position',default=-1, type=int)
     value = request.args.get('value', default=-1, type=int)
+    seed = request.args.get('seed', default=None, type=int)
+    size = request.args.get('size', default=9, type=int)
+    if (size not in SIZES):
+        return unsupportedSize()
 
-    gridData = sudoku.generateFixed(position, value)
+    try:
+        if (seed is not None):
+            return seededBoard(seed, position, value, size)
+
+        # Fall back to generation if no board in the corpus has the value at the position.
+        gridData = None if boardCorpus is None or size != 9 else boardCorpus.randomFixedBoard(position, value)
+        if (gridData is None):
+            gridData = generateGrid("generateFixed", (position, value, None), "fixedBoard", position, size)
+    except concurrent.futures.TimeoutError:
+        return generationTimedOut()
     successString = "true" if gridData[0] != 0 else "false"
-    return jsonify(data=gridData, success=successString)
+    return gridResponse(gridData, successString)
+
+# RESTful API endpoint for streaming many sudoku grids, optionally with a fixed position, as newline delimited JSON.
+@app.route('/sudoku/boards', methods=['GET'])
+@cross_origin([localFrontendURL, containerFrontendURL])
+def getBoards():
+    # Get parameter values. The number of boards is capped by the server.
+    count = min(request.args.get('count', default=1, type=int), maxBatch)
+    position = request.args.get('position', default=None, type=int)
+    value = request.args.get('value', default=None, type=int)
+    fixed = 'position' in request.args or 'value' in request.args
+
+    # Boards are sent as newline delimited JSON, or back to back as 41 byte packed records.
+    responseFormat = gridFormat()
+    mimetype, encode, joiner = batchEncoder(responseFormat)
+
+    # Invalid parameters produce a single failed board, or no records at all when packed.
+    if (count < 1 or (fixed and (position is None or value is None or position < 0 or position >= 81 or value <= 0 or value > 9))):
+        if (responseFormat == "packed"):
+            response = Response(b"", mimetype=mimetype)
+            response.headers["X-Success"] = "false"
+            return response
+        line = json.dumps(dict(data=[0 for i in range(0, 81)], success="false")) + "\n"
+        return Response(line, mimetype=mimetype)
+    if (not fixed):
+        position = value = None
+
+    # Ready boards come first. The rest are generated on the generation executor in chunks, with at most one chunk
+    # per worker submitted ahead so that a large batch does not hold every worker.
+    executor = getExecutor()
+    boards = takeBoards(count, position, value)
+    chunks = batchChunks(count - len(boards))
+    submitChunk = lambda size: executor.submitJob(batchJob, (size, position, value, metrics.enabled))
+    futures = deque(submitChunk(size) for size in chunks[0:max(1, executor.workers)])
+    submitted = len(futures)
+
+    # The first chunk is waited for here, so a batch that cannot start gets the same 503 as a single board.
+    if (not boards and futures):
+        try:
+            futures[0].result(timeout=executor.timeout)
+        except (concurrent.futures.TimeoutError, BrokenProcessPool, RuntimeError):
+            for future in futures:
+                future.cancel()
+            return generationTimedOut()
+
+    def generateLines():
+        nonlocal submitted
+        for start in range(0, len(boards) - batchFlushEvery + 1, batchFlushEvery):
+            yield joiner.join(encode(gridData) for gridData in boards[start:start + batchFlushEvery])
+        lines = [encode(gridData) for gridData in boards[len(boards) - len(boards) % batchFlushEvery:]]
+        while (futures):
+            try:
+                grids = futures.popleft().result(timeout=executor.timeout)
+            except (concurrent.futures.TimeoutError, BrokenProcessPool, RuntimeError):
+                # The status was already sent, so a failed line ends the batch early.
+                for future in futures:
+                    future.cancel()
+                if (responseFormat != "packed"):
+                    lines.append(json.dumps(dict(data=[0 for i in range(0, 81)], success="false")) + "\n")
+                break
+            if (submitted < len(chunks)):
+                futures.append(submitChunk(chunks[submitted]))
+                submitted += 1
+
+            for gridData in grids:
+                if (metrics.enabled):
+                    gridData, stats = gridData
+                    recordGeneration(stats, "boards", position)
+                lines.append(encode(gridData))
+
+            # Send boards in small chunks so clients can start consuming them before the batch is finished.
+            if (len(lines) >= batchFlushEvery):
+                yield joiner.join(lines)
+                lines = []
+        if (lines):
+            yield joiner.join(lines)
+
+    response = Response(stream_with_context(generateLines()), mimetype=mimetype)
+    response.headers["X-Board-Count"] = str(count)
+    response.headers["Vary"] = "Accept"
+    return response
+
+# RESTful API endpoint for getting a sudoku puzzle with a unique solution.
+@app.route('/sudoku/puzzle', methods=['GET'])
+@cross_origin([localFrontendURL, containerFrontendURL])
+def getPuzzle():
+    # Get parameter values. The time budget is kept within the server's bounds.
+    clues = request.args.get('clues', default=30, type=int)
+    budget = max(min(request.args.get('budget', default=puzzleBudget, type=int), maxPuzzleBudget), minPuzzleBudget)
+
+    try:
+        puzzle, solution = generatePuzzleGrid(clues, budget, "puzzle")
+    except concurrent.futures.TimeoutError:
+        return generationTimedOut()
+    successString = "true" if solution[0] != 0 else "false"
+    return jsonify(data=puzzle, solution=solution, clues=81 - puzzle.count(0), success=successString)
+
+# RESTful API endpoint for starting a game on a new puzzle with a unique solution.
+@app.route('/sudoku/game', methods=['POST'])
+@cross_origin([localFrontendURL, containerFrontendURL])
+def createGame():
+    # Get parameter values. The time budget is kept within the server's bounds.
+    clues = request.args.get('clues', default=30, type=int)
+    budget = max(min(request.args.get('budget', default=puzzleBudget, type=int), maxPuzzleBudget), minPuzzleBudget)
+
+    try:
+        puzzle, solution = generatePuzzleGrid(clues, budget, "game")
+    except concurrent.futures.TimeoutError:
+        return generationTimedOut()
+    if (solution[0] == 0):
+        return jsonify(data=puzzle, success="false")
+
+    gameId = uuid.uuid4().hex
+    gameStore.put(gameId, Game(puzzle))
+    return jsonify(id=gameId, data=puzzle, clues=81 - puzzle.count(0), success="true")
+
+# RESTful API endpoint for getting the current grid of a game.
+@app.route('/sudoku/game/<gameId>', methods=['GET'])
+@cross_origin([localFrontendURL, containerFrontendURL])
+def getGame(gameId):
+    game = gameStore.get(gameId)
+    if (game is None):
+        return jsonify(data=[0 for i in range(0, 81)], success="false"), 404
+    givens = [position for position in range(0, 81) if (game.givens >> position) & 1]
+    return jsonify(id=gameId, data=list(game.grid), givens=givens, filled=game.filled, solved=game.solved(),
+                   success="true")
+
+# RESTful API endpoint for making a move in a game. The JSON body holds the "position" and the "value", 0 to clear.
+@app.route('/sudoku/game/<gameId>/move', methods=['POST'])
+@cross_origin([localFrontendURL, containerFrontendURL])
+def moveGame(gameId):
+    body = request.get_json(silent=True)
+    if (not isinstance(body, dict)):
+        body = {}
+    try:
+        position = int(body.get('position', -1))
+        value = int(body.get('value', -1))
+    except (TypeError, ValueError):
+        position = value = -1
+
+    # The store checks and applies the move atomically, so concurrent moves on a game are applied one at a time even
+    # from different server processes.
+    moved = gameStore.move(gameId, position, value)
+    if (moved is None):
+        return jsonify(accepted=False, reason="unknown game", success="false"), 404
+    game, accepted, reason = moved
+
+    return jsonify(accepted=accepted, reason=reason, filled=game.filled, solved=game.solved(),
+                   success="true" if accepted else "false")
+
+# Endpoint for scraping the metrics in the Prometheus text format. Each server process keeps its own metrics.
+@app.route('/metrics', methods=['GET'])
+def getMetrics():
+    if (not metrics.enabled):
+        abort(404)
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+# RESTful API endpoint for completing a grid with any number of given values. The JSON body holds "givens", either an
+# object from positions to values or a list of [position, value] pairs, and optionally "size" and "budget".
+@app.route('/sudoku/complete', methods=['POST'])
+@cross_origin([localFrontendURL, containerFrontendURL])
+def completeBoard():
+    body = request.get_json(silent=True)
+    if (not isinstance(body, dict)):
+        body = {}
+
+    # Get parameter values. The time budget is capped by the server.
+    try:
+        size, givens = readGivens(body)
+        budget = min(int(body.get('budget', completeBudget)), maxCompleteBudget)
+    except (TypeError, ValueError):
+        return jsonify(data=[0 for i in range(0, 81)], status="invalid", success="false")
+
+    try:
+        status, gridData = generateGrid("complete", (givens, max(budget, 0) / 1000), "complete", size=size)
+    except concurrent.futures.TimeoutError:
+        return generationTimedOut()
+    successString = "true" if status == "solved" else "false"
+    return jsonify(data=gridData, status=status, size=size, success=successString)
+
+# RESTful API endpoint for streaming a page of the solutions of a grid with given values as newline delimited JSON. The
+# JSON body holds "givens" and "size" as for /sudoku/complete, and optionally "offset", "limit", "budget", and the
+# "cursor" returned by the previous page.
+@app.route('/sudoku/solutions', methods=['POST'])
+@cross_origin([localFrontendURL, containerFrontendURL])
+def getSolutions():
+    body = request.get_json(silent=True)
+    if (not isinstance(body, dict)):
+        body = {}
+    invalid = json.dumps(dict(data=[0 for i in range(0, 81)], status="invalid", success="false")) + "\n"
+
+    # Get parameter values. The page size and time budget are capped by the server.
+    try:
+        size, givens = readGivens(body)
+        offset = max(int(body.get('offset', 0)), 0)
+        limit = max(min(int(body.get('limit', 100)), maxBatch), 1)
+        budget = min(int(body.get('budget', completeBudget)), maxCompleteBudget)
+        cursor = body.get('cursor')
+        if (cursor is not None):
+            cursor = [int(value) for value in cursor]
+    except (TypeError, ValueError):
+        return Response(invalid, mimetype="application/x-ndjson")
+
+    # The search runs on the generation executor and stops itself once the budget is spent.
+    args = (givens, limit, offset, cursor, max(budget, 0) / 1000)
+    try:
+        page = generateGrid("solutionsPage", args, "solutions", size=size)
+    except concurrent.futures.TimeoutError:
+        return generationTimedOut()
+    except ValueError:
+        return Response(invalid, mimetype="application/x-ndjson")
+
+    def generateLines():
+        lines = []
+        for solution in page["solutions"]:
+            lines.append(json.dumps(dict(data=solution, success="true")) + "\n")
+            if (len(lines) >= batchFlushEvery):
+                yield "".join(lines)
+                lines = []
+
+        # The last line holds the cursor and the offset still to skip from it for the next request, or a null cursor
+        # once every solution was sent. An "incomplete" page ran out of budget and can be continued the same way.
+        lines.append(json.dumps(dict(count=len(page["solutions"]), next=page["next"], offset=page["offset"],
+                                     status=page["status"], success="true")) + "\n")
+        yield "".join(lines)
+
+    return Response(stream_with_context(generateLines()), mimetype="application/x-ndjson")
 
 # Handler in the case of error 404.
 @app.errorhandler(404)
@@ -44,4 +742,4 @@ def pageNotFound(e):
 
 # If the application is being run as the source file, accept connection from outside the network.
 if (__name__ == '__main__'):
-    app.run(debug=False, host="0.0.0.0", port=5000)
\ No newline at end of file
+    app.run(debug=False, host="0.0.0.0", port=5000, threaded=True)
\ No newline at end of file
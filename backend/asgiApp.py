@@ -0,0 +1,493 @@
+import asyncio
+import base64
+import concurrent.futures
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from random import Random
+from time import perf_counter
+from urllib.parse import parse_qs
+import app as backendApp
+from generationExecutor import batchJob, runJob
+from sudoku import Sudoku
+
+# Most generation jobs and Flask requests handled at once. Requests arriving when this many are in flight get a 503
+# straight away instead of queueing until the client gives up.
+asyncMaxInFlight = int(os.environ.get("SUDOKU_ASYNC_MAX_INFLIGHT", str(4 * max(1, backendApp.executorWorkers))))
+
+# Number of threads running the Flask routes that are not handled asynchronously.
+asyncThreads = int(os.environ.get("SUDOKU_ASYNC_THREADS", "8"))
+
+backendApp.metrics.describe("sudoku_async_shed_total", "Requests refused with a 503 because too much work was in flight.")
+backendApp.metrics.describe("sudoku_async_coalesced_total", "Fixed board requests served by a generation already in flight.")
+backendApp.metrics.describe("sudoku_async_relabelled_total", "Fixed board requests served by relabelling a pool board.")
+
+class Overloaded(Exception):
+    """
+    Description:
+        Raised when a request would take the work in flight over the limit.
+    """
+# End of Overloaded
+
+# Errors of a generation job that are answered with a 503: too much work in flight, a job that took too long, or a
+# worker that died or a pool that was shut down under the job.
+GENERATION_ERRORS = (Overloaded, asyncio.TimeoutError, concurrent.futures.TimeoutError, BrokenProcessPool, RuntimeError)
+
+class AsyncSudokuApp:
+    """
+    Description:
+        An ASGI application serving the same routes as the Flask app. "/sudoku/board", "/sudoku/fixedBoard", and
+        "/sudoku/boards" are handled on the event loop: boards come from the corpus or pool, fixed boards are made by
+        relabelling a pool board, and otherwise generation is sent to the generation executor without holding a
+        thread. Identical fixed board requests made while one is being generated wait for that generation, and each
+        receives it with the other values relabelled. Every other route, and requests for seeds, other sizes, or packed grids, run the
+        Flask app on a pool of threads. Work in flight is bounded, and requests over the bound get a fast 503.
+    Variables:
+        wsgiApp (Flask): The WSGI application handling the other routes.
+        maxInFlight (int): The most generation jobs and Flask requests in flight.
+        timeout (float): The most seconds a request waits for generation.
+        threads (ThreadPoolExecutor): The threads running the Flask app.
+        inFlight (int): The number of generation jobs and Flask requests in flight.
+        pending (dict): Maps the (position, value) of each fixed board being generated to its asyncio Future.
+        random (Random): The random number generator used for relabelling.
+    Methods:
+        lifespan(function, function)
+        gridBody(int[], string, string)
+        startResponse(dict, function, int, bytes, (tuple[]))
+        respond(dict, function, int, dict)
+        runJob(function, tuple, string)
+        generate(string, tuple, string, (int))
+        board()
+        fixedBoard(dict)
+        boards(dict, dict, function, string)
+        readBody(function)
+        wsgi(dict, function, function)
+    """
+
+    def __init__(self, wsgiApp=backendApp.app, maxInFlight=asyncMaxInFlight, threads=asyncThreads,
+                 timeout=backendApp.executorTimeout):
+        """
+        Description:
+            Constructor for the AsyncSudokuApp class.
+        Parameters:
+            wsgiApp (Flask): The WSGI application handling the other routes.
+            maxInFlight (int): The most generation jobs and Flask requests in flight.
+            threads (int): The number of threads running the Flask app.
+            timeout (float): The most seconds a request waits for generation.
+        """
+        self.wsgiApp = wsgiApp
+        self.maxInFlight = maxInFlight
+        self.timeout = timeout
+        self.threads = concurrent.futures.ThreadPoolExecutor(max_workers=threads)
+        self.inFlight = 0
+        self.pending = {}
+        self.random = Random()
+
+    async def __call__(self, scope, receive, send):
+        """
+        Description:
+            Handles an ASGI connection.
+        Parameters:
+            scope (dict): The connection scope.
+            receive (function): Coroutine function receiving the client's messages.
+            send (function): Coroutine function sending messages to the client.
+        """
+        if (scope["type"] == "lifespan"):
+            await self.lifespan(receive, send)
+            return
+        if (scope["type"] != "http"):
+            return
+
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        headers = dict((name.decode("latin-1").lower(), value.decode("latin-1")) for name, value in scope.get("headers", []))
+
+        # The format is chosen as app.gridFormat chooses it: the "format" parameter, else the Accept header.
+        responseFormat = query.get("format", [None])[0]
+        if (responseFormat not in ("json", "base64", "packed")):
+            responseFormat = "packed" if "application/octet-stream" in headers.get("accept", "") else "json"
+
+        # Seeded boards, other sizes, and packed grids have their own caching and encoding, so Flask handles them.
+        native = (scope["method"] == "GET" and scope["path"] in ("/sudoku/board", "/sudoku/fixedBoard", "/sudoku/boards")
+                  and "seed" not in query and query.get("size", ["9"])[0] == "9" and responseFormat != "packed")
+        if (not native):
+            await self.wsgi(scope, receive, send)
+            return
+
+        start = perf_counter()
+        try:
+            if (scope["path"] == "/sudoku/boards"):
+                status = await self.boards(query, headers, send, responseFormat)
+            elif (scope["path"] == "/sudoku/board"):
+                status, body = 200, self.gridBody(await self.board(), "true", responseFormat)
+            else:
+                gridData = await self.fixedBoard(query)
+                status, body = 200, self.gridBody(gridData, "true" if gridData[0] != 0 else "false", responseFormat)
+        except GENERATION_ERRORS:
+            status, body = 503, dict(data=[0 for i in range(0, 81)], success="false")
+        if (scope["path"] != "/sudoku/boards" or status == 503):
+            await self.respond(headers, send, status, body)
+
+        metrics = backendApp.metrics
+        if (metrics.enabled):
+            metrics.observe("sudoku_request_seconds", perf_counter() - start,
+                            (("endpoint", scope["path"]), ("status", str(status))))
+
+    async def lifespan(self, receive, send):
+        """
+        Description:
+            Handles the server's startup and shutdown. The generation executor's workers are started before the first
+            request, and stopped along with the board pool at shutdown.
+        Parameters:
+            receive (function): Coroutine function receiving the server's messages.
+            send (function): Coroutine function sending messages to the server.
+        """
+        while True:
+            message = await receive()
+            if (message["type"] == "lifespan.startup"):
+                await asyncio.get_event_loop().run_in_executor(self.threads, backendApp.getExecutor().start)
+                await send({"type": "lifespan.startup.complete"})
+            elif (message["type"] == "lifespan.shutdown"):
+                backendApp.shutdown()
+                self.threads.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def gridBody(self, gridData, successString, responseFormat):
+        """
+        Description:
+            Creates the JSON body for a grid, as app.gridResponse does for the JSON and base64 formats.
+        Parameters:
+            gridData (int[]): The sudoku grid to be sent.
+            successString (string): "true" if the grid was generated successfully, otherwise "false".
+            responseFormat (string): "json" for an array of 81 numbers, or "base64" for a base64 string of the packed
+                grid.
+        Returns:
+            The JSON body as a dictionary.
+        """
+        if (responseFormat == "base64"):
+            packedGrid = base64.b64encode(Sudoku.encodeGrid(gridData)).decode("ascii")
+            return dict(data=packedGrid, format="base64", success=successString)
+        return dict(data=list(gridData), success=successString)
+
+    async def startResponse(self, headers, send, status, contentType, extraHeaders=()):
+        """
+        Description:
+            Starts a response, with the CORS header the Flask routes send to the frontend.
+        Parameters:
+            headers (dict): The request's headers, with lower case names.
+            send (function): Coroutine function sending messages to the client.
+            status (int): The HTTP status.
+            contentType (bytes): The content type of the body.
+            extraHeaders (tuple[]): Further (name, value) headers as bytes.
+        """
+        responseHeaders = [(b"content-type", contentType), (b"vary", b"Accept, Origin")] + list(extraHeaders)
+        origin = headers.get("origin")
+        if (origin in (backendApp.localFrontendURL, backendApp.containerFrontendURL)):
+            responseHeaders.append((b"access-control-allow-origin", origin.encode("latin-1")))
+        if (status == 503):
+            responseHeaders.append((b"retry-after", b"1"))
+        await send({"type": "http.response.start", "status": status, "headers": responseHeaders})
+
+    async def respond(self, headers, send, status, body):
+        """
+        Description:
+            Sends a JSON response.
+        Parameters:
+            headers (dict): The request's headers, with lower case names.
+            send (function): Coroutine function sending messages to the client.
+            status (int): The HTTP status.
+            body (dict): The JSON body.
+        """
+        content = json.dumps(body).encode("utf-8")
+        await self.startResponse(headers, send, status, b"application/json",
+                                 ((b"content-length", str(len(content)).encode("ascii")),))
+        await send({"type": "http.response.body", "body": content})
+
+    async def runJob(self, job, args, endpoint):
+        """
+        Description:
+            Runs a module level job on the generation executor, or on a thread if the executor has no workers. Raises
+            Overloaded if too much work is in flight, and asyncio.TimeoutError if the job does not finish in time.
+        Parameters:
+            job (function): The job to run.
+            args (tuple): The arguments to pass to the job.
+            endpoint (string): The endpoint the job runs for.
+        Returns:
+            The result of the job.
+        """
+        if (self.inFlight >= self.maxInFlight):
+            backendApp.metrics.increment("sudoku_async_shed_total", (("endpoint", endpoint),))
+            raise Overloaded()
+
+        executor = backendApp.getExecutor()
+        self.inFlight += 1
+        try:
+            if (executor.workers <= 0):
+                future = asyncio.get_event_loop().run_in_executor(self.threads, job, *args)
+            else:
+                future = asyncio.wrap_future(executor.submitJob(job, args))
+            return await asyncio.wait_for(future, self.timeout)
+        finally:
+            self.inFlight -= 1
+
+    async def generate(self, method, args, endpoint, position=None):
+        """
+        Description:
+            Runs a Sudoku generation method with runJob, recording its stats if metrics are enabled.
+        Parameters:
+            method (string): The name of the Sudoku method to run.
+            args (tuple): The arguments to pass to the method.
+            endpoint (string): The endpoint the grid is generated for.
+            position (int): The position of the fixed value, or None for a grid without a fixed value.
+        Returns:
+            Returns a int array representing a sudoku grid.
+        """
+        metrics = backendApp.metrics
+        result = await self.runJob(runJob, (method, args, metrics.enabled), endpoint)
+        if (metrics.enabled):
+            result, stats = result
+            backendApp.recordGeneration(stats, endpoint, position)
+        return result
+
+    async def board(self):
+        """
+        Description:
+            Gets a board from the corpus or the pool, or generates one if the pool is empty.
+        Returns:
+            Returns a int array representing a sudoku grid.
+        """
+        if (backendApp.boardCorpus is not None):
+            return backendApp.boardCorpus.randomBoard()
+        pool = backendApp.getBoardPool()
+        gridData = None if pool is None else pool.get(generate=False)
+        if (gridData is None):
+            gridData = await self.generate("generate", (None,), "board")
+        return gridData
+
+    async def fixedBoard(self, query):
+        """
+        Description:
+            Gets a board with a fixed value at a position. Boards come from the corpus, or from the pool relabelled so
+            the position holds the value. Otherwise the board is generated, and identical requests arriving meanwhile
+            share the generation.
+        Parameters:
+            query (dict): The request's query parameters.
+        Returns:
+            Returns a int array representing a sudoku grid, or a grid of 0s if the position or value is invalid.
+        """
+        try:
+            position = int(query.get("position", ["-1"])[0])
+            value = int(query.get("value", ["-1"])[0])
+        except ValueError:
+            position = value = -1
+        if (position < 0 or position >= 81 or value <= 0 or value > 9):
+            return [0 for i in range(0, 81)]
+
+        if (backendApp.boardCorpus is not None):
+            gridData = backendApp.boardCorpus.randomFixedBoard(position, value)
+            if (gridData is not None):
+                return gridData
+        pool = backendApp.getBoardPool()
+        gridData = None if pool is None else pool.get(generate=False)
+        if (gridData is not None):
+            backendApp.metrics.increment("sudoku_async_relabelled_total")
+            return Sudoku.relabelGrid(gridData, position, value, self.random)
+
+        key = (position, value)
+        shared = self.pending.get(key)
+        if (shared is None):
+            shared = asyncio.ensure_future(self.generate("generateFixed", (position, value, None), "fixedBoard", position))
+            self.pending[key] = shared
+            shared.add_done_callback(lambda future: self.pending.pop(key, None))
+            return await asyncio.shield(shared)
+
+        # Waiters get the shared grid with the other values relabelled, so concurrent clients see different boards.
+        backendApp.metrics.increment("sudoku_async_coalesced_total")
+        gridData = await asyncio.shield(shared)
+        return Sudoku.relabelGrid(gridData, position, value, self.random)
+
+    async def boards(self, query, headers, send, responseFormat):
+        """
+        Description:
+            Streams a batch of boards as newline delimited JSON, as the Flask route does. Ready boards from the corpus
+            or pool come first, and the rest are generated on the generation executor in chunks, each counted in the
+            work in flight. Raises one of GENERATION_ERRORS before the response starts if the first chunk fails.
+        Parameters:
+            query (dict): The request's query parameters.
+            headers (dict): The request's headers, with lower case names.
+            send (function): Coroutine function sending messages to the client.
+            responseFormat (string): "json" or "base64".
+        Returns:
+            The HTTP status sent.
+        """
+        mimetype, encode, joiner = backendApp.batchEncoder(responseFormat)
+        fixed = "position" in query or "value" in query
+        try:
+            count = min(int(query.get("count", ["1"])[0]), backendApp.maxBatch)
+            position = int(query["position"][0]) if fixed else None
+            value = int(query["value"][0]) if fixed else None
+        except (KeyError, ValueError):
+            count = 0
+        if (count < 1 or (fixed and (position < 0 or position >= 81 or value <= 0 or value > 9))):
+            await self.startResponse(headers, send, 200, mimetype.encode("ascii"))
+            line = json.dumps(dict(data=[0 for i in range(0, 81)], success="false")) + "\n"
+            await send({"type": "http.response.body", "body": line.encode("utf-8")})
+            return 200
+
+        metrics = backendApp.metrics
+        workers = backendApp.getExecutor().workers
+        boards = backendApp.takeBoards(count, position, value)
+        chunks = backendApp.batchChunks(count - len(boards))
+        submitChunk = lambda size: asyncio.ensure_future(
+            self.runJob(batchJob, (size, position, value, metrics.enabled), "boards"))
+        tasks = deque(submitChunk(size) for size in chunks[0:max(1, workers)])
+        submitted = len(tasks)
+
+        # The first chunk is waited for before the response starts, so a batch that cannot start gets a 503.
+        if (not boards and tasks):
+            try:
+                await asyncio.wait([tasks[0]])
+                tasks[0].result()
+            except GENERATION_ERRORS:
+                for task in tasks:
+                    task.cancel()
+                raise
+
+        await self.startResponse(headers, send, 200, mimetype.encode("ascii"),
+                                 ((b"x-board-count", str(count).encode("ascii")),))
+        for start in range(0, len(boards), backendApp.batchFlushEvery):
+            content = joiner.join(encode(gridData) for gridData in boards[start:start + backendApp.batchFlushEvery])
+            await send({"type": "http.response.body", "body": content.encode("utf-8"), "more_body": True})
+        while (tasks):
+            try:
+                grids = await tasks.popleft()
+            except GENERATION_ERRORS:
+                # The status was already sent, so a failed line ends the batch early.
+                for task in tasks:
+                    task.cancel()
+                line = json.dumps(dict(data=[0 for i in range(0, 81)], success="false")) + "\n"
+                await send({"type": "http.response.body", "body": line.encode("utf-8"), "more_body": True})
+                break
+            if (submitted < len(chunks)):
+                tasks.append(submitChunk(chunks[submitted]))
+                submitted += 1
+
+            lines = []
+            for gridData in grids:
+                if (metrics.enabled):
+                    gridData, stats = gridData
+                    backendApp.recordGeneration(stats, "boards", position)
+                lines.append(encode(gridData))
+            await send({"type": "http.response.body", "body": joiner.join(lines).encode("utf-8"), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+        return 200
+
+    async def readBody(self, receive):
+        """
+        Description:
+            Reads the whole body of a request.
+        Parameters:
+            receive (function): Coroutine function receiving the client's messages.
+        Returns:
+            The body as bytes.
+        """
+        chunks = []
+        more = True
+        while (more):
+            message = await receive()
+            if (message["type"] == "http.disconnect"):
+                break
+            chunks.append(message.get("body", b""))
+            more = message.get("more_body", False)
+        return b"".join(chunks)
+
+    async def wsgi(self, scope, receive, send):
+        """
+        Description:
+            Runs the Flask app for a request on a thread. The response is iterated on that same thread, so streamed
+            responses keep their request context, and each chunk is sent to the client as it is produced.
+        Parameters:
+            scope (dict): The connection scope.
+            receive (function): Coroutine function receiving the client's messages.
+            send (function): Coroutine function sending messages to the client.
+        """
+        headers = dict((name.decode("latin-1").lower(), value.decode("latin-1")) for name, value in scope.get("headers", []))
+        if (self.inFlight >= self.maxInFlight):
+            backendApp.metrics.increment("sudoku_async_shed_total", (("endpoint", scope["path"]),))
+            await self.respond(headers, send, 503, dict(data=[0 for i in range(0, 81)], success="false"))
+            return
+
+        body = await self.readBody(receive)
+        server = scope.get("server") or ("localhost", 80)
+        client = scope.get("client") or ("", 0)
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": scope.get("root_path", ""),
+            "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+            "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+            "SERVER_NAME": str(server[0]),
+            "SERVER_PORT": str(server[1]),
+            "SERVER_PROTOCOL": "HTTP/" + scope.get("http_version", "1.1"),
+            "REMOTE_ADDR": str(client[0]),
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": True,
+            "wsgi.run_once": False,
+        }
+        for name, value in scope.get("headers", []):
+            name = name.decode("latin-1").upper().replace("-", "_")
+            value = value.decode("latin-1")
+            if (name == "CONTENT_TYPE"):
+                environ["CONTENT_TYPE"] = value
+            elif (name != "CONTENT_LENGTH"):
+                key = "HTTP_" + name
+                environ[key] = environ[key] + "," + value if key in environ else value
+
+        loop = asyncio.get_event_loop()
+        chunks = asyncio.Queue()
+        started = {}
+
+        def startResponse(status, responseHeaders, excInfo=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in responseHeaders]
+
+        def runApp():
+            try:
+                iterable = self.wsgiApp(environ, startResponse)
+                try:
+                    for chunk in iterable:
+                        if (chunk):
+                            loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+                finally:
+                    if (hasattr(iterable, "close")):
+                        iterable.close()
+            finally:
+                # None marks the end of the response.
+                loop.call_soon_threadsafe(chunks.put_nowait, None)
+
+        self.inFlight += 1
+        try:
+            finished = loop.run_in_executor(self.threads, runApp)
+            chunk = await chunks.get()
+            if ("status" not in started):
+                # The app failed before starting its response, so its exception is raised to the server.
+                await finished
+            await send({"type": "http.response.start", "status": started["status"], "headers": started["headers"]})
+            while (chunk is not None):
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                chunk = await chunks.get()
+            await send({"type": "http.response.body", "body": b""})
+            await finished
+        finally:
+            self.inFlight -= 1
+# End of AsyncSudokuApp
+
+# The ASGI application, e.g. "uvicorn asgiApp:application".
+application = AsyncSudokuApp()
@@ -1,9 +1,58 @@
 import unittest
 from flask import json
-from sudoku import Sudoku
+from sudoku import Sudoku, GridSolver, SizedGridSolver, SymmetryGenerator, Geometry
+import base64
+import io
+import os
+import pstats
+import shutil
+import tempfile
+import threading
+import time
+from random import Random
+from werkzeug.serving import make_server
+import app as backendApp
+import asyncio
+from asgiApp import AsyncSudokuApp
 from app import app
+from benchmark import compareResults
+from boardCache import BoardCache
+from boardCorpus import BoardCorpus, buildCorpus
+from boardPool import BoardPool
+from gameSessions import Game, MemorySessionStore, SqliteSessionStore
+from generationExecutor import GenerationExecutor
+from loadTest import FixedSpread, parseMix, runLoadTest
+from metrics import Metrics, RequestProfiler
+from rating import TechniqueSolver, rateLines, ratePuzzle, ratePuzzles
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
 
 
+def callAsgi(application, method, path, queryString=b"", body=b"", headers=()):
+    """
+    Description:
+        Sends a request to an ASGI application and collects its response.
+    Returns:
+        A tuple of the status, a dictionary of the headers, and the body.
+    """
+    messages = [dict(type="http.request", body=body, more_body=False)]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else dict(type="http.disconnect")
+
+    async def send(message):
+        sent.append(message)
+
+    scope = dict(type="http", method=method, path=path, query_string=queryString, headers=list(headers),
+                 http_version="1.1", scheme="http", server=("testserver", 80), client=("127.0.0.1", 1))
+    return application(scope, receive, send), sent
+
+def asgiResponse(sent):
+    start = sent[0]
+    return (start["status"], dict((name.decode(), value.decode()) for name, value in start["headers"]),
+            b"".join(message.get("body", b"") for message in sent[1:]))
+
 class BackendTest(unittest.TestCase):
     def setUp(self):
         self.app = app.test_client()
@@ -25,6 +74,74 @@ class BackendTest(unittest.TestCase):
              8, 5, 1, 3, 2, 4, 7, 6, 9, 6, 7, 4, 8, 9, 5, 3, 1, 2, 5, 4, 8, 9, 3, 2, 1, 7, 6, 1, 2, 3, 6, 4, 7, 9, 5, 8,
              9, 6, 7, 5, 8, 1, 4, 2, 3]))
 
+    def testSudokuGenerateSeeded(self):
+        sudoku = Sudoku()
+        grid = sudoku.generate(seed=2019)
+        self.assertTrue(Sudoku.validate(grid))
+        self.assertEqual(Sudoku().generate(seed=2019), grid)
+        self.assertNotEqual(sudoku.generate(seed=2020), grid)
+
+        grid = sudoku.generateFixed(33, 6, seed=7)
+        self.assertEqual(grid[33], 6)
+        self.assertEqual(Sudoku().generateFixed(33, 6, seed=7), grid)
+
+    def testEncodeGrid(self):
+        grid = [7, 9, 6, 2, 1, 3, 5, 8, 4, 3, 1, 2, 4, 5, 8, 6, 9, 7, 4, 8, 5, 7, 6, 9, 2, 3, 1, 2, 3, 9, 1, 7, 6, 8, 4, 5,
+                8, 5, 1, 3, 2, 4, 7, 6, 9, 6, 7, 4, 8, 9, 5, 3, 1, 2, 5, 4, 8, 9, 3, 2, 1, 7, 6, 1, 2, 3, 6, 4, 7, 9, 5, 8,
+                9, 6, 7, 5, 8, 1, 4, 2, 3]
+        packedGrid = Sudoku.encodeGrid(grid)
+        self.assertEqual(len(packedGrid), 41)
+        self.assertEqual(packedGrid[0:2], bytes([0x79, 0x62]))
+        self.assertEqual(packedGrid[40], 0x30)
+        self.assertEqual(Sudoku.decodeGrid(packedGrid), grid)
+        self.assertEqual(Sudoku.decodeGrid(Sudoku.encodeGrid([0 for i in range(0, 81)])), [0 for i in range(0, 81)])
+
+    def testValidateMany(self):
+        grid = [7, 9, 6, 2, 1, 3, 5, 8, 4, 3, 1, 2, 4, 5, 8, 6, 9, 7, 4, 8, 5, 7, 6, 9, 2, 3, 1, 2, 3, 9, 1, 7, 6, 8, 4, 5,
+                8, 5, 1, 3, 2, 4, 7, 6, 9, 6, 7, 4, 8, 9, 5, 3, 1, 2, 5, 4, 8, 9, 3, 2, 1, 7, 6, 1, 2, 3, 6, 4, 7, 9, 5, 8,
+                9, 6, 7, 5, 8, 1, 4, 2, 3]
+
+        # Invalid value (10) in row 5, and repeated 9 in row 0
+        invalidValue = list(grid)
+        invalidValue[46] = 10
+        repeated = list(grid)
+        repeated[3] = 9
+
+        valid, units = Sudoku.validateMany([grid, invalidValue, repeated], returnUnits=True)
+        self.assertEqual(list(valid), [True, False, False])
+        self.assertEqual(list(units), [-1, 5, 0])
+
+        # Packed grids
+        self.assertEqual(list(Sudoku.validateMany(bytes(grid + repeated + grid))), [True, False, True])
+        self.assertRaises(ValueError, Sudoku.validateMany, bytes(grid[1:]))
+        self.assertRaises(ValueError, Sudoku.validateMany, [grid[1:]])
+
+        # Grids encoded as 41 byte records
+        encoded = [list(Sudoku.encodeGrid(grid)), list(Sudoku.encodeGrid(repeated))]
+        valid, units = Sudoku.validateMany(encoded, returnUnits=True, encoded=True)
+        self.assertEqual((list(valid), list(units)), ([True, False], [-1, 0]))
+        self.assertEqual(list(Sudoku.validateMany(Sudoku.encodeGrid(grid) * 3, encoded=True)), [True] * 3)
+        self.assertRaises(ValueError, Sudoku.validateMany, bytes(grid), encoded=True)
+
+        sudoku = Sudoku()
+        grids = [sudoku.generate() for i in range(0, 20)]
+        self.assertTrue(Sudoku.validateMany(grids).all())
+
+    def testValidPosition(self):
+        sudoku = Sudoku()
+        sudoku.sudokuGrid = [0 for i in range(0, 81)]
+        sudoku.resetVerifiers()
+        sudoku.fillPosition(10, 1, 1, 0, 5)
+        self.assertFalse(sudoku.validPosition(1, 7, 2, 5))
+        self.assertFalse(sudoku.validPosition(4, 1, 3, 5))
+        self.assertFalse(sudoku.validPosition(0, 0, 0, 5))
+        self.assertTrue(sudoku.validPosition(4, 4, 4, 5))
+        self.assertEqual(Sudoku.maskValues(sudoku.rowMasks[1]), [1, 2, 3, 4, 6, 7, 8, 9])
+
+        sudoku.fillPosition(10, 1, 1, 0, 5, fill=False)
+        self.assertTrue(sudoku.validPosition(1, 7, 2, 5))
+        self.assertEqual(sudoku.sudokuGrid[10], 0)
+
     def testSudokuGenerate(self):
         sudoku = Sudoku()
         grid = sudoku.generate()
@@ -84,12 +201,225 @@ class BackendTest(unittest.TestCase):
         self.assertEqual(grid[80], 9)
         self.assertTrue(Sudoku.validate(grid))
 
+    def testSudokuGenerateFixedAll(self):
+        sudoku = Sudoku()
+        for position in range(0, 81):
+            for value in range(1, 10):
+                grid = sudoku.generateFixed(position, value)
+                self.assertEqual(grid[position], value)
+                self.assertTrue(Sudoku.validate(grid))
+
+    def testSymmetryGenerator(self):
+        seedGrid = [7, 9, 6, 2, 1, 3, 5, 8, 4, 3, 1, 2, 4, 5, 8, 6, 9, 7, 4, 8, 5, 7, 6, 9, 2, 3, 1, 2, 3, 9, 1, 7, 6, 8, 4,
+                    5, 8, 5, 1, 3, 2, 4, 7, 6, 9, 6, 7, 4, 8, 9, 5, 3, 1, 2, 5, 4, 8, 9, 3, 2, 1, 7, 6, 1, 2, 3, 6, 4, 7, 9,
+                    5, 8, 9, 6, 7, 5, 8, 1, 4, 2, 3]
+        generator = SymmetryGenerator(seedGrid, reseedEvery=50)
+        grids = set()
+        for i in range(0, 200):
+            grid = generator.generate()
+            self.assertTrue(Sudoku.validate(grid))
+            grids.add(tuple(grid))
+        self.assertGreater(len(grids), 190)
+        self.assertNotEqual(generator.seedGrid, seedGrid)
+
+        for position in range(0, 81):
+            for value in range(1, 10):
+                grid = generator.generateFixed(position, value)
+                self.assertEqual(grid[position], value)
+                self.assertTrue(Sudoku.validate(grid))
+
+        self.assertEqual(generator.generateFixed(81, 1), [0 for i in range(0, 81)])
+        self.assertEqual(generator.generateFixed(0, 10), [0 for i in range(0, 81)])
+
+    def testGridSolver(self):
+        grid = [7, 9, 6, 2, 1, 3, 5, 8, 4, 3, 1, 2, 4, 5, 8, 6, 9, 7, 4, 8, 5, 7, 6, 9, 2, 3, 1, 2, 3, 9, 1, 7, 6, 8, 4, 5,
+                8, 5, 1, 3, 2, 4, 7, 6, 9, 6, 7, 4, 8, 9, 5, 3, 1, 2, 5, 4, 8, 9, 3, 2, 1, 7, 6, 1, 2, 3, 6, 4, 7, 9, 5, 8,
+                9, 6, 7, 5, 8, 1, 4, 2, 3]
+        puzzle = [value if position % 4 == 0 else 0 for position, value in enumerate(grid)]
+        solver = GridSolver(puzzle)
+        self.assertTrue(solver.solve())
+        self.assertTrue(Sudoku.validate(solver.grid))
+        self.assertEqual([solver.grid[position] for position in range(0, 81, 4)], puzzle[0:81:4])
+
+        # Empty grid
+        solver = GridSolver([0 for i in range(0, 81)])
+        self.assertTrue(solver.solve())
+        self.assertTrue(Sudoku.validate(solver.grid))
+
+        # Repeated 7 in row 0
+        puzzle = [0 for i in range(0, 81)]
+        puzzle[0] = 7
+        puzzle[8] = 7
+        solver = GridSolver(puzzle)
+        self.assertFalse(solver.consistent)
+        self.assertFalse(solver.solve())
+
+        # No value is possible in position 8
+        puzzle = [1, 2, 3, 4, 5, 6, 7, 8, 0] + [0 for i in range(0, 72)]
+        puzzle[80] = 9
+        solver = GridSolver(puzzle)
+        self.assertFalse(solver.solve())
+        self.assertEqual(solver.grid, puzzle)
+
+    def testSudokuGeneratePuzzle(self):
+        sudoku = Sudoku()
+        puzzle = sudoku.generatePuzzle(30)
+        solution = sudoku.getGrid()
+        self.assertEqual(81 - puzzle.count(0), 30)
+        self.assertTrue(Sudoku.validate(solution))
+        self.assertTrue(all(value == 0 or value == solution[position] for position, value in enumerate(puzzle)))
+        self.assertEqual(GridSolver(puzzle).countSolutions(), 1)
+
+        # Fewer clues than can be reached in the time budget returns the best puzzle found.
+        puzzle = sudoku.generatePuzzle(17, 0.2)
+        self.assertGreaterEqual(81 - puzzle.count(0), 17)
+        self.assertEqual(GridSolver(puzzle).countSolutions(), 1)
+
+        self.assertEqual(sudoku.generatePuzzle(16), [0 for i in range(0, 81)])
+
+    def testCountSolutions(self):
+        grid = [7, 9, 6, 2, 1, 3, 5, 8, 4, 3, 1, 2, 4, 5, 8, 6, 9, 7, 4, 8, 5, 7, 6, 9, 2, 3, 1, 2, 3, 9, 1, 7, 6, 8, 4, 5,
+                8, 5, 1, 3, 2, 4, 7, 6, 9, 6, 7, 4, 8, 9, 5, 3, 1, 2, 5, 4, 8, 9, 3, 2, 1, 7, 6, 1, 2, 3, 6, 4, 7, 9, 5, 8,
+                9, 6, 7, 5, 8, 1, 4, 2, 3]
+        self.assertEqual(GridSolver(grid).countSolutions(), 1)
+
+        # Swapping the 5s and 9s of rows 6 and 8 gives a second solution.
+        puzzle = list(grid)
+        for position in [54, 57, 72, 75]:
+            puzzle[position] = 0
+        self.assertEqual(GridSolver(puzzle).countSolutions(), 2)
+        self.assertEqual(GridSolver(puzzle).countSolutions(10), 2)
+        self.assertEqual(GridSolver([0 for i in range(0, 81)]).countSolutions(50), 50)
+
     def testSudokuBoardAPI(self):
         response = self.app.get('/sudoku/board')
         data = json.loads(response.data)
         self.assertEqual(data["success"], "true")
         self.assertNotEqual(data["data"][0], 0)
 
+    def testBoardPool(self):
+        # A pool that is not started generates every grid on demand.
+        pool = BoardPool(size=4)
+        self.assertTrue(Sudoku.validate(pool.get()))
+        self.assertEqual(pool.stats(), dict(size=4, depth=0, hits=0, misses=1))
+
+        pool.start()
+        deadline = time.time() + 5
+        while (pool.depth() < 4 and time.time() < deadline):
+            time.sleep(0.01)
+        self.assertEqual(pool.depth(), 4)
+        self.assertTrue(Sudoku.validate(pool.get()))
+        self.assertEqual(pool.stats()["hits"], 1)
+        pool.stop()
+
+        # Grids made on a miss are labelled with the calling endpoint, and refills with "pool".
+        labels = []
+        pool = BoardPool(size=1, generator=lambda endpoint: labels.append(endpoint) or Sudoku().generate())
+        pool.get(endpoint="board")
+        pool.start()
+        deadline = time.time() + 5
+        while (pool.depth() < 1 and time.time() < deadline):
+            time.sleep(0.01)
+        pool.stop()
+        self.assertEqual(labels, ["board", "pool"])
+
+        # The backend records a pool miss under the endpoint that missed.
+        boardPool = backendApp.boardPool
+        backendApp.boardPool = BoardPool(size=4, workers=0, generator=backendApp.generateOnExecutor)
+        backendApp.metrics = Metrics(enabled=True)
+        try:
+            self.assertEqual(self.app.get('/sudoku/board').status_code, 200)
+            text = backendApp.metrics.render()
+            self.assertIn('sudoku_generations_total{endpoint="board",size="9",block="none"} 1', text)
+            self.assertNotIn('endpoint="pool"', text)
+        finally:
+            backendApp.boardPool = boardPool
+            backendApp.metrics = Metrics()
+
+    def testGenerationExecutor(self):
+        executor = GenerationExecutor(workers=1, recycleAfter=2)
+        try:
+            self.assertTrue(Sudoku.validate(executor.generate()))
+            pool = executor.pool
+            grid = executor.generateFixed(17, 4)
+            self.assertEqual(grid[17], 4)
+            self.assertTrue(Sudoku.validate(grid))
+
+            # The pool is replaced in the background after 2 jobs per worker.
+            for i in range(0, 500):
+                if (executor.pool is not pool):
+                    break
+                time.sleep(0.01)
+            self.assertIsNot(executor.pool, pool)
+            self.assertFalse(executor.recycling)
+            self.assertTrue(Sudoku.validate(executor.generate()))
+
+            # Puzzles come back with their solution, which is lost with the worker's Sudoku.
+            puzzle, solution = executor.generatePuzzle(30, 1.0)
+            self.assertTrue(Sudoku.validate(solution))
+            self.assertTrue(all(value in (0, solution[position]) for position, value in enumerate(puzzle)))
+
+            self.assertRaises(concurrent.futures.TimeoutError, executor.run, "generatePuzzle", (17, 1.0), 0.05)
+        finally:
+            executor.shutdown()
+        self.assertIsNone(executor.pool)
+
+        # Submitting to a new executor queues the job behind the workers' start instead of waiting for it.
+        executor = GenerationExecutor(workers=1)
+        try:
+            future = executor.submit("generate", (None,))
+            self.assertEqual(len(executor.warmups), 1)
+            self.assertTrue(Sudoku.validate(future.result(timeout=5)))
+        finally:
+            executor.shutdown()
+
+        # Without workers jobs run in the calling thread.
+        executor = GenerationExecutor(workers=0)
+        self.assertTrue(Sudoku.validate(executor.generate()))
+        self.assertIsNone(executor.pool)
+
+    def testBoardCache(self):
+        cache = BoardCache(size=2)
+        calls = []
+        generator = lambda: calls.append(1) or (1, 2, 3)
+        self.assertEqual(cache.get("a", generator), (1, 2, 3))
+        self.assertEqual(cache.get("a", generator), (1, 2, 3))
+        cache.get("b", generator)
+        cache.get("c", generator)
+        self.assertEqual(len(calls), 3)
+
+        # "a" was the least recently used key, so it was evicted.
+        cache.get("a", generator)
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(cache.stats(), dict(size=2, entries=2, hits=1, misses=4))
+
+    def testSudokuSeededBoardAPI(self):
+        response = self.app.get('/sudoku/board', query_string=dict(seed=42))
+        data = json.loads(response.data)
+        self.assertEqual(data["success"], "true")
+        self.assertTrue(Sudoku.validate(data["data"]))
+        self.assertIn("max-age", response.headers["Cache-Control"])
+        etag = response.headers["ETag"]
+
+        response = self.app.get('/sudoku/board', query_string=dict(seed=42))
+        self.assertEqual(json.loads(response.data)["data"], data["data"])
+        self.assertEqual(response.headers["ETag"], etag)
+
+        response = self.app.get('/sudoku/board', query_string=dict(seed=42), headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+        response = self.app.get('/sudoku/fixedBoard', query_string=dict(position=12, value=3, seed=42))
+        data = json.loads(response.data)
+        self.assertEqual(data["data"][12], 3)
+        self.assertEqual(data["data"], Sudoku().generateFixed(12, 3, seed=42))
+
+    def testSudokuPoolAPI(self):
+        self.app.get('/sudoku/board')
+        response = self.app.get('/sudoku/pool')
+        data = json.loads(response.data)
+        self.assertEqual(data["success"], "true")
+        self.assertGreaterEqual(data["hits"] + data["misses"], 1)
+
     def testSudokuFixedBoardAPI(self):
         response = self.app.get('/sudoku/fixedBoard', query_string=dict(position=80, value=9))
         data = json.loads(response.data)
@@ -104,6 +434,768 @@ class BackendTest(unittest.TestCase):
         self.assertNotEqual(data["data"][0], 0)
         self.assertEqual(data["data"][80], 9)
 
+    def testSudokuBoardsAPI(self):
+        response = self.app.get('/sudoku/boards', query_string=dict(count=20))
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        lines = response.data.decode().splitlines()
+        self.assertEqual(len(lines), 20)
+        for line in lines:
+            data = json.loads(line)
+            self.assertEqual(data["success"], "true")
+            self.assertTrue(Sudoku.validate(data["data"]))
+
+        response = self.app.get('/sudoku/boards', query_string=dict(count=5, position=40, value=7))
+        lines = response.data.decode().splitlines()
+        self.assertEqual(len(lines), 5)
+        for line in lines:
+            data = json.loads(line)
+            self.assertEqual(data["data"][40], 7)
+            self.assertTrue(Sudoku.validate(data["data"]))
+
+        # Ready pool boards are served first, relabelled for a fixed value, and the rest come from the executor.
+        boardPool = backendApp.boardPool
+        backendApp.boardPool = BoardPool(size=4, workers=0)
+        try:
+            grids = [Sudoku().generate() for i in range(0, 4)]
+            backendApp.boardPool.boards.extend(grids)
+            response = self.app.get('/sudoku/boards', query_string=dict(count=40, position=40, value=7, format="base64"))
+            lines = [json.loads(line) for line in response.data.decode().splitlines()]
+            self.assertEqual(backendApp.boardPool.depth(), 0)
+        finally:
+            backendApp.boardPool = boardPool
+        self.assertEqual(len(lines), 40)
+        boards = [Sudoku.decodeGrid(base64.b64decode(line["data"])) for line in lines]
+        for board in boards:
+            self.assertEqual(board[40], 7)
+            self.assertTrue(Sudoku.validate(board))
+        canonical = lambda grid: tuple(grid.index(gridValue) for gridValue in grid)
+        self.assertEqual([canonical(board) for board in boards[0:4]], [canonical(grid) for grid in grids])
+
+    def testSudokuBoardsAPICapped(self):
+        maxBatch = backendApp.maxBatch
+        backendApp.maxBatch = 3
+        try:
+            response = self.app.get('/sudoku/boards', query_string=dict(count=100))
+        finally:
+            backendApp.maxBatch = maxBatch
+        self.assertEqual(response.headers["X-Board-Count"], "3")
+        self.assertEqual(len(response.data.decode().splitlines()), 3)
+
+    def testSudokuBoardsInvalid(self):
+        for queryString in [dict(count=0), dict(count=2, position=81, value=1), dict(count=2, position=3)]:
+            response = self.app.get('/sudoku/boards', query_string=queryString)
+            lines = response.data.decode().splitlines()
+            self.assertEqual(len(lines), 1)
+            self.assertEqual(json.loads(lines[0])["success"], "false")
+
+    def testSudokuPuzzleAPI(self):
+        response = self.app.get('/sudoku/puzzle', query_string=dict(clues=35))
+        data = json.loads(response.data)
+        self.assertEqual(data["success"], "true")
+        self.assertEqual(data["clues"], 35)
+        self.assertEqual(81 - data["data"].count(0), 35)
+        self.assertTrue(Sudoku.validate(data["solution"]))
+
+        # A budget below the server's smallest still gives a puzzle, not the solved grid.
+        for budget in (0, -5):
+            data = json.loads(self.app.get('/sudoku/puzzle', query_string=dict(clues=30, budget=budget)).data)
+            self.assertEqual((data["success"], data["clues"]), ("true", 30))
+
+        response = self.app.get('/sudoku/puzzle', query_string=dict(clues=90))
+        data = json.loads(response.data)
+        self.assertEqual(data["success"], "false")
+
+    def testSudokuBoardFormats(self):
+        response = self.app.get('/sudoku/board', query_string=dict(format="packed"))
+        self.assertEqual(response.mimetype, "application/octet-stream")
+        self.assertEqual(response.headers["X-Success"], "true")
+        self.assertEqual(len(response.data), 41)
+        self.assertTrue(Sudoku.validate(Sudoku.decodeGrid(response.data)))
+
+        response = self.app.get('/sudoku/fixedBoard', query_string=dict(position=80, value=9),
+                                headers={"Accept": "application/octet-stream"})
+        grid = Sudoku.decodeGrid(response.data)
+        self.assertEqual(grid[80], 9)
+        self.assertTrue(Sudoku.validate(grid))
+
+        response = self.app.get('/sudoku/board', query_string=dict(format="base64"))
+        data = json.loads(response.data)
+        self.assertEqual(data["success"], "true")
+        self.assertEqual(data["format"], "base64")
+        self.assertTrue(Sudoku.validate(Sudoku.decodeGrid(base64.b64decode(data["data"]))))
+
+        response = self.app.get('/sudoku/boards', query_string=dict(count=3, format="packed"))
+        self.assertEqual(len(response.data), 123)
+        for start in range(0, 123, 41):
+            self.assertTrue(Sudoku.validate(Sudoku.decodeGrid(response.data[start:start + 41])))
+
+    def testBoardCorpus(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "corpus")
+        try:
+            buildCorpus(path, 25, workers=1, chunkSize=10)
+            self.assertEqual(os.path.getsize(path + ".bin"), 16 + 25 * 41)
+            self.assertEqual(os.path.getsize(path + ".idx"), 16 + 730 * 4 + 25 * 81 * 4)
+
+            corpus = BoardCorpus(path)
+            self.assertEqual(corpus.count, 25)
+            grids = [corpus.record(number) for number in range(0, 25)]
+            for grid in grids:
+                self.assertTrue(Sudoku.validate(grid))
+            self.assertIn(corpus.randomBoard(), grids)
+
+            # The corpus file's records are validated without decoding them in Python.
+            self.assertEqual(list(corpus.validate()), [True] * 25)
+            with open(path + ".bin", "rb") as corpusFile:
+                records = bytearray(corpusFile.read()[16:])
+            records[41 * 7] ^= 0x30
+            self.assertEqual(list(Sudoku.validateMany(records, encoded=True)), [number != 7 for number in range(0, 25)])
+
+            for position in range(0, 81):
+                for value in range(1, 10):
+                    grid = corpus.randomFixedBoard(position, value)
+                    if (grid is None):
+                        self.assertFalse(any(grid[position] == value for grid in grids))
+                    else:
+                        self.assertEqual(grid[position], value)
+                        self.assertIn(grid, grids)
+            self.assertEqual(corpus.randomFixedBoard(81, 1), [0 for i in range(0, 81)])
+
+            # The board endpoints read from the corpus when one is loaded.
+            backendApp.boardCorpus = corpus
+            try:
+                data = json.loads(self.app.get('/sudoku/board').data)
+                self.assertIn(data["data"], grids)
+                grid = grids[3]
+                data = json.loads(self.app.get('/sudoku/fixedBoard', query_string=dict(position=5, value=grid[5])).data)
+                self.assertEqual(data["data"][5], grid[5])
+                self.assertIn(data["data"], grids)
+            finally:
+                backendApp.boardCorpus = None
+            corpus.close()
+        finally:
+            shutil.rmtree(directory)
+
+    def testBenchmarkCompare(self):
+        baseline = dict(metrics={"generate.boardsPerSecond": 100.0, "generate.latencyP99Ms": 10.0, "removed": 1.0})
+        current = dict(metrics={"generate.boardsPerSecond": 95.0, "generate.latencyP99Ms": 12.0})
+        comparison = {metric: (change, regressed) for metric, before, after, change, regressed
+                      in compareResults(baseline, current, 0.1)}
+        self.assertEqual(set(comparison), {"generate.boardsPerSecond", "generate.latencyP99Ms"})
+        self.assertAlmostEqual(comparison["generate.boardsPerSecond"][0], -0.05)
+        self.assertFalse(comparison["generate.boardsPerSecond"][1])
+        self.assertAlmostEqual(comparison["generate.latencyP99Ms"][0], -0.2)
+        self.assertTrue(comparison["generate.latencyP99Ms"][1])
+
+        # A baseline of 0 is compared by an absolute tolerance, for lower is better metrics only.
+        baseline = dict(metrics={"load.errorRate": 0.0, "fixed.meanBacktracks": 0.0, "fixed.meanNodes": 0.0,
+                                 "generate.boardsPerSecond": 0.0})
+        current = dict(metrics={"load.errorRate": 0.5, "fixed.meanBacktracks": 40.0, "fixed.meanNodes": 0.0,
+                                "generate.boardsPerSecond": 5.0})
+        comparison = {metric: regressed for metric, before, after, change, regressed
+                      in compareResults(baseline, current, 0.1)}
+        self.assertEqual(comparison, {"load.errorRate": True, "fixed.meanBacktracks": True, "fixed.meanNodes": False,
+                                      "generate.boardsPerSecond": False})
+        comparison = {metric: regressed for metric, before, after, change, regressed
+                      in compareResults(baseline, current, 0.1, tolerance=1.0)}
+        self.assertTrue(comparison["fixed.meanBacktracks"])
+        self.assertFalse(comparison["load.errorRate"])
+
+    def testMetrics(self):
+        metrics = Metrics(buckets=(0.1, 1.0))
+        metrics.increment("requests_total")
+        metrics.observe("latency_seconds", 0.5)
+        self.assertEqual(metrics.render(), "\n")
+
+        metrics.enabled = True
+        metrics.describe("requests_total", "Requests.")
+        metrics.increment("requests_total", (("endpoint", "/a"),), 2)
+        metrics.observe("latency_seconds", 0.05)
+        metrics.observe("latency_seconds", 0.5)
+        metrics.observe("latency_seconds", 5.0)
+        lines = metrics.render().splitlines()
+        self.assertIn('# HELP requests_total Requests.', lines)
+        self.assertIn('requests_total{endpoint="/a"} 2', lines)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', lines)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 2', lines)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 3', lines)
+        self.assertIn('latency_seconds_count 3', lines)
+
+    def testSudokuMetricsAPI(self):
+        self.assertEqual(self.app.get('/metrics').status_code, 404)
+
+        directory = tempfile.mkdtemp()
+        backendApp.metrics = Metrics(enabled=True)
+        backendApp.profiler = RequestProfiler(every=2, directory=directory)
+        boardPool, poolSize = backendApp.boardPool, backendApp.poolSize
+        backendApp.boardPool, backendApp.poolSize = None, 0
+        try:
+            for i in range(0, 2):
+                self.app.get('/sudoku/fixedBoard', query_string=dict(position=40, value=5))
+            self.app.get('/sudoku/boards', query_string=dict(count=2))
+            response = self.app.get('/metrics')
+            self.assertEqual(response.status_code, 200)
+            text = response.data.decode("utf-8")
+            self.assertIn('sudoku_request_seconds_count{endpoint="/sudoku/fixedBoard",status="200"} 2', text)
+            self.assertIn('sudoku_generations_total{endpoint="fixedBoard",size="9",block="4"} 2', text)
+            self.assertIn('sudoku_generations_total{endpoint="boards",size="9",block="none"} 2', text)
+            self.assertIn('sudoku_serialise_seconds_count{format="json"} 2', text)
+            # Every second request is profiled.
+            self.assertEqual(len(os.listdir(directory)), 2)
+        finally:
+            backendApp.boardPool, backendApp.poolSize = boardPool, poolSize
+            backendApp.metrics = Metrics()
+            backendApp.profiler = RequestProfiler()
+            shutil.rmtree(directory)
+
+    def testRequestProfilerStreamsAndErrors(self):
+        directory = tempfile.mkdtemp()
+        backendApp.profiler = RequestProfiler(every=1, directory=directory)
+        boardPool, poolSize = backendApp.boardPool, backendApp.poolSize
+        backendApp.boardPool, backendApp.poolSize = None, 0
+        seededBoard = backendApp.seededBoard
+        try:
+            # A streamed response is profiled until its last chunk, and written once.
+            response = self.app.get('/sudoku/boards', query_string=dict(count=3))
+            self.assertEqual(len(response.data.splitlines()), 3)
+            files = os.listdir(directory)
+            self.assertEqual(len(files), 1)
+            stats = pstats.Stats(os.path.join(directory, files[0]))
+            self.assertTrue(any(function[2] == "generateLines" for function in stats.stats))
+
+            # A view that raises still has its profile stopped and written.
+            def failingBoard(seed, size=9):
+                raise ValueError("failed")
+            backendApp.seededBoard = failingBoard
+            app.testing = True
+            with self.assertRaises(ValueError):
+                self.app.get('/sudoku/board', query_string=dict(seed=1))
+            self.assertEqual(len([name for name in os.listdir(directory) if name.startswith("sudoku-board-")]), 1)
+        finally:
+            app.testing = False
+            backendApp.seededBoard = seededBoard
+            backendApp.boardPool, backendApp.poolSize = boardPool, poolSize
+            backendApp.profiler = RequestProfiler()
+            shutil.rmtree(directory)
+
+    def testSudokuGenerateSized(self):
+        for size in (4, 16, 25):
+            sudoku = Sudoku(size)
+            grid = sudoku.generate()
+            self.assertEqual(len(grid), size * size)
+            self.assertTrue(Sudoku.validate(grid, size))
+            self.assertEqual(sudoku.generate(seed=7), Sudoku(size).generate(seed=7))
+
+            for position, value in [(0, 1), (size * size - 1, size), (size * size // 2, size // 2)]:
+                grid = sudoku.generateFixed(position, value)
+                self.assertTrue(Sudoku.validate(grid, size))
+                self.assertEqual(grid[position], value)
+            self.assertEqual(sudoku.generateFixed(size * size, 1), [0 for i in range(0, size * size)])
+            self.assertEqual(sudoku.generateFixed(0, size + 1), [0 for i in range(0, size * size)])
+
+        self.assertFalse(Sudoku.validate([1, 2, 3, 4] * 4, 4))
+        self.assertFalse(Sudoku.validate([1] * 16, 9))
+        self.assertRaises(ValueError, Sudoku, 10)
+
+    def testSizedGridSolver(self):
+        geometry = Geometry.forSize(16)
+        grid = Sudoku(16).generate()
+        puzzle = [value if position % 3 else 0 for position, value in enumerate(grid)]
+        solver = SizedGridSolver(puzzle, geometry)
+        self.assertTrue(solver.solve())
+        self.assertTrue(Sudoku.validate(solver.grid, 16))
+
+        # Two equal values in a row can never be completed.
+        puzzle = [0 for i in range(0, 256)]
+        puzzle[0] = puzzle[1] = 5
+        self.assertFalse(SizedGridSolver(puzzle, geometry).solve())
+
+    def testSudokuSizedBoardAPI(self):
+        data = json.loads(self.app.get('/sudoku/board', query_string=dict(size=16)).data)
+        self.assertEqual(data["success"], "true")
+        self.assertEqual(data["size"], 16)
+        self.assertTrue(Sudoku.validate(data["data"], 16))
+
+        data = json.loads(self.app.get('/sudoku/fixedBoard', query_string=dict(size=4, position=15, value=2)).data)
+        self.assertEqual(data["success"], "true")
+        self.assertTrue(Sudoku.validate(data["data"], 4))
+        self.assertEqual(data["data"][15], 2)
+
+        data = json.loads(self.app.get('/sudoku/board', query_string=dict(size=10)).data)
+        self.assertEqual(data["success"], "false")
+
+    def testSudokuComplete(self):
+        grid = Sudoku().generate()
+        givens = {position: grid[position] for position in range(0, 81, 4)}
+        status, completed = Sudoku().complete(givens, 1.0)
+        self.assertEqual(status, "solved")
+        self.assertTrue(Sudoku.validate(completed))
+        self.assertTrue(all(completed[position] == value for position, value in givens.items()))
+
+        # Random completions of an empty grid differ.
+        sudoku = Sudoku()
+        self.assertNotEqual(sudoku.complete({})[1], sudoku.complete({})[1])
+
+        status, completed = Sudoku(16).complete([(0, 16), (255, 1)])
+        self.assertEqual(status, "solved")
+        self.assertTrue(Sudoku.validate(completed, 16))
+
+        # Givens that conflict directly, or only after search, are unsatisfiable.
+        self.assertEqual(Sudoku().complete({0: 1, 1: 1})[0], "unsatisfiable")
+        self.assertEqual(Sudoku().complete([(0, 1), (0, 2)])[0], "unsatisfiable")
+        givens = {position: position + 1 for position in range(0, 8)}
+        givens[53] = 9
+        self.assertEqual(Sudoku().complete(givens)[0], "unsatisfiable")
+        self.assertEqual(Sudoku().complete({81: 1}), ("invalid", [0 for i in range(0, 81)]))
+        self.assertEqual(Sudoku().complete({0: 10})[0], "invalid")
+
+        # A budget of 0 gives up as soon as a grid needs any search.
+        puzzle = "000000012000000003002300400001800005060070800000009000008500000900040500470006000"
+        givens = {position: int(value) for position, value in enumerate(puzzle) if value != "0"}
+        self.assertEqual(Sudoku().complete(givens, 0)[0], "timeout")
+
+    def testSudokuCompleteAPI(self):
+        grid = Sudoku().generate()
+        givens = {str(position): grid[position] for position in (3, 17, 40, 62)}
+        data = json.loads(self.app.post('/sudoku/complete', data=json.dumps(dict(givens=givens)),
+                                        content_type='application/json').data)
+        self.assertEqual(data["status"], "solved")
+        self.assertEqual(data["success"], "true")
+        self.assertTrue(Sudoku.validate(data["data"]))
+        self.assertTrue(all(data["data"][int(position)] == value for position, value in givens.items()))
+
+        data = json.loads(self.app.post('/sudoku/complete', data=json.dumps(dict(givens=[[0, 5], [8, 5]])),
+                                        content_type='application/json').data)
+        self.assertEqual(data["status"], "unsatisfiable")
+        self.assertEqual(data["success"], "false")
+
+        data = json.loads(self.app.post('/sudoku/complete', data=json.dumps(dict(givens=[[0, "x"]])),
+                                        content_type='application/json').data)
+        self.assertEqual(data["status"], "invalid")
+
+        data = json.loads(self.app.post('/sudoku/complete', data=json.dumps(dict(givens=[[0, 3]], size=4)),
+                                        content_type='application/json').data)
+        self.assertEqual(data["status"], "solved")
+        self.assertTrue(Sudoku.validate(data["data"], 4))
+
+    def testSudokuIterSolutions(self):
+        sudoku = Sudoku()
+        grid = sudoku.generate()
+        givens = {position: grid[position] for position in range(0, 81) if position % 9 < 4 or position >= 54}
+        solutions = list(sudoku.iterSolutions(givens))
+        self.assertEqual(sudoku.getGrid(), grid)
+        self.assertIn(grid, solutions)
+        self.assertEqual(len(set(tuple(solution) for solution in solutions)), len(solutions))
+        for solution in solutions:
+            self.assertTrue(Sudoku.validate(solution))
+            self.assertTrue(all(solution[position] == value for position, value in givens.items()))
+        self.assertEqual(sudoku.countSolutions(givens, 10000), len(solutions))
+        self.assertEqual(list(sudoku.iterSolutions(givens, limit=2)), solutions[0:2])
+
+        # There are 288 4X4 grids.
+        self.assertEqual(Sudoku(4).countSolutions({}, 1000), 288)
+        self.assertEqual(len(list(Sudoku(4).iterSolutions({0: 1}))), 72)
+        self.assertEqual(Sudoku().countSolutions({0: 1, 1: 1}), 0)
+        self.assertEqual(list(Sudoku().iterSolutions({0: 1, 1: 1})), [])
+        self.assertRaises(ValueError, Sudoku().iterSolutions, {0: 10})
+
+    def testSudokuSolutionsPage(self):
+        sudoku = Sudoku()
+        grid = sudoku.generate()
+        givens = {position: grid[position] for position in range(0, 81) if position % 9 < 4 or position >= 54}
+        solutions = list(sudoku.iterSolutions(givens))
+
+        # Following the cursors gives the same solutions as one enumeration, for both solvers.
+        for size, pageGivens, allSolutions in ((9, givens, solutions), (4, {0: 1}, list(Sudoku(4).iterSolutions({0: 1})))):
+            pages = []
+            page = Sudoku(size).solutionsPage(pageGivens, limit=5)
+            while (True):
+                pages.extend(page["solutions"])
+                if (page["status"] == "complete"):
+                    break
+                self.assertEqual(page["status"], "more")
+                page = Sudoku(size).solutionsPage(pageGivens, limit=5, cursor=page["next"])
+            self.assertEqual(pages, allSolutions)
+
+        page = sudoku.solutionsPage(givens, limit=2, offset=3)
+        self.assertEqual(page["solutions"], solutions[3:5])
+        page = sudoku.solutionsPage(givens, limit=2, offset=page["offset"], cursor=page["next"])
+        self.assertEqual(page["solutions"], solutions[5:7])
+
+        # A budget that runs out while skipping to the offset still gives a cursor past the skipped solutions.
+        start = time.perf_counter()
+        page = Sudoku(16).solutionsPage({}, limit=1, offset=10 ** 9, timeBudget=0.05)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(page["status"], "incomplete")
+        self.assertEqual(page["solutions"], [])
+        self.assertLess(page["offset"], 10 ** 9)
+        self.assertIsNotNone(page["next"])
+
+        self.assertRaises(ValueError, sudoku.solutionsPage, {0: grid[0]}, cursor=[10])
+
+    def testSudokuSolutionsAPI(self):
+        def post(**body):
+            response = self.app.post('/sudoku/solutions', data=json.dumps(body), content_type='application/json')
+            return [json.loads(line) for line in response.data.decode("utf-8").splitlines()]
+
+        grid = Sudoku().generate()
+        givens = [[position, grid[position]] for position in range(0, 81) if position % 9 < 4 or position >= 54]
+        solutions = list(Sudoku().iterSolutions(givens))
+
+        lines = post(givens=givens, limit=3)
+        self.assertEqual([line["data"] for line in lines[0:-1]], solutions[0:3])
+        self.assertEqual(lines[-1]["status"], "more")
+        self.assertEqual(lines[-1]["count"], 3)
+
+        lines = post(givens=givens, limit=1000, cursor=lines[-1]["next"], offset=lines[-1]["offset"])
+        self.assertEqual([line["data"] for line in lines[0:-1]], solutions[3:])
+        self.assertEqual(lines[-1], dict(count=len(solutions) - 3, next=None, offset=0, status="complete",
+                                         success="true"))
+
+        lines = post(givens=givens, offset=3, limit=1000)
+        self.assertEqual([line["data"] for line in lines[0:-1]], solutions[3:])
+
+        lines = post(givens={"0": 1}, size=4, limit=1000)
+        self.assertEqual(lines[-1], dict(count=72, next=None, offset=0, status="complete", success="true"))
+
+        # The budget can run out before the offset is reached, and the page then continues from its cursor.
+        lines = post(givens={}, size=16, offset=10 ** 9, budget=50)
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]["status"], "incomplete")
+        self.assertLess(lines[0]["offset"], 10 ** 9)
+
+        lines = post(givens=givens, cursor=[99])
+        self.assertEqual(lines[0]["status"], "invalid")
+        lines = post(givens=givens, cursor="x")
+        self.assertEqual(lines[0]["status"], "invalid")
+        lines = post(givens=[[0, 10]])
+        self.assertEqual(lines[0]["status"], "invalid")
+
+    def testGame(self):
+        sudoku = Sudoku()
+        puzzle = sudoku.generatePuzzle(30)
+        solution = sudoku.getGrid()
+        game = Game(puzzle)
+        self.assertEqual(game.filled, 30)
+
+        given = puzzle.index(next(value for value in puzzle if value != 0))
+        empty = puzzle.index(0)
+        self.assertEqual(game.move(given, solution[given]), (False, "given"))
+        self.assertEqual(game.move(81, 1), (False, "invalid"))
+        self.assertEqual(game.move(empty, 10), (False, "invalid"))
+
+        # A value already in the row is a conflict, and clearing a position frees its value again.
+        rowValue = next(puzzle[position] for position in range(empty - empty % 9, empty - empty % 9 + 9) if puzzle[position])
+        self.assertEqual(game.move(empty, rowValue), (False, "conflict"))
+        self.assertEqual(game.move(empty, solution[empty]), (True, None))
+        self.assertEqual(game.filled, 31)
+        self.assertEqual(game.move(empty, 0), (True, None))
+        self.assertEqual(game.filled, 30)
+
+        for position in range(0, 81):
+            self.assertEqual(game.move(position, solution[position])[0], puzzle[position] == 0)
+        self.assertTrue(game.solved())
+
+        encoded = game.encode()
+        self.assertEqual(len(encoded), Game.ENCODED_SIZE)
+        decoded = Game.decode(encoded)
+        self.assertEqual(decoded.grid, game.grid)
+        self.assertEqual(decoded.givens, game.givens)
+        self.assertEqual((decoded.rowMasks, decoded.colMasks, decoded.blockMasks, decoded.filled),
+                         (game.rowMasks, game.colMasks, game.blockMasks, game.filled))
+
+        # Games stored before the masks were kept are restored by replaying their grid.
+        legacy = Game.decode(encoded[0:Game.GRID_ENCODED_SIZE])
+        self.assertEqual((legacy.grid, legacy.rowMasks, legacy.filled), (game.grid, game.rowMasks, game.filled))
+        self.assertEqual(decoded.move(empty, 0), (True, None))
+        self.assertRaises(ValueError, Game, [1, 1] + [0] * 79)
+
+    def testSessionStores(self):
+        store = MemorySessionStore(size=2, ttl=60)
+        games = [Game([0] * 81) for i in range(0, 3)]
+        store.put("a", games[0])
+        store.put("b", games[1])
+        self.assertIsNotNone(store.get("a"))
+        store.put("c", games[2])
+        self.assertIsNone(store.get("b"))
+        self.assertIsNotNone(store.get("a"))
+
+        # Games are read as snapshots that later moves do not change.
+        snapshot = store.get("a")
+        store.move("a", 0, 1)
+        self.assertEqual((snapshot.grid[0], snapshot.filled), (0, 0))
+        self.assertEqual((store.get("a").grid[0], store.get("a").filled), (1, 1))
+        store.delete("a")
+        self.assertIsNone(store.get("a"))
+
+        store = MemorySessionStore(ttl=-1)
+        store.put("a", games[0])
+        self.assertIsNone(store.get("a"))
+
+        directory = tempfile.mkdtemp()
+        try:
+            store = SqliteSessionStore(os.path.join(directory, "games.sqlite"), ttl=60)
+            game = Game(Sudoku().generatePuzzle(30))
+            store.put("a", game)
+            self.assertEqual(store.get("a").grid, game.grid)
+            self.assertEqual(store.stats(), dict(store="sqlite", size=10000, games=1))
+            store.delete("a")
+            self.assertIsNone(store.get("a"))
+
+            # Stores on the same file stand in for server processes, and no accepted move is lost between them.
+            empty = [position for position in range(0, 81) if game.grid[position] == 0]
+            solution = Sudoku().complete({position: value for position, value in enumerate(game.grid) if value})[1]
+            store.put("b", game)
+            def play(positions):
+                processStore = SqliteSessionStore(os.path.join(directory, "games.sqlite"), ttl=60)
+                for position in positions:
+                    self.assertEqual(processStore.move("b", position, solution[position])[1:], (True, None))
+            threads = [threading.Thread(target=play, args=(empty[i::4],)) for i in range(0, 4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(list(store.get("b").grid), solution)
+            self.assertIsNone(store.move("a", 0, 1))
+
+            # The least recently used games are evicted past the store's size.
+            store = SqliteSessionStore(os.path.join(directory, "bounded.sqlite"), size=2, ttl=60)
+            for gameId in ("a", "b", "c"):
+                store.put(gameId, games[0])
+                time.sleep(0.01)
+            self.assertIsNone(store.get("a"))
+            self.assertEqual(store.stats()["games"], 2)
+        finally:
+            shutil.rmtree(directory)
+
+        store = MemorySessionStore(ttl=60)
+        store.put("a", Game([0] * 81))
+        game, accepted, reason = store.move("a", 0, 1)
+        self.assertEqual((game.grid[0], accepted, reason), (1, True, None))
+        self.assertEqual(store.move("a", 1, 1)[1:], (False, "conflict"))
+        self.assertIsNone(store.move("b", 0, 1))
+
+    def testSudokuGameAPI(self):
+        data = json.loads(self.app.post('/sudoku/game', query_string=dict(clues=35)).data)
+        self.assertEqual(data["success"], "true")
+        gameId = data["id"]
+        puzzle = data["data"]
+        solution = Sudoku().complete({position: value for position, value in enumerate(puzzle) if value})[1]
+
+        empty = [position for position in range(0, 81) if puzzle[position] == 0]
+        def move(position, value):
+            return json.loads(self.app.post('/sudoku/game/{}/move'.format(gameId), data=json.dumps(dict(position=position, value=value)),
+                                            content_type='application/json').data)
+
+        data = move(puzzle.index(next(value for value in puzzle if value)), 1)
+        self.assertEqual((data["accepted"], data["reason"]), (False, "given"))
+        for position in empty:
+            data = move(position, solution[position])
+            self.assertTrue(data["accepted"])
+        self.assertTrue(data["solved"])
+
+        data = json.loads(self.app.get('/sudoku/game/{}'.format(gameId)).data)
+        self.assertEqual(data["data"], solution)
+        self.assertEqual(len(data["givens"]), 81 - len(empty))
+
+        response = self.app.post('/sudoku/game/unknown/move', data=json.dumps(dict(position=0, value=1)), content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.app.get('/sudoku/game/unknown').status_code, 404)
+
+    def testRating(self):
+        sudoku = Sudoku()
+        sudoku.generate()
+        grid = sudoku.getGrid()
+        self.assertEqual(ratePuzzle(grid)["difficulty"], "trivial")
+        self.assertEqual(ratePuzzle([0] + grid[1:])["score"], 1)
+        self.assertEqual(ratePuzzle([grid[1]] + grid[1:])["difficulty"], "invalid")
+        self.assertEqual(ratePuzzle([0] * 81)["difficulty"], "unrated")
+
+        # A solved puzzle's grid is its unique solution.
+        puzzle = [int(character) for character in
+                  "000000010400000000020000000000050407008000300001090000300400200050100000000806000"]
+        solver = TechniqueSolver(puzzle)
+        self.assertTrue(solver.solve())
+        self.assertTrue(Sudoku.validate(solver.grid))
+        self.assertTrue(all(solver.grid[position] == puzzle[position] for position in range(0, 81) if puzzle[position]))
+
+        # An X-wing on 1 in rows 0 and 4, columns 2 and 7, removes 1 from the rest of both columns.
+        solver = TechniqueSolver([0] * 81)
+        for row in (0, 4):
+            for col in range(0, 9):
+                if (col not in (2, 7)):
+                    solver.candidates[row * 9 + col] &= ~1
+        self.assertTrue(solver.fish(2))
+        for row in range(0, 9):
+            self.assertEqual(solver.candidates[row * 9 + 2] & 1, 1 if row in (0, 4) else 0)
+            self.assertEqual(solver.candidates[row * 9 + 7] & 1, 1 if row in (0, 4) else 0)
+
+        lines = ["".join(str(value) for value in [0] + grid[1:]) + "\n", "not a puzzle\n",
+                 "".join(str(value) if value else "." for value in puzzle) + "\n"]
+        ratings = [json.loads(line) for line in rateLines(lines)]
+        self.assertEqual([rating["puzzle"] for rating in ratings], [lines[0].strip(), lines[2].strip()])
+        self.assertEqual(ratings[0]["hardest"], "hiddenSingle")
+
+        output = io.StringIO()
+        self.assertEqual(ratePuzzles(io.StringIO("".join(lines) * 3), output, workers=1, chunkSize=2), 6)
+        self.assertEqual([json.loads(line) for line in output.getvalue().splitlines()], ratings * 3)
+
+    def testLoadTest(self):
+        self.assertEqual(parseMix("client"), {"board": 5, "fixedBoard": 4, "complete": 1})
+        self.assertEqual(parseMix("board=3,boards=1"), {"board": 3.0, "boards": 1.0})
+        self.assertRaises(ValueError, parseMix, "unknown=1")
+        spread = FixedSpread(Random(1), 1.0, [(4, 5)])
+        self.assertEqual(spread.choose(), (4, 5))
+
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            url = "http://127.0.0.1:{}".format(server.server_port)
+            results = runLoadTest(url, parseMix("all"), concurrency=2, duration=1.0, warmup=0.1, batch=2, seed=1,
+                                  label="test")
+            metrics = results["metrics"]
+            self.assertGreater(metrics["all.requests"], 0)
+            self.assertEqual(metrics["all.errorRate"], 0.0)
+            self.assertLessEqual(metrics["all.P50Ms"], metrics["all.P99Ms"])
+            self.assertEqual(results["errors"], {})
+            self.assertEqual(results["label"], "test")
+
+            # Responses that fail their check count as errors.
+            results = runLoadTest(url + "/missing", {"board": 1}, concurrency=1, duration=0.2, warmup=0)
+            self.assertEqual(results["metrics"]["all.errorRate"], 1.0)
+            self.assertEqual(set(results["errors"]), {"404"})
+        finally:
+            server.shutdown()
+            thread.join()
+            server.server_close()
+
+    def testAsgiApp(self):
+        loop = asyncio.new_event_loop()
+        application = AsyncSudokuApp(maxInFlight=4)
+        poolSize = backendApp.poolSize
+        backendApp.poolSize = 0
+        try:
+            def request(method, path, queryString=b"", body=b"", headers=()):
+                coroutine, sent = callAsgi(application, method, path, queryString, body, headers)
+                loop.run_until_complete(coroutine)
+                return asgiResponse(sent)
+
+            # Boards and fixed boards are handled on the event loop.
+            status, headers, body = request("GET", "/sudoku/board", headers=[(b"origin", b"http://localhost:4200")])
+            self.assertEqual(status, 200)
+            self.assertEqual(headers["access-control-allow-origin"], "http://localhost:4200")
+            self.assertTrue(Sudoku.validate(json.loads(body)["data"]))
+            status, headers, body = request("GET", "/sudoku/fixedBoard", b"position=10&value=4")
+            data = json.loads(body)
+            self.assertEqual(data["success"], "true")
+            self.assertEqual(data["data"][10], 4)
+            self.assertTrue(Sudoku.validate(data["data"]))
+            self.assertEqual(json.loads(request("GET", "/sudoku/fixedBoard", b"position=81&value=4")[2])["success"], "false")
+
+            # The base64 format the frontend asks for is served on the event loop too, without the Flask app.
+            wsgiApp = application.wsgiApp
+            application.wsgiApp = None
+            try:
+                for path, queryString in (("/sudoku/board", b"format=base64"),
+                                          ("/sudoku/fixedBoard", b"position=10&value=4&format=base64")):
+                    status, headers, body = request("GET", path, queryString)
+                    data = json.loads(body)
+                    self.assertEqual((status, data["format"], data["success"]), (200, "base64", "true"))
+                    grid = Sudoku.decodeGrid(base64.b64decode(data["data"]))
+                    self.assertTrue(Sudoku.validate(grid))
+                self.assertEqual(grid[10], 4)
+            finally:
+                application.wsgiApp = wsgiApp
+            # Batches are streamed on the event loop too, in the format the frontend's prefetch queue asks for.
+            application.wsgiApp = None
+            try:
+                status, headers, body = request("GET", "/sudoku/boards", b"count=20&format=base64")
+                self.assertEqual((status, headers["x-board-count"]), (200, "20"))
+                lines = [json.loads(line) for line in body.decode().splitlines()]
+                self.assertEqual(len(lines), 20)
+                for line in lines:
+                    self.assertTrue(Sudoku.validate(Sudoku.decodeGrid(base64.b64decode(line["data"]))))
+                lines = [json.loads(line) for line in
+                         request("GET", "/sudoku/boards", b"count=3&position=5&value=2")[2].decode().splitlines()]
+                self.assertEqual([line["data"][5] for line in lines], [2, 2, 2])
+                body = request("GET", "/sudoku/boards", b"count=2&position=81&value=2")[2]
+                self.assertEqual(json.loads(body)["success"], "false")
+            finally:
+                application.wsgiApp = wsgiApp
+            self.assertEqual(application.inFlight, 0)
+
+            # A generation failing under coalesced requests gives each of them a 503 instead of an error.
+            boardPool = backendApp.boardPool
+            backendApp.boardPool = None
+            generate = application.generate
+            async def failing(*args):
+                await asyncio.sleep(0.01)
+                raise BrokenProcessPool()
+            application.generate = failing
+            try:
+                failed = [callAsgi(application, "GET", "/sudoku/fixedBoard", b"position=41&value=7") for i in range(0, 3)]
+                async def failingConcurrently():
+                    await asyncio.gather(*[coroutine for coroutine, sent in failed])
+                loop.run_until_complete(failingConcurrently())
+                self.assertEqual([asgiResponse(sent)[0] for coroutine, sent in failed], [503, 503, 503])
+            finally:
+                application.generate = generate
+                backendApp.boardPool = boardPool
+            self.assertEqual(application.pending, {})
+
+            status, headers, body = request("GET", "/sudoku/board", b"format=packed")
+            self.assertTrue(Sudoku.validate(Sudoku.decodeGrid(body)))
+
+            # Identical concurrent fixed board requests share one generation, each relabelled.
+            runs = [callAsgi(application, "GET", "/sudoku/fixedBoard", b"position=40&value=7") for i in range(0, 6)]
+            async def concurrently():
+                await asyncio.gather(*[coroutine for coroutine, sent in runs])
+            loop.run_until_complete(concurrently())
+            grids = [json.loads(asgiResponse(sent)[2])["data"] for coroutine, sent in runs]
+            for grid in grids:
+                self.assertEqual(grid[40], 7)
+                self.assertTrue(Sudoku.validate(grid))
+            canonical = [tuple(grid.index(gridValue) for gridValue in grid) for grid in grids]
+            self.assertEqual(len(set(canonical)), 1)
+            self.assertEqual(application.pending, {})
+            self.assertEqual(application.inFlight, 0)
+
+            # Every other route runs the Flask app, streamed responses included.
+            status, headers, body = request("GET", "/sudoku/boards", b"count=3")
+            self.assertEqual(status, 200)
+            self.assertEqual(len(body.decode().splitlines()), 3)
+            status, headers, body = request("POST", "/sudoku/complete", body=json.dumps(dict(givens=[[0, 5]])).encode(),
+                                            headers=[(b"content-type", b"application/json")])
+            self.assertEqual(json.loads(body)["data"][0], 5)
+            status, headers, body = request("GET", "/sudoku/board", b"seed=5")
+            self.assertEqual(json.loads(body)["data"], Sudoku().generate(seed=5))
+            self.assertEqual(request("GET", "/missing")[0], 404)
+
+            # Requests over the bound on work in flight are refused straight away.
+            application.maxInFlight = 0
+            status, headers, body = request("GET", "/sudoku/fixedBoard", b"position=3&value=2")
+            self.assertEqual(status, 503)
+            self.assertEqual(headers["retry-after"], "1")
+            self.assertEqual(request("GET", "/sudoku/pool")[0], 503)
+        finally:
+            backendApp.poolSize = poolSize
+            application.threads.shutdown()
+            loop.close()
+
+        # A relabelled grid is valid and keeps the fixed value.
+        grid = Sudoku().generate()
+        relabelled = Sudoku.relabelGrid(grid, 7, 3)
+        self.assertTrue(Sudoku.validate(relabelled))
+        self.assertEqual(relabelled[7], 3)
+
+        # Fixing a value swaps it with the value at the position, and leaves the other values alone.
+        fixed = list(Sudoku.fixValue(bytes(grid), 7, 3))
+        self.assertTrue(Sudoku.validate(fixed))
+        self.assertEqual(fixed[7], 3)
+        self.assertEqual([gridValue for gridValue in fixed if gridValue not in (3, grid[7])],
+                         [gridValue for gridValue in grid if gridValue not in (3, grid[7])])
+
     def testSudokuFixedBoardInvalid(self):
         # Invalid positions
         response = self.app.get('/sudoku/fixedBoard', query_string=dict(position=-1, value=9))
@@ -0,0 +1,293 @@
+import argparse
+import json
+import platform
+import sys
+import time
+from sudoku import Sudoku, SymmetryGenerator
+
+# Metrics where a lower value is better. Every other metric is a throughput, where higher is better.
+LOWER_IS_BETTER = ("Ms", "Nodes", "Backtracks", "errorRate")
+
+def percentile(sortedValues, fraction):
+    """
+    Description:
+        Gets a percentile of sorted values, using the nearest rank.
+    Parameters:
+        sortedValues (float[]): The values, sorted from lowest to highest.
+        fraction (float): The percentile as a fraction, e.g. 0.99.
+    Returns:
+        The value at the percentile.
+    """
+    return sortedValues[min(len(sortedValues) - 1, int(fraction * len(sortedValues)))]
+
+def latencies(prefix, seconds):
+    """
+    Description:
+        Summarises latencies as milliseconds.
+    Parameters:
+        prefix (string): The prefix of the metric names.
+        seconds (float[]): The latencies in seconds.
+    Returns:
+        A dictionary of the mean, p50, p90, p99, and max latencies.
+    """
+    seconds = sorted(seconds)
+    return {
+        prefix + "MeanMs": 1000 * sum(seconds) / len(seconds),
+        prefix + "P50Ms": 1000 * percentile(seconds, 0.50),
+        prefix + "P90Ms": 1000 * percentile(seconds, 0.90),
+        prefix + "P99Ms": 1000 * percentile(seconds, 0.99),
+        prefix + "MaxMs": 1000 * seconds[-1],
+    }
+
+def benchmarkGenerate(duration):
+    """
+    Description:
+        Measures Sudoku.generate for a number of seconds.
+    Parameters:
+        duration (float): The number of seconds to run for.
+    Returns:
+        A dictionary of metrics.
+    """
+    sudoku = Sudoku()
+    times = []
+    nodes = 0
+    backtracks = 0
+    start = time.perf_counter()
+    while (time.perf_counter() - start < duration):
+        before = time.perf_counter()
+        sudoku.generate()
+        times.append(time.perf_counter() - before)
+        nodes += sudoku.nodes
+        backtracks += sudoku.backtracks
+
+    metrics = {"generate.boardsPerSecond": len(times) / sum(times),
+               "generate.meanNodes": nodes / len(times),
+               "generate.meanBacktracks": backtracks / len(times)}
+    metrics.update(latencies("generate.latency", times))
+    return metrics
+
+def benchmarkSized(duration, sizes=(16, 25)):
+    """
+    Description:
+        Measures Sudoku.generate for grids larger than 9X9 for a number of seconds each.
+    Parameters:
+        duration (float): The number of seconds to run each size for.
+        sizes (int[]): The grid sizes to measure.
+    Returns:
+        A dictionary of metrics.
+    """
+    metrics = {}
+    for size in sizes:
+        sudoku = Sudoku(size)
+        times = []
+        start = time.perf_counter()
+        while (time.perf_counter() - start < duration or len(times) < 3):
+            before = time.perf_counter()
+            sudoku.generate()
+            times.append(time.perf_counter() - before)
+        metrics["generate{}.boardsPerSecond".format(size)] = len(times) / sum(times)
+        metrics.update(latencies("generate{}.latency".format(size), times))
+    return metrics
+
+def benchmarkFixedSweep(repeats):
+    """
+    Description:
+        Measures Sudoku.generateFixed for every position and value.
+    Parameters:
+        repeats (int): The number of grids generated for each position and value.
+    Returns:
+        A dictionary of metrics, and an array with the mean time, nodes, and backtracks of every position and value.
+    """
+    sudoku = Sudoku()
+    times = []
+    sweep = []
+    for position in range(0, 81):
+        for value in range(1, 10):
+            pairTimes = []
+            nodes = 0
+            backtracks = 0
+            for i in range(0, repeats):
+                before = time.perf_counter()
+                sudoku.generateFixed(position, value)
+                pairTimes.append(time.perf_counter() - before)
+                nodes += sudoku.nodes
+                backtracks += sudoku.backtracks
+            times.extend(pairTimes)
+            sweep.append(dict(position=position, value=value, meanMs=1000 * sum(pairTimes) / repeats,
+                              maxMs=1000 * max(pairTimes), meanNodes=nodes / repeats, meanBacktracks=backtracks / repeats))
+
+    metrics = {"generateFixed.boardsPerSecond": len(times) / sum(times),
+               "generateFixed.worstPairMeanMs": max(pair["meanMs"] for pair in sweep),
+               "generateFixed.worstPairMeanBacktracks": max(pair["meanBacktracks"] for pair in sweep)}
+    metrics.update(latencies("generateFixed.latency", times))
+    return metrics, sweep
+
+def benchmarkSymmetry(duration):
+    """
+    Description:
+        Measures SymmetryGenerator.generate and generateFixed for a number of seconds each.
+    Parameters:
+        duration (float): The number of seconds to run each method for.
+    Returns:
+        A dictionary of metrics.
+    """
+    generator = SymmetryGenerator()
+    metrics = {}
+    for name, method in [("generate", lambda i: generator.generate()),
+                         ("generateFixed", lambda i: generator.generateFixed(i % 81, i % 9 + 1))]:
+        count = 0
+        start = time.perf_counter()
+        while (time.perf_counter() - start < duration):
+            for i in range(count, count + 1000):
+                method(i)
+            count += 1000
+        metrics["symmetry.{}.boardsPerSecond".format(name)] = count / (time.perf_counter() - start)
+    return metrics
+
+def benchmarkValidate(duration):
+    """
+    Description:
+        Measures Sudoku.validate, and Sudoku.validateMany on raw and encoded grids if NumPy is installed.
+    Parameters:
+        duration (float): The number of seconds to run each method for.
+    Returns:
+        A dictionary of metrics.
+    """
+    generator = SymmetryGenerator()
+    grids = [generator.generate() for i in range(0, 1000)]
+    metrics = {}
+
+    count = 0
+    start = time.perf_counter()
+    while (time.perf_counter() - start < duration):
+        for grid in grids:
+            Sudoku.validate(grid)
+        count += len(grids)
+    metrics["validate.gridsPerSecond"] = count / (time.perf_counter() - start)
+
+    try:
+        packedGrids = b"".join(bytes(grid) for grid in grids) * 100
+        count = 0
+        start = time.perf_counter()
+        while (time.perf_counter() - start < duration):
+            Sudoku.validateMany(packedGrids)
+            count += len(packedGrids) // 81
+        metrics["validateMany.gridsPerSecond"] = count / (time.perf_counter() - start)
+
+        encodedGrids = b"".join(Sudoku.encodeGrid(grid) for grid in grids) * 100
+        count = 0
+        start = time.perf_counter()
+        while (time.perf_counter() - start < duration):
+            Sudoku.validateMany(encodedGrids, encoded=True)
+            count += len(encodedGrids) // 41
+        metrics["validateMany.encodedGridsPerSecond"] = count / (time.perf_counter() - start)
+    except ImportError:
+        pass
+    return metrics
+
+def runBenchmarks(duration, repeats):
+    """
+    Description:
+        Runs every benchmark.
+    Parameters:
+        duration (float): The number of seconds to run each timed benchmark for.
+        repeats (int): The number of grids generated for each position and value of the generateFixed sweep.
+    Returns:
+        A dictionary holding information about the machine, every metric, and the generateFixed sweep.
+    """
+    metrics = benchmarkGenerate(duration)
+    fixedMetrics, sweep = benchmarkFixedSweep(repeats)
+    metrics.update(fixedMetrics)
+    metrics.update(benchmarkSized(duration))
+    metrics.update(benchmarkSymmetry(duration))
+    metrics.update(benchmarkValidate(duration))
+    return dict(machine=dict(python=platform.python_version(), platform=platform.platform(),
+                             processor=platform.processor()),
+                time=time.strftime("%Y-%m-%dT%H:%M:%S"), duration=duration, repeats=repeats,
+                metrics=metrics, fixedSweep=sweep)
+
+def compareResults(baseline, current, threshold, tolerance=0.0):
+    """
+    Description:
+        Compares the metrics of two benchmark runs. A relative change cannot be taken from a baseline of 0, so a
+        lower is better metric that was 0 regresses when it grows by more than an absolute tolerance instead.
+    Parameters:
+        baseline (dict): The results to compare against.
+        current (dict): The new results.
+        threshold (float): The largest allowed relative change for the worse, e.g. 0.1 for 10%.
+        tolerance (float): The largest allowed increase of a lower is better metric with a baseline of 0.
+    Returns:
+        An array of (metric, baseline value, current value, relative change, regressed) tuples. The relative change is
+        positive when the metric got better, and negative infinity when a metric with a baseline of 0 got worse.
+    """
+    comparison = []
+    for metric in sorted(baseline["metrics"]):
+        if (metric not in current["metrics"]):
+            continue
+        before = baseline["metrics"][metric]
+        after = current["metrics"][metric]
+        lowerIsBetter = metric.endswith(LOWER_IS_BETTER)
+        if (before == 0):
+            worse = lowerIsBetter and after > tolerance
+            comparison.append((metric, before, after, float("-inf") if worse else 0.0, worse))
+            continue
+        change = (before - after) / before if lowerIsBetter else (after - before) / before
+        comparison.append((metric, before, after, change, change < -threshold))
+    return comparison
+
+def printResults(results, slowest=10):
+    """
+    Description:
+        Prints the metrics of a benchmark run and the slowest positions and values of the generateFixed sweep.
+    Parameters:
+        results (dict): The results of a benchmark run.
+        slowest (int): The number of slowest positions and values to print.
+    """
+    for metric in sorted(results["metrics"]):
+        print("{:45} {:14.3f}".format(metric, results["metrics"][metric]))
+
+    print("\nSlowest generateFixed inputs:")
+    for pair in sorted(results["fixedSweep"], key=lambda pair: pair["meanMs"], reverse=True)[0:slowest]:
+        print("  position {:2} value {}: {:8.3f}ms mean {:8.3f}ms max {:6.1f} backtracks".format(
+            pair["position"], pair["value"], pair["meanMs"], pair["maxMs"], pair["meanBacktracks"]))
+
+def printComparison(comparison):
+    """
+    Description:
+        Prints the comparison of two benchmark runs.
+    Parameters:
+        comparison (tuple[]): The comparison made by compareResults.
+    """
+    for metric, before, after, change, regressed in comparison:
+        print("{:45} {:14.3f} {:14.3f} {:+8.1%}{}".format(metric, before, after, change, "  REGRESSION" if regressed else ""))
+
+if (__name__ == '__main__'):
+    parser = argparse.ArgumentParser(description="Benchmarks sudoku generation and validation.")
+    parser.add_argument("--output", help="file to write the results to as JSON")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds to run each timed benchmark for")
+    parser.add_argument("--repeats", type=int, default=3, help="grids generated per position and value in the sweep")
+    parser.add_argument("--compare", metavar="BASELINE", help="results file to compare against")
+    parser.add_argument("--current", help="compare this results file instead of running the benchmarks")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed relative regression (default 0.1)")
+    parser.add_argument("--tolerance", type=float, default=0.0,
+                        help="allowed increase of a lower is better metric with a baseline of 0 (default 0)")
+    arguments = parser.parse_args()
+
+    if (arguments.current):
+        with open(arguments.current) as resultsFile:
+            results = json.load(resultsFile)
+    else:
+        results = runBenchmarks(arguments.duration, arguments.repeats)
+        printResults(results)
+        if (arguments.output):
+            with open(arguments.output, "w") as resultsFile:
+                json.dump(results, resultsFile, indent=2)
+
+    if (arguments.compare):
+        with open(arguments.compare) as baselineFile:
+            baseline = json.load(baselineFile)
+        comparison = compareResults(baseline, results, arguments.threshold, arguments.tolerance)
+        print("\nCompared with {}:".format(arguments.compare))
+        printComparison(comparison)
+        if (any(regressed for metric, before, after, change, regressed in comparison)):
+            sys.exit(1)
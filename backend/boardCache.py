@@ -0,0 +1,82 @@
+import threading
+from collections import OrderedDict
+
+class BoardCache:
+    """
+    Description:
+        A bounded, thread safe least recently used cache of generated sudoku grids. Concurrent requests for a key
+        that is not cached yet wait for the first request's generation instead of generating the grid again.
+    Variables:
+        size (int): The most grids the cache will hold.
+        entries (OrderedDict): The cached grids, from least to most recently used.
+        pending (dict): Events for the keys that are being generated.
+        hits (int): The number of requests served from the cache.
+        misses (int): The number of requests that generated a grid.
+    Methods:
+        get(object, function)
+        stats()
+    """
+
+    def __init__(self, size=1024):
+        """
+        Description:
+            Constructor for the BoardCache class.
+        Parameters:
+            size (int): The most grids the cache will hold.
+        """
+        self.size = size
+        self.entries = OrderedDict()
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, generator):
+        """
+        Description:
+            Gets the grid cached for a key, generating and caching it if it is not cached.
+        Parameters:
+            key (object): The key of the grid, e.g. a (seed, position, value) tuple.
+            generator (function): Function called without arguments to generate the grid on a miss.
+        Returns:
+            The cached grid.
+        """
+        while True:
+            with self.lock:
+                if (key in self.entries):
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return self.entries[key]
+
+                event = self.pending.get(key)
+                if (event is None):
+                    event = threading.Event()
+                    self.pending[key] = event
+                    self.misses += 1
+                    break
+
+            # Another request is generating this grid, so wait for it and check the cache again.
+            event.wait()
+
+        try:
+            grid = generator()
+            with self.lock:
+                self.entries[key] = grid
+                if (len(self.entries) > self.size):
+                    self.entries.popitem(last=False)
+        finally:
+            with self.lock:
+                del self.pending[key]
+            event.set()
+        return grid
+
+    def stats(self):
+        """
+        Description:
+            Gets the cache's size and hit/miss counts.
+        Returns:
+            A dictionary with the cache's size, number of entries, hits, and misses.
+        """
+        with self.lock:
+            return dict(size=self.size, entries=len(self.entries), hits=self.hits, misses=self.misses)
+# End of BoardCache
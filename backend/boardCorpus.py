@@ -0,0 +1,207 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+from multiprocessing import Pool
+from random import Random
+from sudoku import Sudoku
+
+# Corpus files start with a magic string followed by the number of records and the size of a record. Records are
+# grids packed by Sudoku.encodeGrid.
+CORPUS_MAGIC = b"SUDOKUC1"
+INDEX_MAGIC = b"SUDOKUI1"
+HEADER = struct.Struct("<8sII")
+RECORD_SIZE = 41
+
+# Index files hold the header, then 730 offsets into the entries (one per (position, value) bucket plus the end),
+# then the record numbers of every bucket one after the other. The bucket of a position and value is
+# position * 9 + value - 1.
+BUCKETS = 729
+OFFSETS = struct.Struct("<{}I".format(BUCKETS + 1))
+ENTRY = struct.Struct("<I")
+
+def generateChunk(size):
+    """
+    Description:
+        Generates a chunk of grids. Module level so that it can be sent to worker processes.
+    Parameters:
+        size (int): The number of grids to generate.
+    Returns:
+        A bytes object holding the grids one after the other, 81 bytes per grid.
+    """
+    sudoku = Sudoku()
+    return b"".join(bytes(sudoku.generate()) for i in range(0, size))
+
+def buildCorpus(path, count, workers=None, chunkSize=1000):
+    """
+    Description:
+        Generates grids and writes them to a corpus file (path + ".bin") along with an index (path + ".idx") from each
+        (position, value) pair to the records holding that value at that position.
+    Parameters:
+        path (string): The path of the corpus files, without extension.
+        count (int): The number of grids to generate.
+        workers (int): The number of processes generating grids. Defaults to the number of cores.
+        chunkSize (int): The number of grids each process generates at a time.
+    """
+    import numpy
+
+    grids = numpy.empty((count, 81), dtype=numpy.uint8)
+    chunks = [min(chunkSize, count - start) for start in range(0, count, chunkSize)]
+
+    with open(path + ".bin", "wb") as corpusFile:
+        corpusFile.write(HEADER.pack(CORPUS_MAGIC, count, RECORD_SIZE))
+        with Pool(processes=workers) as pool:
+            start = 0
+            for chunk in pool.imap(generateChunk, chunks):
+                rows = numpy.frombuffer(chunk, dtype=numpy.uint8).reshape(-1, 81)
+                grids[start:start + len(rows)] = rows
+                start += len(rows)
+
+                # Pack two positions per byte, matching Sudoku.encodeGrid.
+                packed = numpy.empty((len(rows), RECORD_SIZE), dtype=numpy.uint8)
+                packed[:, 0:40] = (rows[:, 0:80:2] << 4) | rows[:, 1:80:2]
+                packed[:, 40] = rows[:, 80] << 4
+                corpusFile.write(packed.tobytes())
+
+    # Write the record numbers of every bucket, in bucket order.
+    with open(path + ".idx", "wb") as indexFile:
+        indexFile.write(HEADER.pack(INDEX_MAGIC, count, ENTRY.size))
+
+        # The offsets are written once the size of every bucket is known.
+        indexFile.write(OFFSETS.pack(*([0] * (BUCKETS + 1))))
+        offsets = [0]
+        for position in range(0, 81):
+            column = numpy.ascontiguousarray(grids[:, position])
+            for value in range(1, 10):
+                records = numpy.flatnonzero(column == value).astype("<u4")
+                indexFile.write(records.tobytes())
+                offsets.append(offsets[-1] + len(records))
+
+        indexFile.seek(HEADER.size)
+        indexFile.write(OFFSETS.pack(*offsets))
+
+class BoardCorpus:
+    """
+    Description:
+        A precomputed corpus of sudoku grids read through memory maps. Grids are served by reading a random record,
+        or a random record from a (position, value) bucket of the index, so serving needs no generation. The maps are
+        shared between processes through the page cache.
+    Variables:
+        path (string): The path of the corpus files, without extension.
+        count (int): The number of grids in the corpus.
+        records (mmap): The memory map of the corpus file.
+        index (mmap): The memory map of the index file.
+        random (Random): The random number generator used to pick records.
+    Methods:
+        close()
+        record(int)
+        randomBoard()
+        randomFixedBoard(int, int)
+        validate()
+    """
+
+    def __init__(self, path):
+        """
+        Description:
+            Constructor for the BoardCorpus class. Maps the corpus and index files.
+        Parameters:
+            path (string): The path of the corpus files, without extension.
+        """
+        self.path = path
+        self.random = Random()
+
+        with open(path + ".bin", "rb") as corpusFile:
+            self.records = mmap.mmap(corpusFile.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(path + ".idx", "rb") as indexFile:
+            self.index = mmap.mmap(indexFile.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.count, recordSize = HEADER.unpack_from(self.records, 0)
+        if (magic != CORPUS_MAGIC or recordSize != RECORD_SIZE or self.count <= 0):
+            raise ValueError("{}.bin is not a sudoku corpus".format(path))
+        magic, indexCount, entrySize = HEADER.unpack_from(self.index, 0)
+        if (magic != INDEX_MAGIC or indexCount != self.count or entrySize != ENTRY.size):
+            raise ValueError("{}.idx is not the index of {}.bin".format(path, path))
+
+    def close(self):
+        """
+        Description:
+            Closes the memory maps.
+        """
+        self.records.close()
+        self.index.close()
+
+    def record(self, number):
+        """
+        Description:
+            Reads a grid from the corpus.
+        Parameters:
+            number (int): The number of the record to read.
+        Returns:
+            Returns a int array representing a sudoku grid.
+        """
+        start = HEADER.size + number * RECORD_SIZE
+        return Sudoku.decodeGrid(self.records[start:start + RECORD_SIZE])
+
+    def randomBoard(self):
+        """
+        Description:
+            Reads a random grid from the corpus.
+        Returns:
+            Returns a int array representing a sudoku grid.
+        """
+        return self.record(self.random.randrange(self.count))
+
+    def randomFixedBoard(self, position, value):
+        """
+        Description:
+            Reads a random grid with a fixed value at a position from the corpus.
+        Parameters:
+            position (int): The position of the fixed value.
+            value (int): The value that is fixed.
+        Returns:
+            Returns a int array representing a sudoku grid, a grid of all 0s if the position and value are invalid, or
+            None if no grid in the corpus has the value at the position.
+        """
+        # Checks that the given position and value params are valid.
+        if (position < 0 or position >= 81 or value <= 0 or value > 9):
+            return [0 for i in range(0, 81)]
+
+        bucket = position * 9 + value - 1
+        start, end = struct.unpack_from("<2I", self.index, HEADER.size + bucket * 4)
+        if (start == end):
+            return None
+
+        entry = self.random.randrange(start, end)
+        number = ENTRY.unpack_from(self.index, HEADER.size + OFFSETS.size + entry * ENTRY.size)[0]
+        return self.record(number)
+
+    def validate(self):
+        """
+        Description:
+            Checks every grid of the corpus without decoding them one at a time. Requires NumPy.
+        Returns:
+            A boolean array that is True for every valid grid.
+        """
+        records = memoryview(self.records)[HEADER.size:HEADER.size + self.count * RECORD_SIZE]
+        try:
+            return Sudoku.validateMany(records, encoded=True)
+        finally:
+            # The map cannot be closed while a view of it exists.
+            records.release()
+# End of BoardCorpus
+
+if (__name__ == '__main__'):
+    parser = argparse.ArgumentParser(description="Builds a precomputed corpus of sudoku grids and its index.")
+    parser.add_argument("output", help="path of the corpus files, without extension")
+    parser.add_argument("--count", type=int, default=1000000, help="number of grids to generate")
+    parser.add_argument("--workers", type=int, default=None, help="number of generating processes (default: cores)")
+    parser.add_argument("--chunk", type=int, default=1000, help="grids generated per process at a time")
+    arguments = parser.parse_args()
+
+    if (arguments.count <= 0):
+        parser.error("--count must be positive")
+    buildCorpus(arguments.output, arguments.count, arguments.workers, arguments.chunk)
+    print("Wrote {} grids to {}.bin ({} bytes) and {}.idx ({} bytes)".format(
+        arguments.count, arguments.output, os.path.getsize(arguments.output + ".bin"),
+        arguments.output, os.path.getsize(arguments.output + ".idx")), file=sys.stderr)
@@ -0,0 +1,172 @@
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from sudoku import Sudoku
+
+def generateBoard(endpoint=None):
+    """
+    Description:
+        Generates a single sudoku grid. Module level so that it can be sent to worker processes.
+    Parameters:
+        endpoint (string): Label of the endpoint the grid is generated for. Unused here, but generators that record
+            metrics use it.
+    Returns:
+        Returns a int array representing a sudoku grid.
+    """
+    return Sudoku().generate()
+
+class BoardPool:
+    """
+    Description:
+        A bounded pool of pre-generated sudoku grids. Requests take grids from the pool, while background workers
+        generate new grids whenever the pool is below its high-water mark. If the pool is empty a grid is generated
+        on demand instead.
+    Variables:
+        size (int): The high-water mark, i.e. the most grids the pool will hold.
+        workers (int): The number of background workers refilling the pool.
+        useProcesses (boolean): Flag that determines if workers generate grids in separate processes.
+        generator (function): Function used to generate a grid when the pool is empty, and by workers when they do
+            not use their own processes. It is passed the label of the endpoint the grid is generated for.
+        boards (deque): The grids that are ready to be served.
+        hits (int): The number of requests served from the pool.
+        misses (int): The number of requests that found the pool empty.
+    Methods:
+        start()
+        stop()
+        get((boolean), (string))
+        depth()
+        stats()
+        refill()
+    """
+
+    def __init__(self, size=64, workers=1, useProcesses=False, generator=generateBoard):
+        """
+        Description:
+            Constructor for the BoardPool class.
+        Parameters:
+            size (int): The most grids the pool will hold.
+            workers (int): The number of background workers refilling the pool.
+            useProcesses (boolean): Flag that determines if workers generate grids in separate processes.
+            generator (function): Function used to generate a grid when workers do not use their own processes.
+        """
+        self.size = size
+        self.workers = workers
+        self.useProcesses = useProcesses
+        self.generator = generator
+        self.boards = deque(maxlen=size)
+        self.hits = 0
+        self.misses = 0
+        self.running = False
+        self.threads = []
+        self.executor = None
+        self.condition = threading.Condition()
+        self.statsLock = threading.Lock()
+
+    def start(self):
+        """
+        Description:
+            Starts the background workers.
+        """
+        with self.condition:
+            if (self.running):
+                return
+            self.running = True
+
+        if (self.useProcesses):
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        self.threads = [threading.Thread(target=self.refill, daemon=True) for i in range(0, self.workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        """
+        Description:
+            Stops the background workers and waits for them to finish.
+        """
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+        if (self.executor is not None):
+            self.executor.shutdown()
+            self.executor = None
+
+    def get(self, generate=True, endpoint="pool"):
+        """
+        Description:
+            Takes a grid from the pool, generating one on demand if the pool is empty.
+        Parameters:
+            generate (boolean): Flag that determines if a grid is generated when the pool is empty. Callers that
+                cannot block, such as the asynchronous server, generate it themselves.
+            endpoint (string): Label of the calling endpoint, passed to the generator for a grid made on demand.
+        Returns:
+            Returns a int array representing a sudoku grid, or None if the pool is empty and generate is not set.
+        """
+        try:
+            grid = self.boards.popleft()
+            hit = True
+        except IndexError:
+            grid = None
+            hit = False
+
+        with self.statsLock:
+            if (hit):
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        # Wake a worker to replace the grid that was taken.
+        with self.condition:
+            self.condition.notify()
+
+        if (grid is None and generate):
+            grid = self.generator(endpoint)
+        return grid
+
+    def depth(self):
+        """
+        Description:
+            Gets the number of grids ready to be served.
+        Returns:
+            The number of grids in the pool.
+        """
+        return len(self.boards)
+
+    def stats(self):
+        """
+        Description:
+            Gets the pool's current depth and hit/miss counts.
+        Returns:
+            A dictionary with the pool's size, depth, hits, and misses.
+        """
+        with self.statsLock:
+            return dict(size=self.size, depth=self.depth(), hits=self.hits, misses=self.misses)
+
+    def refill(self):
+        """
+        Description:
+            Loop run by each background worker. Generates grids until the pool reaches its high-water mark, then
+            waits until a grid is taken.
+        """
+        while True:
+            with self.condition:
+                while (self.running and len(self.boards) >= self.size):
+                    self.condition.wait()
+                if (not self.running):
+                    return
+
+            # A failed generation is skipped so that the worker keeps running.
+            try:
+                if (self.executor is not None):
+                    grid = self.executor.submit(generateBoard).result()
+                else:
+                    grid = self.generator("pool")
+            except Exception:
+                continue
+            self.boards.append(grid)
+# End of BoardPool
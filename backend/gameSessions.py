@@ -0,0 +1,424 @@
+import sqlite3
+import struct
+import threading
+import time
+from collections import OrderedDict
+from sudoku import ALL_VALUES, BLOCKS, COLUMNS, ROWS
+
+class Game:
+    """
+    Description:
+        A game in progress on a 9X9 puzzle. The values still available in every row, column, and block are kept as
+        bit masks, so a move is checked and applied in constant time. Moves that conflict with a value already in the
+        grid are rejected, so a full grid is always a solved one.
+    Variables:
+        grid (bytearray): The 81 values of the grid, 0 in empty positions.
+        givens (int): Bit mask of the positions given by the puzzle, which cannot be changed. Bit n is position n.
+        rowMasks (int[]): Bit masks of the values still available in each row. Bit n - 1 is set if n is available.
+        colMasks (int[]): Bit masks of the values still available in each column.
+        blockMasks (int[]): Bit masks of the values still available in each block.
+        filled (int): The number of positions holding a value.
+    Methods:
+        move(int, int)
+        solved()
+        copy()
+        encode()
+        decode(bytes)
+    """
+
+    __slots__ = ("grid", "givens", "rowMasks", "colMasks", "blockMasks", "filled")
+
+    # An encoded game holds the grid, the givens mask, then the row, column, and block masks and the number of filled
+    # positions, so that it is restored without replaying the grid.
+    STATE = struct.Struct("<27HB")
+    ENCODED_SIZE = 81 + 11 + STATE.size
+
+    # Size of games encoded before the masks were stored, which are restored by replaying their grid.
+    GRID_ENCODED_SIZE = 81 + 11
+
+    def __init__(self, puzzle, givens=None):
+        """
+        Description:
+            Constructor for the Game class. Raises a ValueError if the values of the puzzle conflict.
+        Parameters:
+            puzzle (int[]): The 81 values of the grid, 0 in empty positions.
+            givens (int): Bit mask of the positions that cannot be changed. Defaults to every position holding a
+                value.
+        """
+        if (len(puzzle) != 81):
+            raise ValueError("A game needs 81 positions")
+
+        self.grid = bytearray(81)
+        self.rowMasks = [ALL_VALUES] * 9
+        self.colMasks = [ALL_VALUES] * 9
+        self.blockMasks = [ALL_VALUES] * 9
+        self.filled = 0
+        self.givens = 0
+        for position, value in enumerate(puzzle):
+            if (value != 0):
+                accepted, reason = self.move(position, value)
+                if (not accepted):
+                    raise ValueError("Puzzle value {} at position {} is {}".format(value, position, reason))
+        self.givens = sum(1 << position for position in range(0, 81) if self.grid[position]) if givens is None else givens
+
+    def move(self, position, value):
+        """
+        Description:
+            Checks a move and applies it if it is allowed.
+        Parameters:
+            position (int): The position to change.
+            value (int): The value to insert, or 0 to clear the position.
+        Returns:
+            A tuple of True and None if the move was applied, otherwise False and the reason: "invalid" for a
+            position or value out of range, "given" for a position given by the puzzle, or "conflict" for a value
+            already in the position's row, column, or block.
+        """
+        if (position < 0 or position >= 81 or value < 0 or value > 9):
+            return False, "invalid"
+        if ((self.givens >> position) & 1):
+            return False, "given"
+
+        current = self.grid[position]
+        if (value == current):
+            return True, None
+        row = ROWS[position]
+        col = COLUMNS[position]
+        block = BLOCKS[position]
+
+        if (value != 0):
+            bit = 1 << (value - 1)
+            if (not (self.rowMasks[row] & self.colMasks[col] & self.blockMasks[block] & bit)):
+                return False, "conflict"
+            self.rowMasks[row] &= ~bit
+            self.colMasks[col] &= ~bit
+            self.blockMasks[block] &= ~bit
+
+        # The value being replaced becomes available again.
+        if (current != 0):
+            bit = 1 << (current - 1)
+            self.rowMasks[row] |= bit
+            self.colMasks[col] |= bit
+            self.blockMasks[block] |= bit
+
+        self.filled += (value != 0) - (current != 0)
+        self.grid[position] = value
+        return True, None
+
+    def solved(self):
+        """
+        Description:
+            Determines if the game is finished. As conflicting moves are rejected, a full grid is a valid grid.
+        Returns:
+            True if every position holds a value, otherwise false.
+        """
+        return self.filled == 81
+
+    def copy(self):
+        """
+        Description:
+            Copies the game, so that a snapshot can be read while the game is changed.
+        Returns:
+            The new Game.
+        """
+        game = Game.__new__(Game)
+        game.grid = bytearray(self.grid)
+        game.givens = self.givens
+        game.rowMasks = list(self.rowMasks)
+        game.colMasks = list(self.colMasks)
+        game.blockMasks = list(self.blockMasks)
+        game.filled = self.filled
+        return game
+
+    def encode(self):
+        """
+        Description:
+            Packs the game into bytes for stores that keep games outside the process.
+        Returns:
+            A bytes object holding the grid, the givens mask, the masks of available values, and the number of filled
+            positions.
+        """
+        return (bytes(self.grid) + self.givens.to_bytes(11, "little") +
+                Game.STATE.pack(*(self.rowMasks + self.colMasks + self.blockMasks + [self.filled])))
+
+    @staticmethod
+    def decode(encodedGame):
+        """
+        Description:
+            Unpacks a game packed by encode in constant time, without checking its values again.
+        Parameters:
+            encodedGame (bytes): The packed game.
+        Returns:
+            The Game.
+        """
+        givens = int.from_bytes(encodedGame[81:Game.GRID_ENCODED_SIZE], "little")
+        if (len(encodedGame) == Game.GRID_ENCODED_SIZE):
+            return Game(list(encodedGame[0:81]), givens)
+
+        state = Game.STATE.unpack_from(encodedGame, Game.GRID_ENCODED_SIZE)
+        game = Game.__new__(Game)
+        game.grid = bytearray(encodedGame[0:81])
+        game.givens = givens
+        game.rowMasks = list(state[0:9])
+        game.colMasks = list(state[9:18])
+        game.blockMasks = list(state[18:27])
+        game.filled = state[27]
+        return game
+# End of Game
+
+class MemorySessionStore:
+    """
+    Description:
+        A bounded, thread safe store of games in this process. Games expire after a time without being used, and the
+        least recently used game is evicted when the store is full.
+    Variables:
+        size (int): The most games the store will hold.
+        ttl (float): The seconds a game is kept after it was last used.
+        entries (OrderedDict): Maps game ids to their expiry time and game, from least to most recently used.
+    Methods:
+        get(string)
+        put(string, Game)
+        move(string, int, int)
+        delete(string)
+        stats()
+    """
+
+    def __init__(self, size=10000, ttl=3600.0):
+        """
+        Description:
+            Constructor for the MemorySessionStore class.
+        Parameters:
+            size (int): The most games the store will hold.
+            ttl (float): The seconds a game is kept after it was last used.
+        """
+        self.size = size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, gameId):
+        """
+        Description:
+            Gets a snapshot of a game, extending its expiry. The snapshot is not changed by later moves.
+        Parameters:
+            gameId (string): The id of the game.
+        Returns:
+            A copy of the Game, or None if there is no such game or it has expired.
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(gameId)
+            if (entry is None):
+                return None
+            if (entry[0] < now):
+                del self.entries[gameId]
+                return None
+            self.entries[gameId] = (now + self.ttl, entry[1])
+            self.entries.move_to_end(gameId)
+            return entry[1].copy()
+
+    def put(self, gameId, game):
+        """
+        Description:
+            Stores a game, evicting expired games and then the least recently used games if the store is full.
+        Parameters:
+            gameId (string): The id of the game.
+            game (Game): The game.
+        """
+        now = time.monotonic()
+        with self.lock:
+            self.entries[gameId] = (now + self.ttl, game)
+            self.entries.move_to_end(gameId)
+
+            # Entries are in order of use, so expired entries are at the front.
+            while (self.entries):
+                oldestId, (expires, oldest) = next(iter(self.entries.items()))
+                if (expires >= now and len(self.entries) <= self.size):
+                    break
+                del self.entries[oldestId]
+
+    def move(self, gameId, position, value):
+        """
+        Description:
+            Checks a move in a game and applies it if it is allowed, atomically, extending the game's expiry.
+        Parameters:
+            gameId (string): The id of the game.
+            position (int): The position to change.
+            value (int): The value to insert, or 0 to clear the position.
+        Returns:
+            A tuple of a copy of the Game after the move, whether the move was applied, and the reason it was not, or
+            None if there is no such game or it has expired.
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(gameId)
+            if (entry is None or entry[0] < now):
+                return None
+            game = entry[1]
+            accepted, reason = game.move(position, value)
+            self.entries[gameId] = (now + self.ttl, game)
+            self.entries.move_to_end(gameId)
+            return game.copy(), accepted, reason
+
+    def delete(self, gameId):
+        """
+        Description:
+            Removes a game.
+        Parameters:
+            gameId (string): The id of the game.
+        """
+        with self.lock:
+            self.entries.pop(gameId, None)
+
+    def stats(self):
+        """
+        Description:
+            Gets the store's size and number of games.
+        Returns:
+            A dictionary with the store's kind, size, and number of games.
+        """
+        with self.lock:
+            return dict(store="memory", size=self.size, games=len(self.entries))
+# End of MemorySessionStore
+
+class SqliteSessionStore:
+    """
+    Description:
+        A bounded store of games in a local SQLite file used as a key-value store, so that every server process sees
+        the same games. Games are kept encoded with their masks, so reading one takes constant time. Games expire after
+        a time without being used, and the least recently used game is evicted when the store is full.
+    Variables:
+        path (string): The path of the SQLite file.
+        size (int): The most games the store will hold.
+        ttl (float): The seconds a game is kept after it was last used.
+        connections (local): Each thread's connection to the file.
+    Methods:
+        connection()
+        get(string)
+        put(string, Game)
+        move(string, int, int)
+        delete(string)
+        stats()
+    """
+
+    def __init__(self, path, size=10000, ttl=3600.0):
+        """
+        Description:
+            Constructor for the SqliteSessionStore class. Creates the table of games if it does not exist.
+        Parameters:
+            path (string): The path of the SQLite file.
+            size (int): The most games the store will hold.
+            ttl (float): The seconds a game is kept after it was last used.
+        """
+        self.path = path
+        self.size = size
+        self.ttl = ttl
+        self.connections = threading.local()
+
+        # The connection is closed straight away so that it is never shared with processes forked later.
+        connection = sqlite3.connect(path, timeout=5.0)
+        with connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS games (id TEXT PRIMARY KEY, expires REAL, game BLOB)")
+            connection.execute("CREATE INDEX IF NOT EXISTS gamesExpires ON games (expires)")
+        connection.close()
+
+    def connection(self):
+        """
+        Description:
+            Gets the calling thread's connection, opening it on first use.
+        Returns:
+            The sqlite3 Connection.
+        """
+        connection = getattr(self.connections, "connection", None)
+        if (connection is None):
+            connection = sqlite3.connect(self.path, timeout=5.0)
+            self.connections.connection = connection
+        return connection
+
+    def get(self, gameId):
+        """
+        Description:
+            Gets a game, extending its expiry.
+        Parameters:
+            gameId (string): The id of the game.
+        Returns:
+            The Game, or None if there is no such game or it has expired.
+        """
+        now = time.time()
+        with self.connection() as connection:
+            row = connection.execute("SELECT game FROM games WHERE id = ? AND expires >= ?", (gameId, now)).fetchone()
+            if (row is None):
+                return None
+            connection.execute("UPDATE games SET expires = ? WHERE id = ?", (now + self.ttl, gameId))
+        return Game.decode(row[0])
+
+    def put(self, gameId, game):
+        """
+        Description:
+            Stores a game, removing expired games and then the least recently used games if the store is full.
+        Parameters:
+            gameId (string): The id of the game.
+            game (Game): The game.
+        """
+        now = time.time()
+        with self.connection() as connection:
+            connection.execute("INSERT OR REPLACE INTO games (id, expires, game) VALUES (?, ?, ?)",
+                               (gameId, now + self.ttl, game.encode()))
+            connection.execute("DELETE FROM games WHERE expires < ?", (now,))
+
+            # Every use extends a game's expiry by the same time, so the earliest expiries are the least recently used.
+            excess = connection.execute("SELECT COUNT(*) FROM games").fetchone()[0] - self.size
+            if (excess > 0):
+                connection.execute("DELETE FROM games WHERE id IN (SELECT id FROM games ORDER BY expires LIMIT ?)",
+                                   (excess,))
+
+    def move(self, gameId, position, value):
+        """
+        Description:
+            Checks a move in a game and applies it if it is allowed, extending the game's expiry. The game is only
+            written back if it has not changed since it was read, and the move is retried on the new game otherwise,
+            so moves from different processes are never lost.
+        Parameters:
+            gameId (string): The id of the game.
+            position (int): The position to change.
+            value (int): The value to insert, or 0 to clear the position.
+        Returns:
+            A tuple of the Game, whether the move was applied, and the reason it was not, or None if there is no such
+            game or it has expired.
+        """
+        while (True):
+            now = time.time()
+            with self.connection() as connection:
+                row = connection.execute("SELECT game FROM games WHERE id = ? AND expires >= ?",
+                                         (gameId, now)).fetchone()
+                if (row is None):
+                    return None
+                game = Game.decode(row[0])
+                accepted, reason = game.move(position, value)
+
+                # The encoded game holds its whole state, so comparing it swaps the game only if it is unchanged.
+                updated = connection.execute("UPDATE games SET expires = ?, game = ? WHERE id = ? AND game = ?",
+                                             (now + self.ttl, game.encode(), gameId, row[0])).rowcount
+            if (updated):
+                return game, accepted, reason
+
+    def delete(self, gameId):
+        """
+        Description:
+            Removes a game.
+        Parameters:
+            gameId (string): The id of the game.
+        """
+        with self.connection() as connection:
+            connection.execute("DELETE FROM games WHERE id = ?", (gameId,))
+
+    def stats(self):
+        """
+        Description:
+            Gets the store's size and number of games.
+        Returns:
+            A dictionary with the store's kind, size, and number of games that have not expired.
+        """
+        with self.connection() as connection:
+            games = connection.execute("SELECT COUNT(*) FROM games WHERE expires >= ?", (time.time(),)).fetchone()[0]
+        return dict(store="sqlite", size=self.size, games=games)
+# End of SqliteSessionStore
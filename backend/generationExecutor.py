@@ -0,0 +1,329 @@
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from sudoku import Sudoku
+
+def runJob(method, args, withStats=False, size=9):
+    """
+    Description:
+        Runs a Sudoku generation method on a new Sudoku instance, so that a seeded job never affects the random
+        numbers of later jobs. Module level so that it can be sent to worker processes.
+    Parameters:
+        method (string): The name of the Sudoku method to run, e.g. "generate" or "generateFixed".
+        args (tuple): The arguments to pass to the method.
+        withStats (boolean): Flag that determines if the Sudoku's stats are returned along with the result.
+        size (int): The size of the Sudoku's grids.
+    Returns:
+        The result of the method, or a tuple of the result and the Sudoku's stats if withStats is set.
+    """
+    sudoku = Sudoku(size)
+    result = getattr(sudoku, method)(*args)
+    if (withStats):
+        return result, sudoku.stats()
+    return result
+
+def puzzleJob(clues, timeBudget, withStats=False):
+    """
+    Description:
+        Generates a puzzle with a unique solution on a new Sudoku instance. Module level so that it can be sent to
+        worker processes, and returns the solution too since it is lost with the instance.
+    Parameters:
+        clues (int): The number of given values to aim for.
+        timeBudget (float): The most seconds to spend removing values.
+        withStats (boolean): Flag that determines if the Sudoku's stats are returned along with the result.
+    Returns:
+        A tuple of the puzzle and its solution, or a tuple of that and the Sudoku's stats if withStats is set.
+    """
+    sudoku = Sudoku()
+    result = (sudoku.generatePuzzle(clues, timeBudget), sudoku.getGrid())
+    if (withStats):
+        return result, sudoku.stats()
+    return result
+
+def batchJob(count, position=None, value=None, withStats=False):
+    """
+    Description:
+        Generates a chunk of a batch of sudoku grids on one Sudoku instance. Module level so that it can be sent to
+        worker processes.
+    Parameters:
+        count (int): The number of grids to generate.
+        position (int): The position of the fixed value, or None for grids without a fixed value.
+        value (int): The value that is fixed.
+        withStats (boolean): Flag that determines if the Sudoku's stats are returned along with each grid.
+    Returns:
+        An array of grids, or of tuples of a grid and the Sudoku's stats for it if withStats is set.
+    """
+    sudoku = Sudoku()
+    grids = []
+    for i in range(0, count):
+        gridData = sudoku.generate() if position is None else sudoku.generateFixed(position, value)
+        grids.append((gridData, sudoku.stats()) if withStats else gridData)
+    return grids
+
+def warmWorker():
+    """
+    Description:
+        Job used to start a worker process before any request needs it.
+    Returns:
+        The id of the worker process.
+    """
+    runJob("getGrid", ())
+    return os.getpid()
+
+class GenerationExecutor:
+    """
+    Description:
+        Runs sudoku generation in a warm pool of worker processes so that concurrent requests can use every core.
+        The pool is replaced in the background after a number of jobs to recycle its workers, so submitting a job
+        never waits for workers to start, and jobs that take too long raise a TimeoutError. With 0 workers jobs are run in the calling thread instead.
+    Variables:
+        workers (int): The number of worker processes.
+        timeout (float): The most seconds a caller waits for a job.
+        recycleAfter (int): The average number of jobs each worker runs before the pool is replaced. 0 never recycles.
+        jobs (int): The number of jobs submitted to the current pool.
+        pool (ProcessPoolExecutor): The current pool of worker processes.
+        warmups (Future[]): The jobs starting the current pool's workers.
+        recycling (boolean): Flag that is set while a new pool is started to replace the current one.
+    Methods:
+        start()
+        shutdown()
+        recycle()
+        submit(string, tuple, (boolean), (int))
+        submitJob(function, tuple)
+        run(string, tuple, (float), (boolean), (int))
+        runInWorker(function, tuple, (float))
+        generate((int), (float), (int))
+        generateFixed(int, int, (int), (float), (int))
+        generatePuzzle(int, float, (float), (boolean))
+    """
+
+    def __init__(self, workers=None, timeout=5.0, recycleAfter=1000):
+        """
+        Description:
+            Constructor for the GenerationExecutor class.
+        Parameters:
+            workers (int): The number of worker processes. Defaults to the number of cores.
+            timeout (float): The most seconds a caller waits for a job.
+            recycleAfter (int): The average number of jobs each worker runs before the pool is replaced.
+        """
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.timeout = timeout
+        self.recycleAfter = recycleAfter
+        self.jobs = 0
+        self.pool = None
+        self.warmups = []
+        self.recycling = False
+        self.lock = threading.Lock()
+
+    def start(self):
+        """
+        Description:
+            Creates the pool of worker processes if there is none, and waits for every worker to be ready.
+        """
+        if (self.workers <= 0):
+            return
+
+        # The lock is not held while waiting, so jobs can be submitted while the workers start.
+        with self.lock:
+            if (self.pool is None):
+                self.pool, self.warmups = self.createPool()
+                self.jobs = 0
+            warmups = self.warmups
+        for future in warmups:
+            future.result()
+
+    def createPool(self):
+        """
+        Description:
+            Creates a new pool of worker processes and submits a job starting each worker, without waiting for them.
+        Returns:
+            A tuple of the new ProcessPoolExecutor and the Futures of the jobs starting its workers.
+        """
+        pool = ProcessPoolExecutor(max_workers=self.workers)
+        return pool, [pool.submit(warmWorker) for i in range(0, self.workers)]
+
+    def shutdown(self):
+        """
+        Description:
+            Shuts down the pool of worker processes, waiting for running jobs to finish.
+        """
+        with self.lock:
+            pool = self.pool
+            self.pool = None
+        if (pool is not None):
+            pool.shutdown(wait=True)
+
+    def recycle(self):
+        """
+        Description:
+            Replaces the pool of worker processes once the new pool's workers are ready. Jobs keep going to the old
+            pool until then, and jobs already submitted to it still finish.
+        """
+        oldPool = None
+        newPool = None
+        try:
+            newPool, warmups = self.createPool()
+            for future in warmups:
+                future.result()
+            with self.lock:
+                if (self.pool is not None):
+                    oldPool, self.pool, newPool = self.pool, newPool, None
+                    self.warmups = warmups
+                    self.jobs = 0
+        finally:
+            with self.lock:
+                self.recycling = False
+
+            # Jobs running on the old pool still finish. A new pool left here failed to start, or the executor was
+            # shut down while it started.
+            for pool in (oldPool, newPool):
+                if (pool is not None):
+                    pool.shutdown(wait=False)
+
+    def submit(self, method, args, withStats=False, size=9):
+        """
+        Description:
+            Submits a Sudoku generation method to a worker process without waiting for it. With 0 workers the method
+            is run straight away in the calling thread.
+        Parameters:
+            method (string): The name of the Sudoku method to run.
+            args (tuple): The arguments to pass to the method.
+            withStats (boolean): Flag that determines if the Sudoku's stats are returned along with the result.
+            size (int): The size of the grid to generate.
+        Returns:
+            A concurrent.futures Future holding the result of the method, or a tuple of the result and the Sudoku's
+            stats if withStats is set.
+        """
+        return self.submitJob(runJob, (method, args, withStats, size))
+
+    def submitJob(self, job, args):
+        """
+        Description:
+            Submits a module level job to a worker process without waiting for it. With 0 workers the job is run
+            straight away in the calling thread.
+        Parameters:
+            job (function): The job to run.
+            args (tuple): The arguments to pass to the job.
+        Returns:
+            A concurrent.futures Future holding the result of the job.
+        """
+        if (self.workers <= 0):
+            future = Future()
+            try:
+                future.set_result(job(*args))
+            except Exception as exception:
+                future.set_exception(exception)
+            return future
+
+        # Jobs never wait for workers to start: a new pool queues them behind its warm up jobs, and a pool due to be
+        # recycled is replaced by a background thread.
+        with self.lock:
+            if (self.pool is None):
+                self.pool, self.warmups = self.createPool()
+                self.jobs = 0
+            pool = self.pool
+            self.jobs += 1
+            recycle = (not self.recycling and self.recycleAfter > 0 and
+                       self.jobs >= self.recycleAfter * self.workers)
+            if (recycle):
+                self.recycling = True
+        if (recycle):
+            threading.Thread(target=self.recycle, daemon=True).start()
+
+        try:
+            return pool.submit(job, *args)
+        except (BrokenProcessPool, RuntimeError):
+            # A worker died or the pool was shut down since it was taken, so retry once on a current pool.
+            with self.lock:
+                if (self.pool is pool or self.pool is None):
+                    self.pool, self.warmups = self.createPool()
+                    self.jobs = 0
+                else:
+                    pool = None
+                newPool = self.pool
+            if (pool is not None):
+                pool.shutdown(wait=False)
+            return newPool.submit(job, *args)
+
+    def run(self, method, args, timeout=None, withStats=False, size=9):
+        """
+        Description:
+            Runs a Sudoku generation method in a worker process. Raises a concurrent.futures TimeoutError if the job
+            does not finish in time.
+        Parameters:
+            method (string): The name of the Sudoku method to run.
+            args (tuple): The arguments to pass to the method.
+            timeout (float): The most seconds to wait. Defaults to the executor's timeout.
+            withStats (boolean): Flag that determines if the Sudoku's stats are returned along with the result.
+            size (int): The size of the grid to generate.
+        Returns:
+            The result of the method, or a tuple of the result and the Sudoku's stats if withStats is set.
+        """
+        return self.runInWorker(runJob, (method, args, withStats, size), timeout)
+
+    def runInWorker(self, job, args, timeout=None):
+        """
+        Description:
+            Runs a module level job in a worker process. Raises a concurrent.futures TimeoutError if the job does not
+            finish in time.
+        Parameters:
+            job (function): The job to run.
+            args (tuple): The arguments to pass to the job.
+            timeout (float): The most seconds to wait. Defaults to the executor's timeout.
+        Returns:
+            The result of the job.
+        """
+        if (self.workers <= 0):
+            return job(*args)
+
+        future = self.submitJob(job, args)
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def generatePuzzle(self, clues, timeBudget, timeout=None, withStats=False):
+        """
+        Description:
+            Generates a puzzle with a unique solution in a worker process.
+        Parameters:
+            clues (int): The number of given values to aim for.
+            timeBudget (float): The most seconds to spend removing values.
+            timeout (float): The most seconds to wait. Defaults to the time budget plus the executor's timeout.
+            withStats (boolean): Flag that determines if the Sudoku's stats are returned along with the result.
+        Returns:
+            A tuple of the puzzle and its solution, or a tuple of that and the Sudoku's stats if withStats is set.
+        """
+        timeout = timeBudget + self.timeout if timeout is None else timeout
+        return self.runInWorker(puzzleJob, (clues, timeBudget, withStats), timeout)
+
+    def generate(self, seed=None, timeout=None, size=9):
+        """
+        Description:
+            Generates a sudoku grid in a worker process.
+        Parameters:
+            seed (int): Seed for the random number generator.
+            timeout (float): The most seconds to wait.
+            size (int): The size of the grid to generate.
+        Returns:
+            Returns a int array representing a sudoku grid.
+        """
+        return self.run("generate", (seed,), timeout, size=size)
+
+    def generateFixed(self, position, value, seed=None, timeout=None, size=9):
+        """
+        Description:
+            Generates a sudoku grid with a fixed value at a position in a worker process.
+        Parameters:
+            position (int): The position of the fixed value.
+            value (int): The value that is fixed.
+            seed (int): Seed for the random number generator.
+            timeout (float): The most seconds to wait.
+            size (int): The size of the grid to generate.
+        Returns:
+            Returns a int array representing a sudoku grid.
+        """
+        return self.run("generateFixed", (position, value, seed), timeout, size=size)
+# End of GenerationExecutor
@@ -0,0 +1,21 @@
+import os
+
+# Pre-fork server configuration used by the Docker image: "gunicorn -c gunicorn.conf.py app:app".
+# Every server process handles requests on a pool of threads and sends generation to its own pool of worker
+# processes. The app creates its board pool and generation executor on first use, i.e. after the fork.
+
+bind = "0.0.0.0:5000"
+workers = int(os.environ.get("SUDOKU_SERVER_PROCESSES", "2"))
+worker_class = "gthread"
+threads = int(os.environ.get("SUDOKU_SERVER_THREADS", "8"))
+
+# Split the cores between the server processes' generation executors.
+os.environ.setdefault("SUDOKU_EXECUTOR_WORKERS", str(max(1, (os.cpu_count() or 1) // workers)))
+
+def worker_exit(server, worker):
+    """
+    Description:
+        Stops a server process's board pool and generation executor when the process exits.
+    """
+    import app
+    app.shutdown()
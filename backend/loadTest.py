@@ -0,0 +1,370 @@
+import argparse
+import base64
+import json
+import platform
+import socket
+import sys
+import threading
+import time
+from random import Random
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+from http.client import HTTPException
+from benchmark import compareResults, percentile, printComparison
+from sudoku import Sudoku
+
+# Request mixes, as weights of each kind of request. "client" matches the frontend: mostly refreshes, some with a
+# clicked value, and a few keeping several clicked values.
+MIXES = {
+    "board": {"board": 1},
+    "fixed": {"fixedBoard": 1},
+    "client": {"board": 5, "fixedBoard": 4, "complete": 1},
+    "batch": {"boards": 1},
+    "all": {"board": 4, "fixedBoard": 4, "complete": 1, "boards": 1},
+}
+
+# The frontend's request timeout. Slower responses are shown to the user as an empty grid, so they count as errors.
+CLIENT_TIMEOUT = 3.0
+
+def parseMix(text):
+    """
+    Description:
+        Reads a request mix, either the name of one of MIXES or weights written as "kind=weight,kind=weight".
+    Parameters:
+        text (string): The mix.
+    Returns:
+        A dictionary from kinds of request to weights. Raises a ValueError if the mix is malformed.
+    """
+    if (text in MIXES):
+        return dict(MIXES[text])
+    mix = {}
+    for part in text.split(","):
+        kind, separator, weight = part.partition("=")
+        if (kind not in REQUESTS or not separator):
+            raise ValueError("Unknown request mix {}".format(text))
+        mix[kind] = float(weight)
+    if (not mix or sum(mix.values()) <= 0):
+        raise ValueError("Request mix {} has no weight".format(text))
+    return mix
+
+class FixedSpread:
+    """
+    Description:
+        Chooses the position and value of fixed board requests. Most choices are spread evenly over every position
+        and value, the way clicks on the grid are, while a fraction repeat a few hot pairs, the way a shared link or a
+        retried click would.
+    Variables:
+        random (Random): The random number generator.
+        hotFraction (float): The fraction of choices taken from the hot pairs.
+        hotPairs ((int, int)[]): The hot (position, value) pairs.
+    Methods:
+        choose()
+    """
+
+    def __init__(self, random, hotFraction=0.2, hotPairs=()):
+        """
+        Description:
+            Constructor for the FixedSpread class.
+        Parameters:
+            random (Random): The random number generator.
+            hotFraction (float): The fraction of choices taken from the hot pairs.
+            hotPairs ((int, int)[]): The hot (position, value) pairs.
+        """
+        self.random = random
+        self.hotFraction = hotFraction
+        self.hotPairs = list(hotPairs)
+
+    def choose(self):
+        """
+        Description:
+            Chooses a position and value.
+        Returns:
+            A tuple of the position and value.
+        """
+        if (self.hotPairs and self.random.random() < self.hotFraction):
+            return self.random.choice(self.hotPairs)
+        return self.random.randrange(0, 81), self.random.randint(1, 9)
+# End of FixedSpread
+
+def boardRequest(url, spread, options):
+    """
+    Description:
+        Builds a request for a board in the base64 format the frontend asks for.
+    Parameters:
+        url (string): The base URL of the server.
+        spread (FixedSpread): Chooses the position and value of fixed requests, and holds the random number generator.
+        options (dict): Settings of the load test.
+    Returns:
+        A tuple of the Request and a function checking the response body.
+    """
+    return Request(url + "/sudoku/board?format=base64"), lambda body: json.loads(body.decode("utf-8"))["success"] == "true"
+
+def fixedBoardRequest(url, spread, options):
+    """
+    Description:
+        Builds a request for a board with a fixed position and value in the base64 format the frontend asks for,
+        checking that the board holds the value.
+    Parameters:
+        url (string): The base URL of the server.
+        spread (FixedSpread): Chooses the position and value.
+        options (dict): Settings of the load test.
+    Returns:
+        A tuple of the Request and a function checking the response body.
+    """
+    position, value = spread.choose()
+    def check(body):
+        packedGrid = base64.b64decode(json.loads(body.decode("utf-8"))["data"])
+        return Sudoku.decodeGrid(packedGrid)[position] == value
+    return Request("{}/sudoku/fixedBoard?position={}&value={}&format=base64".format(url, position, value)), check
+
+def boardsRequest(url, spread, options):
+    """
+    Description:
+        Builds a request for a batch of options["batch"] boards, checking that every board arrived.
+    Parameters:
+        url (string): The base URL of the server.
+        spread (FixedSpread): Chooses the position and value of fixed requests.
+        options (dict): Settings of the load test.
+    Returns:
+        A tuple of the Request and a function checking the response body.
+    """
+    count = options.get("batch", 10)
+    def check(body):
+        lines = body.decode("utf-8").splitlines()
+        return len(lines) == count and all(json.loads(line)["success"] == "true" for line in lines)
+    return Request("{}/sudoku/boards?count={}&format=base64".format(url, count)), check
+
+def completeRequest(url, spread, options):
+    """
+    Description:
+        Builds a request completing a grid with three given values, the way the frontend keeps several clicked
+        values. The values are distinct, so they never conflict and every request has a completion.
+    Parameters:
+        url (string): The base URL of the server.
+        spread (FixedSpread): Holds the random number generator.
+        options (dict): Settings of the load test.
+    Returns:
+        A tuple of the Request and a function checking the response body.
+    """
+    values = spread.random.sample(range(1, 10), 3)
+    positions = spread.random.sample(range(0, 81), 3)
+    body = json.dumps(dict(givens=[[position, value] for position, value in zip(positions, values)])).encode("utf-8")
+    return (Request(url + "/sudoku/complete", data=body, headers={"Content-Type": "application/json"}),
+            lambda body: json.loads(body.decode("utf-8"))["status"] == "solved")
+
+# Builders of each kind of request. Each returns the urllib Request and a function checking the response body.
+REQUESTS = {
+    "board": boardRequest,
+    "fixedBoard": fixedBoardRequest,
+    "boards": boardsRequest,
+    "complete": completeRequest,
+}
+
+def sendRequest(request, check, timeout):
+    """
+    Description:
+        Sends a request and checks its response.
+    Parameters:
+        request (Request): The request.
+        check (function): Function that is given the response body and returns True if it is correct.
+        timeout (float): The seconds to wait before giving up.
+    Returns:
+        A tuple of the seconds taken and the error, which is None for a correct response, the HTTP status, "invalid"
+        for a response that failed its check, "timeout", or the name of the exception raised.
+    """
+    start = time.perf_counter()
+    try:
+        with urlopen(request, timeout=timeout) as response:
+            body = response.read()
+        error = None if check(body) else "invalid"
+    except HTTPError as exception:
+        error = str(exception.code)
+    except (ValueError, KeyError, IndexError, TypeError):
+        error = "invalid"
+    except socket.timeout:
+        error = "timeout"
+    except URLError as exception:
+        error = "timeout" if isinstance(exception.reason, socket.timeout) else type(exception.reason).__name__
+    except (OSError, HTTPException) as exception:
+        error = type(exception).__name__
+    elapsed = time.perf_counter() - start
+    if (error is None and elapsed > timeout):
+        error = "timeout"
+    return elapsed, error
+
+def summarise(prefix, samples, elapsed):
+    """
+    Description:
+        Summarises the samples of a kind of request.
+    Parameters:
+        prefix (string): The prefix of the metric names.
+        samples ((float, string)[]): The seconds taken and error of each request.
+        elapsed (float): The seconds the load test ran for.
+    Returns:
+        A dictionary of the throughput, error rate, and latency percentiles in milliseconds.
+    """
+    seconds = sorted(sample[0] for sample in samples)
+    errors = sum(1 for sample in samples if sample[1] is not None)
+    return {
+        prefix + "requests": len(samples),
+        prefix + "requestsPerSecond": (len(samples) - errors) / elapsed,
+        prefix + "errorRate": errors / len(samples),
+        prefix + "P50Ms": 1000 * percentile(seconds, 0.50),
+        prefix + "P95Ms": 1000 * percentile(seconds, 0.95),
+        prefix + "P99Ms": 1000 * percentile(seconds, 0.99),
+        prefix + "MaxMs": 1000 * seconds[-1],
+    }
+
+def runLoadTest(url, mix, concurrency=8, duration=10.0, warmup=1.0, timeout=CLIENT_TIMEOUT, hotFraction=0.2,
+                batch=10, seed=None, label=None):
+    """
+    Description:
+        Sends requests to a running server from a number of threads, each sending its next request as soon as the
+        last one finished, and measures the responses.
+    Parameters:
+        url (string): The base URL of the server, e.g. http://localhost:5000.
+        mix (dict): Weights of each kind of request.
+        concurrency (int): The number of threads sending requests.
+        duration (float): The seconds to measure for.
+        warmup (float): The seconds to send requests for before measuring.
+        timeout (float): The seconds after which a request counts as failed.
+        hotFraction (float): The fraction of fixed board requests repeating a few hot positions and values.
+        batch (int): The number of boards in each batch request.
+        seed (int): Seed of the random choices, for repeatable runs.
+        label (string): Name of the server mode being measured.
+    Returns:
+        A dictionary holding the settings, information about the machine, every metric, and the count of each error.
+    """
+    url = url.rstrip("/")
+    kinds = sorted(mix)
+    weights = [mix[kind] for kind in kinds]
+    options = dict(batch=batch)
+    samples = {kind: [] for kind in kinds}
+    errorCounts = {}
+    lock = threading.Lock()
+    seeder = Random(seed)
+    seeds = [seeder.random() for i in range(0, concurrency)]
+    hotPairs = [(seeder.randrange(0, 81), seeder.randint(1, 9)) for i in range(0, 9)]
+    measureFrom = time.perf_counter() + warmup
+    stopAt = measureFrom + duration
+
+    def worker(threadSeed):
+        random = Random(threadSeed)
+        spread = FixedSpread(random, hotFraction, hotPairs)
+        while True:
+            now = time.perf_counter()
+            if (now >= stopAt):
+                return
+            total = sum(weights) * random.random()
+            for kind, weight in zip(kinds, weights):
+                total -= weight
+                if (total < 0):
+                    break
+            request, check = REQUESTS[kind](url, spread, options)
+            elapsed, error = sendRequest(request, check, timeout)
+            if (now >= measureFrom):
+                with lock:
+                    samples[kind].append((elapsed, error))
+                    if (error is not None):
+                        errorCounts[error] = errorCounts.get(error, 0) + 1
+
+    threads = [threading.Thread(target=worker, args=(threadSeed,)) for threadSeed in seeds]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    metrics = {}
+    allSamples = []
+    for kind in kinds:
+        if (samples[kind]):
+            metrics.update(summarise(kind + ".", samples[kind], duration))
+            allSamples.extend(samples[kind])
+    if (allSamples):
+        metrics.update(summarise("all.", allSamples, duration))
+    return dict(label=label, url=url, mix=mix, concurrency=concurrency, duration=duration, timeout=timeout,
+                hotFraction=hotFraction, batch=batch, time=time.strftime("%Y-%m-%dT%H:%M:%S"),
+                machine=dict(python=platform.python_version(), platform=platform.platform()),
+                metrics=metrics, errors=errorCounts)
+
+def printResults(results):
+    """
+    Description:
+        Prints the metrics of a load test.
+    Parameters:
+        results (dict): The results of a load test.
+    """
+    for metric in sorted(results["metrics"]):
+        print("{:35} {:14.3f}".format(metric, results["metrics"][metric]))
+    for error in sorted(results["errors"]):
+        print("  {} errors: {}".format(error, results["errors"][error]))
+
+def printSideBySide(runs, names):
+    """
+    Description:
+        Prints the metrics of several load tests next to each other, e.g. one for each server mode.
+    Parameters:
+        runs (dict[]): The results of each load test.
+        names (string[]): The name of each load test.
+    """
+    metrics = sorted(set(metric for results in runs for metric in results["metrics"]))
+    print("{:35}".format("") + "".join(" {:>14}".format(name[0:14]) for name in names))
+    for metric in metrics:
+        print("{:35}".format(metric) + "".join(
+            " {:14.3f}".format(results["metrics"][metric]) if metric in results["metrics"] else " {:>14}".format("-")
+            for results in runs))
+
+if (__name__ == '__main__'):
+    parser = argparse.ArgumentParser(description="Load tests a running sudoku server.")
+    parser.add_argument("--url", default="http://localhost:5000", help="base URL of the server")
+    parser.add_argument("--mix", default="client",
+                        help="request mix: one of {} or weights like board=3,fixedBoard=1".format(", ".join(sorted(MIXES))))
+    parser.add_argument("--concurrency", type=int, default=8, help="number of threads sending requests")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to measure for")
+    parser.add_argument("--warmup", type=float, default=1.0, help="seconds to send requests for before measuring")
+    parser.add_argument("--timeout", type=float, default=CLIENT_TIMEOUT,
+                        help="seconds after which a request counts as failed (default: the frontend's 3s)")
+    parser.add_argument("--hot", type=float, default=0.2, help="fraction of fixed board requests on a few hot pairs")
+    parser.add_argument("--batch", type=int, default=10, help="boards in each batch request")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the random choices")
+    parser.add_argument("--label", help="name of the server mode being measured, stored in the results")
+    parser.add_argument("--output", help="file to write the results to as JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed relative regression (default 0.1)")
+    parser.add_argument("--tolerance", type=float, default=0.001,
+                        help="allowed increase of a lower is better metric with a baseline of 0, such as the error "
+                             "rate (default 0.001)")
+    parser.add_argument("--show", nargs="+", metavar="RESULTS",
+                        help="print saved results side by side instead of running a load test")
+    arguments = parser.parse_args()
+
+    if (arguments.show):
+        runs = []
+        for path in arguments.show:
+            with open(path) as resultsFile:
+                runs.append(json.load(resultsFile))
+        printSideBySide(runs, [results.get("label") or path for results, path in zip(runs, arguments.show)])
+        sys.exit(0)
+
+    try:
+        mix = parseMix(arguments.mix)
+    except ValueError as exception:
+        parser.error(str(exception))
+    if (arguments.concurrency <= 0 or arguments.duration <= 0):
+        parser.error("--concurrency and --duration must be positive")
+
+    results = runLoadTest(arguments.url, mix, arguments.concurrency, arguments.duration, arguments.warmup,
+                          arguments.timeout, arguments.hot, arguments.batch, arguments.seed, arguments.label)
+    printResults(results)
+    if (arguments.output):
+        with open(arguments.output, "w") as resultsFile:
+            json.dump(results, resultsFile, indent=2)
+
+    if (arguments.compare):
+        with open(arguments.compare) as baselineFile:
+            baseline = json.load(baselineFile)
+        comparison = compareResults(baseline, results, arguments.threshold, arguments.tolerance)
+        print("\nCompared with {}:".format(arguments.compare))
+        printComparison(comparison)
+        if (any(regressed for metric, before, after, change, regressed in comparison)):
+            sys.exit(1)
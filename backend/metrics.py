@@ -0,0 +1,227 @@
+import cProfile
+import os
+import threading
+import time
+
+# Upper bounds of the latency histogram buckets, in seconds.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+def formatLabels(labels):
+    """
+    Description:
+        Formats labels in the Prometheus text format.
+    Parameters:
+        labels (tuple): (name, value) pairs.
+    Returns:
+        The labels between braces, or an empty string if there are no labels.
+    """
+    if (not labels):
+        return ""
+    return "{" + ",".join('{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+                          for name, value in labels) + "}"
+
+class Metrics:
+    """
+    Description:
+        Thread safe counters and histograms that are rendered in the Prometheus text format. While disabled nothing
+        is recorded, so callers only pay for checking the enabled flag.
+    Variables:
+        enabled (boolean): Flag that determines if metrics are recorded.
+        buckets (float[]): The upper bounds of the histogram buckets.
+        counters (dict): Maps a metric name to a dictionary from labels to the counter's value.
+        histograms (dict): Maps a metric name to a dictionary from labels to the bucket counts, sum, and count.
+        descriptions (dict): Maps a metric name to its help text.
+    Methods:
+        describe(string, string)
+        increment(string, (tuple), (float))
+        observe(string, float, (tuple))
+        render()
+    """
+
+    def __init__(self, enabled=False, buckets=LATENCY_BUCKETS):
+        """
+        Description:
+            Constructor for the Metrics class.
+        Parameters:
+            enabled (boolean): Flag that determines if metrics are recorded.
+            buckets (float[]): The upper bounds of the histogram buckets.
+        """
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.counters = {}
+        self.histograms = {}
+        self.descriptions = {}
+        self.lock = threading.Lock()
+
+    def describe(self, name, description):
+        """
+        Description:
+            Sets the help text of a metric.
+        Parameters:
+            name (string): The name of the metric.
+            description (string): The help text.
+        """
+        self.descriptions[name] = description
+
+    def increment(self, name, labels=(), amount=1):
+        """
+        Description:
+            Adds to a counter.
+        Parameters:
+            name (string): The name of the counter.
+            labels (tuple): (name, value) pairs identifying the series.
+            amount (float): The amount to add.
+        """
+        if (not self.enabled):
+            return
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0) + amount
+
+    def observe(self, name, value, labels=()):
+        """
+        Description:
+            Records a value in a histogram.
+        Parameters:
+            name (string): The name of the histogram.
+            value (float): The value to record.
+            labels (tuple): (name, value) pairs identifying the series.
+        """
+        if (not self.enabled):
+            return
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(labels)
+            if (histogram is None):
+                histogram = series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if (value <= bound):
+                    histogram[0][i] += 1
+                    break
+            histogram[1] += value
+            histogram[2] += 1
+
+    def render(self):
+        """
+        Description:
+            Renders every metric in the Prometheus text format.
+        Returns:
+            The metrics as a string.
+        """
+        lines = []
+        with self.lock:
+            for name in sorted(self.counters):
+                if (name in self.descriptions):
+                    lines.append("# HELP {} {}".format(name, self.descriptions[name]))
+                lines.append("# TYPE {} counter".format(name))
+                for labels, value in sorted(self.counters[name].items()):
+                    lines.append("{}{} {}".format(name, formatLabels(labels), value))
+
+            for name in sorted(self.histograms):
+                if (name in self.descriptions):
+                    lines.append("# HELP {} {}".format(name, self.descriptions[name]))
+                lines.append("# TYPE {} histogram".format(name))
+                for labels, (counts, total, count) in sorted(self.histograms[name].items()):
+                    # Prometheus buckets are cumulative.
+                    cumulative = 0
+                    for bound, bucketCount in zip(self.buckets, counts):
+                        cumulative += bucketCount
+                        lines.append("{}_bucket{} {}".format(name, formatLabels(labels + (("le", repr(bound)),)), cumulative))
+                    lines.append("{}_bucket{} {}".format(name, formatLabels(labels + (("le", "+Inf"),)), count))
+                    lines.append("{}_sum{} {!r}".format(name, formatLabels(labels), total))
+                    lines.append("{}_count{} {}".format(name, formatLabels(labels), count))
+        return "\n".join(lines) + "\n"
+# End of Metrics
+
+class RequestProfiler:
+    """
+    Description:
+        Samples requests with cProfile. One in every N requests is profiled, and its stats are written to a file that
+        can be read with the pstats module. Only the request's own thread is profiled, and a streamed response is
+        profiled while each of its chunks is produced.
+    Variables:
+        every (int): Profile one in this many requests. 0 never profiles.
+        directory (string): The directory the stats files are written to.
+        requests (int): The number of requests seen.
+    Methods:
+        start()
+        stream(Profile, string, iterable)
+        finish(Profile, string)
+    """
+
+    def __init__(self, every=0, directory="."):
+        """
+        Description:
+            Constructor for the RequestProfiler class.
+        Parameters:
+            every (int): Profile one in this many requests. 0 never profiles.
+            directory (string): The directory the stats files are written to.
+        """
+        self.every = every
+        self.directory = directory
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def start(self):
+        """
+        Description:
+            Starts profiling if this request is sampled.
+        Returns:
+            The running cProfile.Profile, or None if the request is not sampled.
+        """
+        if (self.every <= 0):
+            return None
+        with self.lock:
+            self.requests += 1
+            sampled = self.requests % self.every == 0
+        if (not sampled):
+            return None
+
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def stream(self, profile, name, chunks):
+        """
+        Description:
+            Pauses profiling until a streamed response is read, then profiles each chunk as it is produced. The stats
+            are written once the stream is exhausted or closed.
+        Parameters:
+            profile (Profile): The profile returned by start.
+            name (string): Name of the request, used in the file name.
+            chunks (iterable): The response's chunks.
+        Returns:
+            A generator of the chunks.
+        """
+        profile.disable()
+        iterator = iter(chunks)
+        try:
+            while (True):
+                profile.enable()
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    profile.disable()
+                yield chunk
+        finally:
+            if (hasattr(chunks, "close")):
+                chunks.close()
+            self.finish(profile, name)
+
+    def finish(self, profile, name):
+        """
+        Description:
+            Stops profiling and writes the stats to the profiler's directory.
+        Parameters:
+            profile (Profile): The profile returned by start.
+            name (string): Name of the request, used in the file name.
+        Returns:
+            The path of the stats file.
+        """
+        profile.disable()
+        path = os.path.join(self.directory, "{}-{}-{}.prof".format(name, os.getpid(), int(time.time() * 1000)))
+        profile.dump_stats(path)
+        return path
+# End of RequestProfiler
@@ -0,0 +1,492 @@
+import argparse
+import json
+import sys
+import time
+from itertools import combinations
+from multiprocessing import Pool
+from sudoku import ALL_VALUES, BLOCKS, LOWEST_VALUE, PEERS, POPCOUNT, UNITS
+
+# Techniques from easiest to hardest, with the score of a puzzle whose hardest technique it is.
+TECHNIQUES = [
+    ("hiddenSingle", 1),
+    ("nakedSingle", 2),
+    ("pointing", 3),
+    ("claiming", 4),
+    ("nakedPair", 5),
+    ("hiddenPair", 6),
+    ("nakedTriple", 7),
+    ("hiddenTriple", 8),
+    ("xWing", 9),
+    ("swordfish", 10),
+]
+SCORES = dict(TECHNIQUES)
+
+# Score of puzzles that the techniques cannot finish, and of puzzles with contradicting values.
+UNSOLVED_SCORE = 11
+INVALID_SCORE = -1
+
+# Difficulty of a puzzle, by the highest score it reaches.
+DIFFICULTIES = [(0, "trivial"), (1, "easy"), (2, "medium"), (4, "hard"), (8, "expert"), (10, "fiendish"),
+                (UNSOLVED_SCORE, "unrated")]
+
+# Units as lists of positions, and the positions of each row or column that fall in each block (and the reverse).
+LINES = UNITS[0:18]
+BLOCK_UNITS = UNITS[18:27]
+INTERSECTIONS = [(line, block, [position for position in LINES[line] if BLOCKS[position] == block])
+                 for line in range(0, 18) for block in range(0, 9)
+                 if any(BLOCKS[position] == block for position in LINES[line])]
+
+def difficulty(score):
+    """
+    Description:
+        Gets the name of the difficulty of a score.
+    Parameters:
+        score (int): The score of a puzzle.
+    Returns:
+        The name of the difficulty, or "invalid" for a puzzle with contradicting values.
+    """
+    if (score < 0):
+        return "invalid"
+    name = DIFFICULTIES[0][1]
+    for lowest, label in DIFFICULTIES:
+        if (score >= lowest):
+            name = label
+    return name
+
+class TechniqueSolver:
+    """
+    Description:
+        A solver that only uses techniques a person would use, applying the easiest technique that makes progress
+        each step, so that the hardest technique it needs measures the difficulty of a puzzle. Candidates are kept
+        as 9 bit masks.
+    Variables:
+        grid (int[]): An array representing the flattened sudoku grid being solved. Empty positions hold 0.
+        candidates (int[]): Bit masks of the candidates of each empty position. Bit n - 1 is set if n is a candidate.
+        empty (int): The number of empty positions.
+        valid (boolean): False once a position or a value is left without any possibilities.
+        uses (dict): The number of times each technique made progress.
+        hardest (string): The hardest technique used, or None.
+    Methods:
+        place(int, int)
+        eliminate(int[], int)
+        hiddenSingle()
+        nakedSingle()
+        pointing()
+        claiming()
+        nakedSubset(int)
+        hiddenSubset(int)
+        fish(int)
+        contradiction()
+        solve()
+        score()
+    """
+
+    def __init__(self, puzzle):
+        """
+        Description:
+            Constructor for the TechniqueSolver class.
+        Parameters:
+            puzzle (int[]): The puzzle to be solved. Empty positions hold 0.
+        """
+        self.grid = [0] * 81
+        self.candidates = [ALL_VALUES] * 81
+        self.empty = 81
+        self.valid = True
+        self.uses = {}
+        self.hardest = None
+        self.techniques = [
+            ("hiddenSingle", self.hiddenSingle),
+            ("nakedSingle", self.nakedSingle),
+            ("pointing", self.pointing),
+            ("claiming", self.claiming),
+            ("nakedPair", lambda: self.nakedSubset(2)),
+            ("hiddenPair", lambda: self.hiddenSubset(2)),
+            ("nakedTriple", lambda: self.nakedSubset(3)),
+            ("hiddenTriple", lambda: self.hiddenSubset(3)),
+            ("xWing", lambda: self.fish(2)),
+            ("swordfish", lambda: self.fish(3)),
+        ]
+
+        for position in range(0, 81):
+            value = puzzle[position]
+            if (value != 0):
+                if (not (self.candidates[position] >> (value - 1)) & 1):
+                    self.valid = False
+                    return
+                self.place(position, value)
+
+    def place(self, position, value):
+        """
+        Description:
+            Inserts a value into the grid and removes it from the candidates of the position's peers.
+        Parameters:
+            position (int): The position where the value will be inserted.
+            value (int): The value to be inserted.
+        """
+        bit = ~(1 << (value - 1))
+        candidates = self.candidates
+        self.grid[position] = value
+        candidates[position] = 0
+        self.empty -= 1
+        for peer in PEERS[position]:
+            candidates[peer] &= bit
+
+    def eliminate(self, positions, mask):
+        """
+        Description:
+            Removes candidates from positions.
+        Parameters:
+            positions (int[]): The positions to remove the candidates from.
+            mask (int): Bit mask of the candidates to remove.
+        Returns:
+            True if any candidate was removed, otherwise false.
+        """
+        candidates = self.candidates
+        changed = False
+        for position in positions:
+            if (candidates[position] & mask):
+                candidates[position] &= ~mask
+                changed = True
+        return changed
+
+    def hiddenSingle(self):
+        """
+        Description:
+            Fills values that can only go in one position of a row, column, or block.
+        Returns:
+            True if any value was placed, otherwise false.
+        """
+        candidates = self.candidates
+        placed = False
+        for unit in UNITS:
+            once = 0
+            twice = 0
+            for position in unit:
+                mask = candidates[position]
+                twice |= once & mask
+                once |= mask
+            once &= ~twice
+            while (once):
+                value = LOWEST_VALUE[once]
+                once &= once - 1
+                for position in unit:
+                    if ((candidates[position] >> (value - 1)) & 1):
+                        self.place(position, value)
+                        placed = True
+                        break
+        return placed
+
+    def nakedSingle(self):
+        """
+        Description:
+            Fills positions that have a single candidate.
+        Returns:
+            True if any value was placed, otherwise false.
+        """
+        grid = self.grid
+        candidates = self.candidates
+        placed = False
+        for position in range(0, 81):
+            if (grid[position] == 0 and POPCOUNT[candidates[position]] == 1):
+                self.place(position, LOWEST_VALUE[candidates[position]])
+                placed = True
+        return placed
+
+    def pointing(self):
+        """
+        Description:
+            Removes a value from the rest of a row or column when, within a block, the value can only go in that row
+            or column.
+        Returns:
+            True if any candidate was removed, otherwise false.
+        """
+        candidates = self.candidates
+        for line, block, shared in INTERSECTIONS:
+            inside = 0
+            for position in shared:
+                inside |= candidates[position]
+            outside = 0
+            for position in BLOCK_UNITS[block]:
+                if (position not in shared):
+                    outside |= candidates[position]
+            mask = inside & ~outside
+            if (mask and self.eliminate([position for position in LINES[line] if BLOCKS[position] != block], mask)):
+                return True
+        return False
+
+    def claiming(self):
+        """
+        Description:
+            Removes a value from the rest of a block when, within a row or column, the value can only go in that
+            block.
+        Returns:
+            True if any candidate was removed, otherwise false.
+        """
+        candidates = self.candidates
+        for line, block, shared in INTERSECTIONS:
+            inside = 0
+            for position in shared:
+                inside |= candidates[position]
+            outside = 0
+            for position in LINES[line]:
+                if (BLOCKS[position] != block):
+                    outside |= candidates[position]
+            mask = inside & ~outside
+            if (mask and self.eliminate([position for position in BLOCK_UNITS[block] if position not in shared], mask)):
+                return True
+        return False
+
+    def nakedSubset(self, size):
+        """
+        Description:
+            Finds a number of positions in a unit whose candidates together are that many values, and removes those
+            values from the rest of the unit.
+        Parameters:
+            size (int): The number of positions, e.g. 2 for naked pairs.
+        Returns:
+            True if any candidate was removed, otherwise false.
+        """
+        candidates = self.candidates
+        for unit in UNITS:
+            positions = [position for position in unit if 1 < POPCOUNT[candidates[position]] <= size]
+            for subset in combinations(positions, size):
+                mask = 0
+                for position in subset:
+                    mask |= candidates[position]
+                if (POPCOUNT[mask] == size and
+                        self.eliminate([position for position in unit if position not in subset], mask)):
+                    return True
+        return False
+
+    def hiddenSubset(self, size):
+        """
+        Description:
+            Finds a number of values that can only go in that many positions of a unit, and removes every other
+            candidate from those positions.
+        Parameters:
+            size (int): The number of values, e.g. 2 for hidden pairs.
+        Returns:
+            True if any candidate was removed, otherwise false.
+        """
+        candidates = self.candidates
+        for unit in UNITS:
+            # The positions of the unit where each value can go, for values with 2 to size positions.
+            places = {}
+            for value in range(1, 10):
+                bit = 1 << (value - 1)
+                valuePositions = [position for position in unit if candidates[position] & bit]
+                if (1 < len(valuePositions) <= size):
+                    places[value] = valuePositions
+            for values in combinations(sorted(places), size):
+                positions = set()
+                for value in values:
+                    positions.update(places[value])
+                if (len(positions) == size):
+                    mask = 0
+                    for value in values:
+                        mask |= 1 << (value - 1)
+                    if (self.eliminate(positions, ALL_VALUES & ~mask)):
+                        return True
+        return False
+
+    def fish(self, size):
+        """
+        Description:
+            Finds a value that, in a number of rows, can only go in that many columns, and removes it from those
+            columns in every other row (and the same with rows and columns swapped). Size 2 is an X-wing and size 3 a
+            swordfish.
+        Parameters:
+            size (int): The number of rows or columns.
+        Returns:
+            True if any candidate was removed, otherwise false.
+        """
+        candidates = self.candidates
+        for value in range(1, 10):
+            bit = 1 << (value - 1)
+            for base, cover in ((0, 9), (9, 0)):
+                # Bit masks of the cross lines where the value can go, for base lines with 2 to size of them.
+                lines = {}
+                for line in range(0, 9):
+                    crossMask = 0
+                    for index, position in enumerate(UNITS[base + line]):
+                        if (candidates[position] & bit):
+                            crossMask |= 1 << index
+                    if (1 < POPCOUNT[crossMask] <= size):
+                        lines[line] = crossMask
+                for subset in combinations(sorted(lines), size):
+                    crossMask = 0
+                    for line in subset:
+                        crossMask |= lines[line]
+                    if (POPCOUNT[crossMask] == size):
+                        positions = [position for cross in range(0, 9) if (crossMask >> cross) & 1
+                                     for index, position in enumerate(UNITS[cover + cross]) if index not in subset]
+                        if (self.eliminate(positions, bit)):
+                            return True
+        return False
+
+    def contradiction(self):
+        """
+        Description:
+            Determines if a position or a value is left without any possibilities.
+        Returns:
+            True if the puzzle can no longer be solved, otherwise false.
+        """
+        grid = self.grid
+        candidates = self.candidates
+        for position in range(0, 81):
+            if (grid[position] == 0 and candidates[position] == 0):
+                return True
+        for unit in UNITS:
+            seen = 0
+            for position in unit:
+                seen |= candidates[position] | ((1 << (grid[position] - 1)) if grid[position] else 0)
+            if (seen != ALL_VALUES):
+                return True
+        return False
+
+    def solve(self):
+        """
+        Description:
+            Applies the easiest technique that makes progress until the puzzle is solved or no technique helps.
+        Returns:
+            True if the puzzle was solved, otherwise false.
+        """
+        while (self.valid and self.empty > 0):
+            for name, technique in self.techniques:
+                if (technique()):
+                    self.uses[name] = self.uses.get(name, 0) + 1
+                    if (self.hardest is None or SCORES[name] > SCORES[self.hardest]):
+                        self.hardest = name
+                    break
+            else:
+                # Techniques only make sound deductions, so a full grid is always valid. Contradictions only need
+                # checking once the techniques are stuck.
+                if (self.contradiction()):
+                    self.valid = False
+                break
+        return self.valid and self.empty == 0
+
+    def score(self):
+        """
+        Description:
+            Gets the score of the puzzle, after solve.
+        Returns:
+            The score of the hardest technique used, UNSOLVED_SCORE if the techniques could not finish the puzzle,
+            or INVALID_SCORE if its values contradict each other.
+        """
+        if (not self.valid):
+            return INVALID_SCORE
+        if (self.empty > 0):
+            return UNSOLVED_SCORE
+        return 0 if self.hardest is None else SCORES[self.hardest]
+# End of TechniqueSolver
+
+def parsePuzzle(line):
+    """
+    Description:
+        Reads a puzzle written as 81 characters, with digits for values and 0 or . for empty positions.
+    Parameters:
+        line (string): The puzzle.
+    Returns:
+        Returns a int array representing the puzzle, or None if the line is not a puzzle.
+    """
+    line = line.strip()
+    if (len(line) != 81 or any(character not in "0123456789." for character in line)):
+        return None
+    return [0 if character == "." else int(character) for character in line]
+
+def ratePuzzle(puzzle):
+    """
+    Description:
+        Rates a puzzle by the hardest technique needed to solve it.
+    Parameters:
+        puzzle (int[]): The puzzle. Empty positions hold 0.
+    Returns:
+        A dictionary with the score, difficulty, hardest technique, and number of uses of each technique.
+    """
+    solver = TechniqueSolver(puzzle)
+    solver.solve()
+    score = solver.score()
+    return dict(score=score, difficulty=difficulty(score), hardest=solver.hardest, uses=solver.uses)
+
+def rateLines(lines):
+    """
+    Description:
+        Rates a chunk of puzzles. Module level so that it can be sent to worker processes.
+    Parameters:
+        lines (string[]): Puzzles written as 81 characters.
+    Returns:
+        An array of JSON lines, one for each line that holds a puzzle.
+    """
+    ratings = []
+    for line in lines:
+        puzzle = parsePuzzle(line)
+        if (puzzle is not None):
+            rating = ratePuzzle(puzzle)
+            rating["puzzle"] = line.strip()
+            ratings.append(json.dumps(rating, sort_keys=True) + "\n")
+    return ratings
+
+def readChunks(inputFile, chunkSize):
+    """
+    Description:
+        Reads the lines of a file in chunks.
+    Parameters:
+        inputFile (file): The file to read.
+        chunkSize (int): The number of lines in each chunk.
+    Returns:
+        A generator of arrays of lines.
+    """
+    chunk = []
+    for line in inputFile:
+        chunk.append(line)
+        if (len(chunk) >= chunkSize):
+            yield chunk
+            chunk = []
+    if (chunk):
+        yield chunk
+
+def ratePuzzles(inputFile, outputFile, workers=None, chunkSize=500):
+    """
+    Description:
+        Rates every puzzle of a file across processes, writing the ratings as JSON lines in input order as each chunk
+        finishes. Lines that do not hold a puzzle are skipped.
+    Parameters:
+        inputFile (file): The file of puzzles, one per line.
+        outputFile (file): The file the ratings are written to.
+        workers (int): The number of processes rating puzzles. Defaults to the number of cores.
+        chunkSize (int): The number of lines each process rates at a time.
+    Returns:
+        The number of puzzles rated.
+    """
+    count = 0
+    with Pool(processes=workers) as pool:
+        for ratings in pool.imap(rateLines, readChunks(inputFile, chunkSize)):
+            outputFile.writelines(ratings)
+            outputFile.flush()
+            count += len(ratings)
+    return count
+
+if (__name__ == '__main__'):
+    parser = argparse.ArgumentParser(description="Rates sudoku puzzles by the hardest technique needed to solve them.")
+    parser.add_argument("input", help="file of puzzles, one per line as 81 characters with 0 or . for empty positions, or - for stdin")
+    parser.add_argument("--output", default="-", help="file to write the ratings to as JSON lines (default: stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="number of rating processes (default: cores)")
+    parser.add_argument("--chunk", type=int, default=500, help="puzzles rated per process at a time")
+    arguments = parser.parse_args()
+
+    if (arguments.chunk <= 0):
+        parser.error("--chunk must be positive")
+    inputFile = sys.stdin if arguments.input == "-" else open(arguments.input)
+    outputFile = sys.stdout if arguments.output == "-" else open(arguments.output, "w")
+    start = time.perf_counter()
+    try:
+        count = ratePuzzles(inputFile, outputFile, arguments.workers, arguments.chunk)
+    finally:
+        if (inputFile is not sys.stdin):
+            inputFile.close()
+        if (outputFile is not sys.stdout):
+            outputFile.close()
+    elapsed = time.perf_counter() - start
+    print("Rated {} puzzles in {:.2f}s ({:.0f} puzzles per second)".format(
+        count, elapsed, count / elapsed if elapsed > 0 else 0.0), file=sys.stderr)
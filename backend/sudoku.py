@@ -1,60 +1,791 @@
-from random import randint
-from math import floor
+from itertools import permutations
+from operator import itemgetter
+from random import Random
+from time import perf_counter
+
+# NumPy is only needed for validating many grids at once.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Bit mask with one bit set for each of the values 1 to 9.
+ALL_VALUES = 0x1FF
+
+# Tables relating a position to the row, column, and block it belongs in.
+ROWS = [position // 9 for position in range(0, 81)]
+COLUMNS = [position % 9 for position in range(0, 81)]
+BLOCKS = [3 * (position // 27) + (position % 9) // 3 for position in range(0, 81)]
+
+# Positions belonging to every row, column, and block (in that order).
+UNITS = ([[row * 9 + col for col in range(0, 9)] for row in range(0, 9)] +
+         [[row * 9 + col for row in range(0, 9)] for col in range(0, 9)] +
+         [[position for position in range(0, 81) if BLOCKS[position] == block] for block in range(0, 9)])
+
+# Positions sharing a row, column, or block with each position.
+PEERS = [sorted(set(UNITS[ROWS[position]] + UNITS[9 + COLUMNS[position]] + UNITS[18 + BLOCKS[position]]) - {position})
+         for position in range(0, 81)]
+
+# Number of set bits, and the value of the lowest set bit (0 if no bits are set), for every 9 bit mask.
+POPCOUNT = [bin(mask).count("1") for mask in range(0, 512)]
+LOWEST_VALUE = [(mask & -mask).bit_length() for mask in range(0, 512)]
+
+# Every order of the 9 rows (or columns) that keeps rows within their band, i.e. a band permutation combined with a
+# permutation of the rows inside each band. There are 6 ^ 4 = 1296 of them.
+BAND_ORDERS = [tuple(3 * band + row for band, rows in zip(bands, (first, second, third)) for row in rows)
+               for bands in permutations(range(0, 3))
+               for first in permutations(range(0, 3))
+               for second in permutations(range(0, 3))
+               for third in permutations(range(0, 3))]
+
+# Getters that reorder the 9 rows of a grid, and the 81 positions of a grid by column, for every band order.
+ROW_GETTERS = [itemgetter(*order) for order in BAND_ORDERS]
+COLUMN_GETTERS = [itemgetter(*[row * 9 + col for row in range(0, 9) for col in order]) for order in BAND_ORDERS]
+
+# The values of a 9X9 grid, and byte translation tables that swap two of them, indexed by the two values.
+VALUES = bytes(range(1, 10))
+VALUE_SWAPS = [[bytes.maketrans(bytes([first, second]), bytes([second, first])) if first != second else None
+                for second in range(0, 10)] for first in range(0, 10)]
+
+# Grid sizes that can be generated, i.e. N^2 X N^2 grids for N from 2 to 5.
+SIZES = (4, 9, 16, 25)
+
+class Geometry:
+    """
+    Description:
+        Precomputed tables describing the positions of an N^2 X N^2 sudoku grid, e.g. a 16X16 grid made of 4X4 blocks.
+        Tables are built once per size and shared through forSize.
+    Variables:
+        order (int): The width and height of a block, e.g. 4 for 16X16 grids.
+        size (int): The number of values, which is also the number of rows, columns, and blocks.
+        cells (int): The number of positions in a grid.
+        allValues (int): Bit mask with one bit set for each of the values 1 to size.
+        rows (int[]): The row of each position.
+        columns (int[]): The column of each position.
+        blocks (int[]): The block of each position.
+        units (int[][]): Positions belonging to every row, column, and block (in that order).
+        unitsOf (tuple[]): The row, column, and block unit of each position, as indices into units.
+        peers (int[][]): Positions sharing a row, column, or block with each position.
+        diagonalBlocks (int[]): The blocks on the diagonal, whose values are independent of each other.
+    Methods:
+        forSize(int)
+    """
+
+    # Geometries already built, by size.
+    built = {}
+
+    def __init__(self, order):
+        """
+        Description:
+            Constructor for the Geometry class.
+        Parameters:
+            order (int): The width and height of a block.
+        """
+        size = order * order
+        self.order = order
+        self.size = size
+        self.cells = size * size
+        self.allValues = (1 << size) - 1
+        self.rows = [position // size for position in range(0, self.cells)]
+        self.columns = [position % size for position in range(0, self.cells)]
+        self.blocks = [order * (position // (size * order)) + (position % size) // order for position in range(0, self.cells)]
+        self.units = ([[row * size + col for col in range(0, size)] for row in range(0, size)] +
+                      [[row * size + col for row in range(0, size)] for col in range(0, size)] +
+                      [[position for position in range(0, self.cells) if self.blocks[position] == block]
+                       for block in range(0, size)])
+        self.unitsOf = [(self.rows[position], size + self.columns[position], 2 * size + self.blocks[position])
+                        for position in range(0, self.cells)]
+        self.peers = [sorted(set(self.units[row] + self.units[col] + self.units[block]) - {position})
+                      for position, (row, col, block) in enumerate(self.unitsOf)]
+        self.diagonalBlocks = [block * (order + 1) for block in range(0, order)]
 
-class VerifierTemplate:
     @staticmethod
-    def getTemplate():
-        return dict({1: False, 2: False, 3: False, 4: False, 5: False, 6: False, 7: False, 8: False, 9: False})
-# End of VerifierTemplate
+    def forSize(size):
+        """
+        Description:
+            Gets the geometry of a grid size, building it on first use. Raises a ValueError for unsupported sizes.
+        Parameters:
+            size (int): The number of values, e.g. 16 for 16X16 grids.
+        Returns:
+            The Geometry of the size.
+        """
+        geometry = Geometry.built.get(size)
+        if (geometry is None):
+            if (size not in SIZES):
+                raise ValueError("Unsupported grid size {}".format(size))
+            geometry = Geometry.built[size] = Geometry(int(round(size ** 0.5)))
+        return geometry
+# End of Geometry
+
+class GridSolver:
+    """
+    Description:
+        An iterative solver used to complete partially filled 9X9 sudoku grids. After every placement naked and
+        hidden singles are propagated, branching always happens on the empty position with the fewest candidates,
+        and placements are undone through a trail instead of recursion.
+    Variables:
+        grid (int[]): An array representing the flattened sudoku grid being solved. Empty positions hold 0.
+        rowMasks (int[]): Bit masks of the values still available in each row. Bit n - 1 is set if n is available.
+        colMasks (int[]): Bit masks of the values still available in each column.
+        blockMasks (int[]): Bit masks of the values still available in each block.
+        trail (int[]): The positions that have been filled, in the order they were filled.
+        consistent (boolean): False if the values given to the solver conflict with each other.
+        nextPosition (int): The empty position with the fewest candidates found by the last propagation, -1 if full.
+        nodes (int): The number of values tried while branching.
+        backtracks (int): The number of tried values that led to a contradiction.
+        stopped (boolean): True if the last search gave up because of its deadline or a call to stop.
+        cursor (int[]): Where a search that gave up can be resumed, or None.
+    Methods:
+        candidates(int)
+        place(int, int)
+        undo(int)
+        propagate()
+        stop()
+        solutions((float), (int[]))
+        solve()
+        countSolutions((int))
+    """
+
+    def __init__(self, grid):
+        """
+        Description:
+            Constructor for the GridSolver class.
+        Parameters:
+            grid (int[]): The sudoku grid to be completed. Empty positions hold 0.
+        """
+        self.grid = [0 for i in range(0, 81)]
+        self.rowMasks = [ALL_VALUES] * 9
+        self.colMasks = [ALL_VALUES] * 9
+        self.blockMasks = [ALL_VALUES] * 9
+        self.trail = []
+        self.consistent = True
+        self.nextPosition = -1
+        self.nodes = 0
+        self.backtracks = 0
+        self.stopped = False
+        self.cursor = None
+        self.stopping = False
+
+        for position in range(0, 81):
+            value = grid[position]
+            if (value != 0):
+                if (not (self.candidates(position) >> (value - 1)) & 1):
+                    self.consistent = False
+                self.place(position, value)
+
+        # The given values are never undone.
+        self.trail = []
+
+    def candidates(self, position):
+        """
+        Description:
+            Gets the values that can be inserted into a position.
+        Parameters:
+            position (int): The position to be checked.
+        Returns:
+            A bit mask of the values available in the position's row, column, and block.
+        """
+        return self.rowMasks[ROWS[position]] & self.colMasks[COLUMNS[position]] & self.blockMasks[BLOCKS[position]]
+
+    def place(self, position, value):
+        """
+        Description:
+            Inserts a value into the grid, updates the masks, and records the position on the trail.
+        Parameters:
+            position (int): The position where the value will be inserted.
+            value (int): The value to be inserted.
+        """
+        bit = ~(1 << (value - 1))
+        self.grid[position] = value
+        self.rowMasks[ROWS[position]] &= bit
+        self.colMasks[COLUMNS[position]] &= bit
+        self.blockMasks[BLOCKS[position]] &= bit
+        self.trail.append(position)
+
+    def undo(self, mark):
+        """
+        Description:
+            Removes values from the grid until the trail is back to a given length.
+        Parameters:
+            mark (int): The length of the trail to return to.
+        """
+        grid = self.grid
+        trail = self.trail
+        while (len(trail) > mark):
+            position = trail.pop()
+            bit = 1 << (grid[position] - 1)
+            grid[position] = 0
+            self.rowMasks[ROWS[position]] |= bit
+            self.colMasks[COLUMNS[position]] |= bit
+            self.blockMasks[BLOCKS[position]] |= bit
+
+    def propagate(self):
+        """
+        Description:
+            Repeatedly fills positions with only one candidate (naked singles) and values with only one possible
+            position in a row, column, or block (hidden singles). Also finds the empty position with the fewest
+            candidates to branch on next.
+        Returns:
+            False if a position or a value is left without any possibilities, otherwise True.
+        """
+        grid = self.grid
+        rowMasks = self.rowMasks
+        colMasks = self.colMasks
+        blockMasks = self.blockMasks
+        place = self.place
+
+        while True:
+            # Compute the candidates of every empty position, filling in naked singles as they are found.
+            positionCandidates = [0] * 81
+            placed = False
+            bestPosition = -1
+            bestCount = 10
+            for position in range(0, 81):
+                if (grid[position] == 0):
+                    candidates = rowMasks[ROWS[position]] & colMasks[COLUMNS[position]] & blockMasks[BLOCKS[position]]
+                    count = POPCOUNT[candidates]
+                    if (count == 1):
+                        place(position, LOWEST_VALUE[candidates])
+                        placed = True
+                    elif (count == 0):
+                        return False
+                    else:
+                        positionCandidates[position] = candidates
+                        if (count < bestCount):
+                            bestPosition = position
+                            bestCount = count
+
+            if (placed):
+                continue
+
+            # Find values that can only go in one position of a row, column, or block.
+            hidden = []
+            unitMasks = rowMasks + colMasks + blockMasks
+            for unit in range(0, 27):
+                once = 0
+                twice = 0
+                for position in UNITS[unit]:
+                    candidates = positionCandidates[position]
+                    twice |= once & candidates
+                    once |= candidates
+                if (once != unitMasks[unit]):
+                    return False
+                once &= ~twice
+                while (once):
+                    value = LOWEST_VALUE[once]
+                    once &= once - 1
+                    for position in UNITS[unit]:
+                        if ((positionCandidates[position] >> (value - 1)) & 1):
+                            hidden.append((position, value))
+                            break
+
+            if (not hidden):
+                self.nextPosition = bestPosition
+                return True
+
+            # The same placement can be found through more than one unit, so skip values that are already placed.
+            for position, value in hidden:
+                if (grid[position] != value):
+                    if (grid[position] != 0 or not (self.candidates(position) >> (value - 1)) & 1):
+                        return False
+                    place(position, value)
+
+    def stop(self):
+        """
+        Description:
+            Makes a running search stop before it tries its next value, setting the cursor to resume from. Used to end
+            a page of solutions.
+        """
+        self.stopping = True
+
+    def solutions(self, deadline=None, cursor=None):
+        """
+        Description:
+            Generator that fills every empty position of the grid, searching with an explicit stack of branches, and
+            yields each completed grid in turn. The yielded grid is the solver's own grid, so it has to be copied if
+            it is kept after the search continues. Values are always tried in ascending order, so a search that gave
+            up can be resumed from its cursor: the values tried at each branch, ending with the value it was about to
+            try. Raises a ValueError if the cursor does not belong to the grid.
+        Parameters:
+            deadline (float): The perf_counter time to give up at, or None to search until done.
+            cursor (int[]): The cursor of an earlier search of the same grid to resume from, or None to start over.
+        Returns:
+            A generator of completed grids. If the search gave up, stopped and cursor are set once the generator
+            finishes.
+        """
+        self.stopped = False
+        self.cursor = None
+        self.stopping = False
+        if (not self.consistent):
+            return
+
+        # Each branch holds the trail length before the branch, the position, the candidates left to try, and the
+        # value being tried.
+        stack = []
+        started = False
+        consistent = self.propagate()
+        resuming = bool(cursor)
+        if (resuming):
+            # Replay the branches of the cursor, leaving the last value to be tried by the search.
+            for depth, value in enumerate(cursor):
+                if (not consistent or self.nextPosition < 0):
+                    raise ValueError("Cursor does not match the grid")
+                candidates = self.candidates(self.nextPosition)
+                if (value <= 0 or value > 9 or not (candidates >> (value - 1)) & 1):
+                    raise ValueError("Cursor does not match the grid")
+                later = candidates & ~((1 << (value - 1)) - 1)
+                if (depth == len(cursor) - 1):
+                    stack.append([len(self.trail), self.nextPosition, later, 0])
+                else:
+                    stack.append([len(self.trail), self.nextPosition, later & ~(1 << (value - 1)), value])
+                    self.place(self.nextPosition, value)
+                    consistent = self.propagate()
+
+        while True:
+            if (resuming):
+                resuming = False
+            elif (consistent):
+                if (self.nextPosition < 0):
+                    yield self.grid
+                else:
+                    stack.append([len(self.trail), self.nextPosition, self.candidates(self.nextPosition), 0])
+            else:
+                self.backtracks += 1
+
+            # Try the next candidate of the latest branch, discarding branches that have no candidates left.
+            consistent = False
+            while (stack):
+                branch = stack[-1]
+                self.undo(branch[0])
+                if (branch[2]):
+                    value = LOWEST_VALUE[branch[2]]
+                    # The deadline is only checked once a value was tried, so every resumed search makes progress.
+                    if (self.stopping or (deadline is not None and started and perf_counter() > deadline)):
+                        self.stopped = True
+                        self.cursor = [tried for mark, position, candidates, tried in stack[:-1]] + [value]
+                        self.undo(0)
+                        return
+                    branch[2] &= branch[2] - 1
+                    branch[3] = value
+                    started = True
+                    self.place(branch[1], value)
+                    self.nodes += 1
+                    consistent = self.propagate()
+                    break
+                stack.pop()
+            else:
+                self.undo(0)
+                return
+
+    def solve(self):
+        """
+        Description:
+            Fills every empty position of the grid with the first solution found.
+        Returns:
+            True if the grid was completed, otherwise false. The grid is left unchanged if it cannot be completed.
+        """
+        for grid in self.solutions():
+            return True
+        return False
+
+    def countSolutions(self, cap=2):
+        """
+        Description:
+            Counts the solutions of the grid, stopping as soon as a given number of solutions is found.
+        Parameters:
+            cap (int): The number of solutions to stop counting at.
+        Returns:
+            The number of solutions found, at most cap.
+        """
+        count = 0
+        for grid in self.solutions():
+            count += 1
+            if (count >= cap):
+                break
+        return count
+# End of GridSolver
+
+class SizedGridSolver:
+    """
+    Description:
+        A solver used to complete partially filled grids of any size in SIZES. The candidates of every position, and
+        the number of positions left for every value in every unit, are kept up to date as values are placed, so
+        naked and hidden singles are found without rescanning the grid. Branching happens on the empty position with
+        the fewest candidates, trying its values in random order, and changes are undone through a trail.
+    Variables:
+        geometry (Geometry): The tables of the grid's size.
+        grid (int[]): An array representing the flattened grid being solved. Empty positions hold 0.
+        cellMasks (int[]): Bit masks of the candidates of each position. Bit n - 1 is set if n is a candidate.
+        counts (int[]): The number of candidates of each empty position, or size + 1 for filled positions.
+        unitCounts (int[]): The number of positions left for each value in each unit, at unit * size + value - 1,
+            or PLACED once the value is placed in the unit.
+        trail (tuple[]): The changes made, in the order they were made.
+        random (Random): The random number generator used to order values, or None to try values in order.
+        consistent (boolean): False if the values given to the solver conflict with each other.
+        nodes (int): The number of values tried while branching.
+        backtracks (int): The number of tried values that led to a contradiction.
+        stopped (boolean): True if the last search gave up because of its node limit, deadline, or a call to stop.
+        cursor (int[]): Where a search that gave up can be resumed, or None.
+    Methods:
+        assign(int, int)
+        undo(int)
+        stop()
+        solutions((int), (float), (int[]))
+        solve((int), (float))
+    """
+
+    # Marks a value as already placed in a unit.
+    PLACED = 1 << 20
+
+    def __init__(self, grid, geometry, random=None):
+        """
+        Description:
+            Constructor for the SizedGridSolver class.
+        Parameters:
+            grid (int[]): The grid to be completed. Empty positions hold 0.
+            geometry (Geometry): The tables of the grid's size.
+            random (Random): The random number generator used to order values, or None to try values in order.
+        """
+        self.geometry = geometry
+        self.grid = [0] * geometry.cells
+        self.cellMasks = [geometry.allValues] * geometry.cells
+        self.counts = [geometry.size] * geometry.cells
+        self.unitCounts = [geometry.size] * (3 * geometry.size * geometry.size)
+        self.trail = []
+        self.random = random
+        self.nodes = 0
+        self.backtracks = 0
+        self.stopped = False
+        self.cursor = None
+        self.stopping = False
+
+        self.consistent = True
+        for position in range(0, geometry.cells):
+            if (grid[position] != 0 and not self.assign(position, grid[position])):
+                self.consistent = False
+                break
+
+        # The given values are never undone.
+        self.trail = []
+
+    def assign(self, position, value):
+        """
+        Description:
+            Places a value, then every naked and hidden single that follows from it.
+        Parameters:
+            position (int): The position where the value will be inserted.
+            value (int): The value to be inserted.
+        Returns:
+            False if a position or a value is left without any possibilities, otherwise True.
+        """
+        size = self.geometry.size
+        units = self.geometry.units
+        unitsOf = self.geometry.unitsOf
+        peers = self.geometry.peers
+        grid = self.grid
+        cellMasks = self.cellMasks
+        counts = self.counts
+        unitCounts = self.unitCounts
+        trail = self.trail
+        placed = SizedGridSolver.PLACED
+
+        # Pending placements. A negative position -u - 1 means the value has one position left in unit u.
+        queue = [(position, value)]
+        while (queue):
+            position, value = queue.pop()
+            bit = 1 << (value - 1)
+            if (position < 0):
+                unit = -position - 1
+                if (unitCounts[unit * size + value - 1] >= placed):
+                    continue
+                for position in units[unit]:
+                    if (grid[position] == 0 and cellMasks[position] & bit):
+                        break
+                else:
+                    return False
+
+            if (grid[position] != 0):
+                if (grid[position] != value):
+                    return False
+                continue
+            if (not cellMasks[position] & bit):
+                return False
+
+            # Every change is made before reporting a contradiction, so that undo always reverts whole placements.
+            consistent = True
+            grid[position] = value
+            trail.append((position, 0, counts[position]))
+            counts[position] = size + 1
+
+            # The position's other candidates lose a possible position in each of its units.
+            others = cellMasks[position] ^ bit
+            while (others):
+                lowest = others & -others
+                others ^= lowest
+                other = lowest.bit_length()
+                for unit in unitsOf[position]:
+                    index = unit * size + other - 1
+                    count = unitCounts[index] - 1
+                    unitCounts[index] = count
+                    if (count == 0):
+                        consistent = False
+                    elif (count == 1):
+                        queue.append((-unit - 1, other))
+
+            for unit in unitsOf[position]:
+                index = unit * size + value - 1
+                trail.append((-1, index, unitCounts[index]))
+                unitCounts[index] = placed
+
+            # Remove the value from the candidates of every empty peer.
+            for peer in peers[position]:
+                mask = cellMasks[peer]
+                if (grid[peer] == 0 and mask & bit):
+                    mask ^= bit
+                    cellMasks[peer] = mask
+                    trail.append((peer, bit, 0))
+                    count = counts[peer] - 1
+                    counts[peer] = count
+                    if (count == 0):
+                        consistent = False
+                    elif (count == 1):
+                        queue.append((peer, mask.bit_length()))
+                    for unit in unitsOf[peer]:
+                        index = unit * size + value - 1
+                        count = unitCounts[index]
+                        if (count < placed):
+                            count -= 1
+                            unitCounts[index] = count
+                            if (count == 0):
+                                consistent = False
+                            elif (count == 1):
+                                queue.append((-unit - 1, value))
+
+            if (not consistent):
+                return False
+        return True
+
+    def undo(self, mark):
+        """
+        Description:
+            Reverts changes until the trail is back to a given length.
+        Parameters:
+            mark (int): The length of the trail to return to.
+        """
+        size = self.geometry.size
+        unitsOf = self.geometry.unitsOf
+        unitCounts = self.unitCounts
+        trail = self.trail
+        while (len(trail) > mark):
+            position, bit, previous = trail.pop()
+            if (position < 0):
+                # A value that was marked as placed in a unit.
+                unitCounts[bit] = previous
+            elif (bit):
+                # A candidate that was removed from a position.
+                self.cellMasks[position] |= bit
+                self.counts[position] += 1
+                value = bit.bit_length()
+                for unit in unitsOf[position]:
+                    index = unit * size + value - 1
+                    if (unitCounts[index] < SizedGridSolver.PLACED):
+                        unitCounts[index] += 1
+            else:
+                # A placement, whose other candidates get their possible positions back.
+                value = self.grid[position]
+                self.grid[position] = 0
+                self.counts[position] = previous
+                others = self.cellMasks[position] ^ (1 << (value - 1))
+                while (others):
+                    lowest = others & -others
+                    others ^= lowest
+                    for unit in unitsOf[position]:
+                        unitCounts[unit * size + lowest.bit_length() - 1] += 1
+
+    def stop(self):
+        """
+        Description:
+            Makes a running search stop before it tries its next value, setting the cursor to resume from. Used to end
+            a page of solutions.
+        """
+        self.stopping = True
+
+    def solutions(self, nodeLimit=None, deadline=None, cursor=None):
+        """
+        Description:
+            Generator that fills every empty position of the grid and yields each completed grid in turn. The
+            yielded grid is the solver's own grid, so it has to be copied if it is kept after the search continues.
+            Without a random number generator values are tried in ascending order, so a search that gave up can be
+            resumed from its cursor: the values tried at each branch, ending with the value it was about to try.
+            Raises a ValueError if the cursor does not belong to the grid.
+        Parameters:
+            nodeLimit (int): The most values to try before giving up, or None to search until done.
+            deadline (float): The perf_counter time to give up at, or None to search until done.
+            cursor (int[]): The cursor of an earlier search of the same grid to resume from, or None to start over.
+        Returns:
+            A generator of completed grids. If the search gave up, stopped and cursor are set once the generator
+            finishes.
+        """
+        self.stopped = False
+        self.cursor = None
+        self.stopping = False
+        if (not self.consistent):
+            return
+
+        size = self.geometry.size
+        counts = self.counts
+        byCount = counts.__getitem__
+        positions = range(0, self.geometry.cells)
+
+        # Each branch holds the trail length before the branch, the position, the values left to try, and the value
+        # being tried.
+        stack = []
+        started = False
+        consistent = True
+        resuming = bool(cursor)
+        if (resuming):
+            # Replay the branches of the cursor, leaving the last value to be tried by the search.
+            for depth, value in enumerate(cursor):
+                position = min(positions, key=byCount)
+                if (not consistent or counts[position] > size or value <= 0 or value > size or
+                        not (self.cellMasks[position] >> (value - 1)) & 1):
+                    raise ValueError("Cursor does not match the grid")
+                mask = self.cellMasks[position]
+                values = [later for later in range(size, value - 1, -1) if (mask >> (later - 1)) & 1]
+                if (depth == len(cursor) - 1):
+                    stack.append([len(self.trail), position, values, 0])
+                else:
+                    values.pop()
+                    stack.append([len(self.trail), position, values, value])
+                    consistent = self.assign(position, value)
+
+        while True:
+            if (resuming):
+                resuming = False
+            elif (consistent):
+                position = min(positions, key=byCount)
+                if (counts[position] > size):
+                    yield self.grid
+                else:
+                    mask = self.cellMasks[position]
+                    values = [value for value in range(size, 0, -1) if (mask >> (value - 1)) & 1]
+                    if (self.random is not None):
+                        self.random.shuffle(values)
+                    stack.append([len(self.trail), position, values, 0])
+            else:
+                self.backtracks += 1
+
+            # Try the next value of the latest branch, discarding branches that have no values left.
+            consistent = False
+            while (stack):
+                branch = stack[-1]
+                self.undo(branch[0])
+                if (branch[2]):
+                    # The deadline is only checked once a value was tried, so every resumed search makes progress.
+                    if (self.stopping or (nodeLimit is not None and self.nodes >= nodeLimit) or
+                            (deadline is not None and started and perf_counter() > deadline)):
+                        self.stopped = True
+                        self.cursor = [tried for mark, position, values, tried in stack[:-1]] + [branch[2][-1]]
+                        self.undo(0)
+                        return
+                    value = branch[2].pop()
+                    branch[3] = value
+                    started = True
+                    self.nodes += 1
+                    consistent = self.assign(branch[1], value)
+                    break
+                stack.pop()
+            else:
+                self.undo(0)
+                return
+
+    def solve(self, nodeLimit=None, deadline=None):
+        """
+        Description:
+            Fills every empty position of the grid with the first solution found.
+        Parameters:
+            nodeLimit (int): The most values to try before giving up, or None to search until done.
+            deadline (float): The perf_counter time to give up at, or None to search until done.
+        Returns:
+            True if the grid was completed, otherwise false. If the search gave up, stopped is set.
+        """
+        for grid in self.solutions(nodeLimit, deadline):
+            return True
+        return False
+# End of SizedGridSolver
 
 class Sudoku:
     """
     Description:
-        A class used to generate 9X9 sudoku grids.
+        A class used to generate sudoku grids. Grids are 9X9 unless another size from SIZES is given.
     Variables:
+        size (int): The number of values, rows, columns, and blocks of the grids generated, e.g. 16 for 16X16 grids.
+        geometry (Geometry): The tables of the grid size.
         sudokuGrid (Array): An array representing a flattened sudoku grid.
-        rowVerifiers (dict[]): An array of dictionaries used to determine which numbers are present in certain rows.
-        colVerifiers (dict[]): An array of dictionaries used to determine which numbers are present in certain columns.
-        blockVerifiers (dict[]): An array of dictionaries used to determine which numbers are present in certain block.
-        blockCoordinates (int[]): A 2d array used to determine what block a position belongs in.
+        rowMasks (int[]): Bit masks of the values still available in each row. Bit n - 1 is set if n is available.
+        colMasks (int[]): Bit masks of the values still available in each column.
+        blockMasks (int[]): Bit masks of the values still available in each block.
+        random (Random): The random number generator used for generation.
+        nodes (int): The number of values tried while branching during the last fillGrid.
+        backtracks (int): The number of tried values that led to a contradiction during the last fillGrid.
+        blockTime (float): The seconds the last generation spent placing the fixed value and filling blocks 0, 4 and 8.
+        gridTime (float): The seconds the last generation spent in fillGrid.
     Methods:
         resetVerifiers()
         validPosition(int, int, int, int)
         fillPosition(int, int, int, int, int, (boolean))
         fillBlock(int, (int))
-        fillGrid(int, (int))
-        generate()
-        generateFixed(int, int)
+        fillGrid()
+        generate((int))
+        generateFixed(int, int, (int))
+        generateSized((int), (int), (int))
+        givensGrid(dict)
+        complete(dict, (float))
+        iterSolutions(dict, (int))
+        solutionsPage(dict, (int), (int), (int[]), (float))
+        countSolutions(dict, (int))
+        generatePuzzle(int, (float))
         getGrid()
-        validate(int[])
-        printVerifierResults()
+        stats()
+        encodeGrid(int[])
+        decodeGrid(bytes)
+        relabelTable(Random)
+        fixValue(bytes, int, int)
+        relabelGrid(int[], (int), (int), (Random))
+        validate(int[], (int))
+        validateMany(ndarray, (boolean), (boolean))
+        printVerifiers()
+        maskValues(int)
         printGrid(int[])
     """
 
-    def __init__(self):
+    def __init__(self, size=9):
         """
         Description:
-            Constructor for the Sudoku class.
+            Constructor for the Sudoku class. Raises a ValueError if the size is not in SIZES.
+        Parameters:
+            size (int): The number of values, rows, columns, and blocks of the grids generated.
         """
+        self.size = size
+        self.geometry = Geometry.forSize(size)
         self.sudokuGrid = []
-        self.rowVerifiers = None
-        self.colVerifiers = None
-        self.blockVerifiers = None
-
-        # Creates an array relating a position to the block it belongs in.
-        bMap1 = [0, 0, 0, 1, 1, 1, 2, 2, 2]
-        bMap2 = [3, 3, 3, 4, 4, 4, 5, 5, 5]
-        bMap3 = [6, 6, 6, 7, 7, 7, 8, 8, 8]
-        self.blockCoordinates = bMap1 + bMap1 + bMap1 + bMap2 + bMap2 + bMap2 + bMap3 + bMap3 + bMap3
+        self.rowMasks = None
+        self.colMasks = None
+        self.blockMasks = None
+        self.random = Random()
+        self.nodes = 0
+        self.backtracks = 0
+        self.blockTime = 0.0
+        self.gridTime = 0.0
 
     def resetVerifiers(self):
         """
         Description:
-            Resets the verifiers used for sudoku grid creation
+            Resets the masks used for sudoku grid creation so that every value is available again.
         """
-        self.rowVerifiers = [VerifierTemplate.getTemplate() for i in range(0, 9)]
-        self.colVerifiers = [VerifierTemplate.getTemplate() for i in range(0, 9)]
-        self.blockVerifiers = [VerifierTemplate.getTemplate() for i in range(0, 9)]
+        self.rowMasks = [ALL_VALUES] * 9
+        self.colMasks = [ALL_VALUES] * 9
+        self.blockMasks = [ALL_VALUES] * 9
 
     def validPosition(self, row, col, block, value):
         """
@@ -68,13 +799,13 @@ class Sudoku:
         Returns:
             True if the value can be inserted in this position, otherwise returns false.
         """
-        # Checks if the value exists in the row, column and block. If it does not exist in any of them then return true
-        return not (self.rowVerifiers[row][value] or self.colVerifiers[col][value] or self.blockVerifiers[block][value])
+        # The value is valid if it is still available in the row, column and block.
+        return ((self.rowMasks[row] & self.colMasks[col] & self.blockMasks[block]) >> (value - 1)) & 1 != 0
 
     def fillPosition(self, position, row, col, block, value, fill=True):
         """
         Description:
-            Inserts a value into the sudoku grid, and updates the verifiers.
+            Inserts a value into the sudoku grid, and updates the masks.
         Parameters:
             position (int): The position where the value will be inserted.
             row (int): The row corresponding to the position.
@@ -83,13 +814,17 @@ class Sudoku:
             value (int): The value to be inserted.
             fill (int): Flag used to determine whether to insert the value or remove the value.
         """
+        bit = 1 << (value - 1)
         if (fill):
             self.sudokuGrid[position] = value
+            self.rowMasks[row] &= ~bit
+            self.colMasks[col] &= ~bit
+            self.blockMasks[block] &= ~bit
         else:
             self.sudokuGrid[position] = 0
-        self.rowVerifiers[row][value] = fill
-        self.colVerifiers[col][value] = fill
-        self.blockVerifiers[block][value] = fill
+            self.rowMasks[row] |= bit
+            self.colMasks[col] |= bit
+            self.blockMasks[block] |= bit
 
     def fillBlock(self, block, value=None):
         """
@@ -109,15 +844,15 @@ class Sudoku:
             numbers.pop(value - 1)
 
         # Get the position of the upper lef most value in the block. Also get the row and column associated to the position.
-        position = 27 * floor(block / 3) + 3 * (block % 3)
-        row = floor(position / 9)
+        position = 27 * (block // 3) + 3 * (block % 3)
+        row = position // 9
         col = position % 9
 
         # Creates block by randomly taking numbers from the array of numbers.
         while counter > 0:
             # If the position has no value randomly insert a value remaining in the array of numbers.
             if (self.sudokuGrid[position] == 0):
-                value = numbers.pop(randint(1, len(numbers)) - 1)
+                value = numbers.pop(self.random.randint(1, len(numbers)) - 1)
                 self.fillPosition(position, row, col, block, value)
             counter -= 1
 
@@ -130,81 +865,79 @@ class Sudoku:
                 position += 1
                 col += 1
 
-    def fillGrid(self, position, fixedPosition=None):
+    def fillGrid(self):
         """
         Description:
-            Recursively fills the rest of the sudoku grid.
-        Parameters:
-            position (int): The position to be assigned a value.
-            fixedPosition (int): The position that is fixed, thus needing to be skipped over.
+            Fills the rest of the sudoku grid using a GridSolver.
         Returns:
-            Returns True if this position has a valid value that can be inserted into it.
+            Returns True if every remaining position was assigned a valid value.
         """
-        # Stop recursing when all positions are filled.
-        if (position >= len(self.sudokuGrid)):
-            return True
-
-        # determine the bock, row, and column for the position.
-        block = self.blockCoordinates[position]
-        row = floor(position / 9)
-        col = position % 9
-
-        # Determine what position after this one needs to be filled.
-        nextPosition = position + 1
-        while (nextPosition < len(self.sudokuGrid) and (self.blockCoordinates[nextPosition] in [0, 4, 8] or nextPosition == fixedPosition)):
-            nextPosition += 1
-
-        number = 1
-        valid = False
-        # Loop through all possible values until a valid value is found or all values are proven to not be valid in this position
-        while (not valid and number < 10):
-            if (self.validPosition(row, col, block, number)):
-                self.fillPosition(position, row, col, block, number)
-
-                # Check if the next position has a valid value, otherwise check if the next value is valid in this position
-                # Recurse until a valid sudoku grid is created
-                if (self.fillGrid(nextPosition, fixedPosition)):
-                    valid = True
-                else:
-                    self.fillPosition(position, row, col, block, number, fill=False)
+        solver = GridSolver(self.sudokuGrid)
+        solved = solver.solve()
+        self.nodes = solver.nodes
+        self.backtracks = solver.backtracks
+        if (not solved):
+            return False
 
-            number += 1
-        return valid
+        self.sudokuGrid = solver.grid
+        self.rowMasks = solver.rowMasks
+        self.colMasks = solver.colMasks
+        self.blockMasks = solver.blockMasks
+        return True
 
-    def generate(self):
+    def generate(self, seed=None):
         """
         Description:
             Generates a sudoku grid.
+        Parameters:
+            seed (int): Seed for the random number generator. The same seed always generates the same grid.
         Returns:
             Returns a int array representing a sudoku grid.
         """
+        if (self.size != 9):
+            return self.generateSized(seed=seed)
+
+        if (seed is not None):
+            self.random.seed(seed)
+
         # Create a temporary sudoku grid filled with 0s.
         self.sudokuGrid = [0 for i in range(0, 81)]
 
-        # Resets the verifiers to be used for sudoku grid generation.
+        # Resets the masks to be used for sudoku grid generation.
         self.resetVerifiers()
 
         # Create the diagonal blocks as a block's values are independent from values in the other blocks.
+        start = perf_counter()
         self.fillBlock(0)
         self.fillBlock(4)
         self.fillBlock(8)
+        blocksDone = perf_counter()
 
-        # Recursively fill values in other positions.
-        self.fillGrid(3)
+        # Fill values in the other positions.
+        self.fillGrid()
+        self.blockTime = blocksDone - start
+        self.gridTime = perf_counter() - blocksDone
 
         # Return a copy of the sudoku grid
         return list(self.sudokuGrid)
 
-    def generateFixed(self, position, value):
+    def generateFixed(self, position, value, seed=None):
         """
         Description:
             Generates a sudoku grid with a fixed value at a position.
         Parameters:
             position (int): The position of the fixed value.
             value (int): The value that is fixed.
+            seed (int): Seed for the random number generator. The same seed always generates the same grid.
         Returns:
             Returns a int array representing a sudoku grid.
         """
+        if (self.size != 9):
+            return self.generateSized(position, value, seed)
+
+        if (seed is not None):
+            self.random.seed(seed)
+
         # Create a temporary sudoku grid filled with 0s.
         self.sudokuGrid = [0 for i in range(0, 81)]
 
@@ -212,61 +945,347 @@ class Sudoku:
         if (position < 0 or position >= 81 or value <= 0 or value > 9):
             return list(self.sudokuGrid)
 
-        # Resets the verifiers to be used for sudoku grid generation.
+        # Resets the masks to be used for sudoku grid generation.
         self.resetVerifiers()
 
         # Getting the block, row, and column for the position of the fixed value.
-        fixedBlock = self.blockCoordinates[position]
-        fixedRow = floor(position / 9)
-        fixedCol = position % 9
+        fixedBlock = BLOCKS[position]
+        fixedRow = ROWS[position]
+        fixedCol = COLUMNS[position]
 
         # Insert the fixed value.
+        start = perf_counter()
         self.fillPosition(position, fixedRow, fixedCol, fixedBlock, value)
 
         # Create the diagonal blocks
         # If the fixed value can conflict with a value in block 0, manually insert value into block 0 in a position that does not conflict
         if (fixedBlock != 0 and (fixedRow < 3 or fixedCol < 3)):
-            rowTemp = randint(0, 2)
+            rowTemp = self.random.randint(0, 2)
             while (rowTemp == fixedRow):
-                rowTemp = randint(0, 2)
-            colTemp = randint(0, 2)
+                rowTemp = self.random.randint(0, 2)
+            colTemp = self.random.randint(0, 2)
             while (colTemp == fixedCol):
-                colTemp = randint(0, 2)
-            self.fillPosition(rowTemp * 9 + colTemp, rowTemp, colTemp, self.blockCoordinates[rowTemp * 9 + colTemp], value)
+                colTemp = self.random.randint(0, 2)
+            self.fillPosition(rowTemp * 9 + colTemp, rowTemp, colTemp, BLOCKS[rowTemp * 9 + colTemp], value)
         self.fillBlock(0, value=value if fixedBlock == 0 or fixedRow < 3 or fixedCol < 3 else None)
 
         # If the fixed value can conflict with a value in block 4, manually insert value into block 4 in a position that does not conflict
         if (fixedBlock != 4 and ((fixedRow > 2 and fixedRow < 6) or (fixedCol > 2 and fixedCol < 6))):
-            rowTemp = randint(3, 5)
+            rowTemp = self.random.randint(3, 5)
             while (rowTemp == fixedRow):
-                rowTemp = randint(3, 5)
-            colTemp = randint(3, 5)
+                rowTemp = self.random.randint(3, 5)
+            colTemp = self.random.randint(3, 5)
             while (colTemp == fixedCol):
-                colTemp = randint(3, 5)
-            self.fillPosition(rowTemp * 9 + colTemp, rowTemp, colTemp, self.blockCoordinates[rowTemp * 9 + colTemp], value)
+                colTemp = self.random.randint(3, 5)
+            self.fillPosition(rowTemp * 9 + colTemp, rowTemp, colTemp, BLOCKS[rowTemp * 9 + colTemp], value)
         self.fillBlock(4, value=value if fixedBlock == 4 or (fixedRow > 2 and fixedRow < 6) or (fixedCol > 2 and fixedCol < 6) else None)
 
         # If the fixed value can conflict with a value in block 8, manually insert value into block 8 in position that does not conflict
         if (fixedBlock != 8 and (fixedRow > 5 or fixedCol > 5)):
-            rowTemp = randint(6, 8)
+            rowTemp = self.random.randint(6, 8)
             while (rowTemp == fixedRow):
-                rowTemp = randint(6, 8)
-            colTemp = randint(6, 8)
+                rowTemp = self.random.randint(6, 8)
+            colTemp = self.random.randint(6, 8)
             while (colTemp == fixedCol):
-                colTemp = randint(6, 8)
-            self.fillPosition(rowTemp * 9 + colTemp, rowTemp, colTemp, self.blockCoordinates[rowTemp * 9 + colTemp],
+                colTemp = self.random.randint(6, 8)
+            self.fillPosition(rowTemp * 9 + colTemp, rowTemp, colTemp, BLOCKS[rowTemp * 9 + colTemp],
                               value)
         self.fillBlock(8, value=value if fixedBlock == 8 or fixedRow > 5 or fixedCol > 5 else None)
+        blocksDone = perf_counter()
 
-        # Recursively fill the other positions.
-        if (position == 3):
-            self.fillGrid(4)
-        else:
-            self.fillGrid(3, position)
+        # Fill the other positions.
+        self.fillGrid()
+        self.blockTime = blocksDone - start
+        self.gridTime = perf_counter() - blocksDone
 
         # Return a copy of the sudoku grid.
         return list(self.sudokuGrid)
 
+    def generateSized(self, position=None, value=None, seed=None):
+        """
+        Description:
+            Generates a grid of this class's size, optionally with a fixed value at a position, using a
+            SizedGridSolver. The diagonal blocks that do not share a row, column, or block with the fixed value are
+            filled with shuffled values first, and the search restarts from new blocks if it tries more values than
+            there are positions.
+        Parameters:
+            position (int): The position of the fixed value, or None for a grid without a fixed value.
+            value (int): The value that is fixed.
+            seed (int): Seed for the random number generator. The same seed always generates the same grid.
+        Returns:
+            Returns a int array representing a sudoku grid.
+        """
+        if (seed is not None):
+            self.random.seed(seed)
+
+        geometry = self.geometry
+        size = geometry.size
+        order = geometry.order
+        self.sudokuGrid = [0 for i in range(0, geometry.cells)]
+        self.rowMasks = self.colMasks = self.blockMasks = None
+        self.nodes = 0
+        self.backtracks = 0
+        self.blockTime = 0.0
+        self.gridTime = 0.0
+
+        # Checks that the given position and value params are valid.
+        if (position is not None and (position < 0 or position >= geometry.cells or value <= 0 or value > size)):
+            return list(self.sudokuGrid)
+
+        # Diagonal blocks are skipped if their rows or columns include the fixed position.
+        if (position is None):
+            blocks = geometry.diagonalBlocks
+        else:
+            bands = (geometry.rows[position] // order, geometry.columns[position] // order)
+            blocks = [block for block in geometry.diagonalBlocks if block // order not in bands]
+
+        while True:
+            start = perf_counter()
+            grid = [0 for i in range(0, geometry.cells)]
+            if (position is not None):
+                grid[position] = value
+            for block in blocks:
+                values = [i for i in range(1, size + 1)]
+                self.random.shuffle(values)
+                for blockPosition, blockValue in zip(geometry.units[2 * size + block], values):
+                    grid[blockPosition] = blockValue
+            blocksDone = perf_counter()
+
+            solver = SizedGridSolver(grid, geometry, self.random)
+            solved = solver.solve(nodeLimit=geometry.cells)
+            self.nodes += solver.nodes
+            self.backtracks += solver.backtracks
+            self.blockTime += blocksDone - start
+            self.gridTime += perf_counter() - blocksDone
+            if (solved):
+                break
+
+        self.sudokuGrid = solver.grid
+        return list(self.sudokuGrid)
+
+    def givensGrid(self, givens):
+        """
+        Description:
+            Creates a grid holding given values. Raises a ValueError if a position or value is out of range.
+        Parameters:
+            givens (dict): Maps positions to their given values. A list of (position, value) pairs also works.
+        Returns:
+            Returns a int array representing a sudoku grid with 0 in every other position, or None if a position is
+            given two different values.
+        """
+        geometry = self.geometry
+        grid = [0 for i in range(0, geometry.cells)]
+        for position, value in (givens.items() if isinstance(givens, dict) else givens):
+            if (position < 0 or position >= geometry.cells or value <= 0 or value > geometry.size):
+                raise ValueError("Invalid given {} at position {}".format(value, position))
+            if (grid[position] != 0 and grid[position] != value):
+                return None
+            grid[position] = value
+        return grid
+
+    def iterSolutions(self, givens, limit=None):
+        """
+        Description:
+            Lazily enumerates the solutions of a grid holding given values, one at a time and always in the same
+            order, so that consumers can stop early or skip to a page. Only the solver's state is kept between
+            solutions, and the grid of this class is not changed. Raises a ValueError straight away if a given is out
+            of range.
+        Parameters:
+            givens (dict): Maps positions to their given values. A list of (position, value) pairs also works.
+            limit (int): The most solutions to yield, or None for every solution.
+        Returns:
+            A generator of int arrays representing sudoku grids.
+        """
+        grid = self.givensGrid(givens)
+        if (grid is None or (limit is not None and limit <= 0)):
+            return iter(())
+
+        # 9X9 grids use the faster GridSolver.
+        if (self.size == 9):
+            solutions = GridSolver(grid).solutions()
+        else:
+            solutions = SizedGridSolver(grid, self.geometry).solutions()
+
+        def copies():
+            count = 0
+            for solution in solutions:
+                yield list(solution)
+                count += 1
+                if (limit is not None and count >= limit):
+                    return
+        return copies()
+
+    def solutionsPage(self, givens, limit=100, offset=0, cursor=None, timeBudget=None):
+        """
+        Description:
+            Finds a page of the solutions of a grid holding given values, in the same order as iterSolutions. The
+            page starts where an earlier page's cursor left off, so deep pages never enumerate the solutions before
+            them again, and the time budget is checked inside the search so that it also stops while no solution is
+            being found. Raises a ValueError if a given is out of range or the cursor does not belong to the grid.
+        Parameters:
+            givens (dict): Maps positions to their given values. A list of (position, value) pairs also works.
+            limit (int): The most solutions in the page.
+            offset (int): The number of solutions to skip before the page starts.
+            cursor (int[]): The cursor returned with an earlier page, or None to start from the first solution.
+            timeBudget (float): The most seconds to spend, or None to search until the page is full.
+        Returns:
+            A dictionary with the page's "solutions", the "next" cursor to continue from (None once every solution
+            was found), the "offset" still to be skipped from that cursor, and a "status" of "complete" (no solutions
+            after this page), "more" (the page is full), or "incomplete" (the budget ran out first).
+        """
+        self.nodes = 0
+        self.backtracks = 0
+        grid = self.givensGrid(givens)
+        if (grid is None):
+            return dict(solutions=[], next=None, offset=0, status="complete")
+
+        start = perf_counter()
+        deadline = None if timeBudget is None else start + timeBudget
+        solver = GridSolver(grid) if self.size == 9 else SizedGridSolver(grid, self.geometry)
+        page = []
+        skip = offset
+        for solution in solver.solutions(deadline=deadline, cursor=cursor):
+            if (skip > 0):
+                skip -= 1
+                continue
+            page.append(list(solution))
+
+            # Stop before the next value is tried, so the cursor points just past this solution.
+            if (len(page) >= limit):
+                solver.stop()
+        self.nodes = solver.nodes
+        self.backtracks = solver.backtracks
+        self.gridTime = perf_counter() - start
+
+        if (not solver.stopped):
+            return dict(solutions=page, next=None, offset=0, status="complete")
+        return dict(solutions=page, next=solver.cursor, offset=skip,
+                    status="more" if len(page) >= limit else "incomplete")
+
+    def countSolutions(self, givens, cap=2):
+        """
+        Description:
+            Counts the solutions of a grid holding given values, stopping as soon as a given number of solutions is
+            found. Raises a ValueError if a given is out of range.
+        Parameters:
+            givens (dict): Maps positions to their given values. A list of (position, value) pairs also works.
+            cap (int): The number of solutions to stop counting at.
+        Returns:
+            The number of solutions found, at most cap.
+        """
+        grid = self.givensGrid(givens)
+        if (grid is None):
+            return 0
+        if (self.size == 9):
+            return GridSolver(grid).countSolutions(cap)
+
+        count = 0
+        for solution in SizedGridSolver(grid, self.geometry).solutions():
+            count += 1
+            if (count >= cap):
+                break
+        return count
+
+    def complete(self, givens, timeBudget=None):
+        """
+        Description:
+            Completes a grid holding any number of given values, picking a random completion if there are several.
+            Contradicting givens are usually found while the givens are placed, before any search. The search is
+            restarted with a doubled node limit whenever it runs past its limit, until the time budget is spent.
+        Parameters:
+            givens (dict): Maps positions to their given values. A list of (position, value) pairs also works.
+            timeBudget (float): The most seconds to spend, or None to search until done.
+        Returns:
+            A tuple of the status and the grid. The status is "solved" with the completed grid, or "unsatisfiable",
+            "timeout", or "invalid" (for positions or values out of range) with a grid of all 0s.
+        """
+        geometry = self.geometry
+        self.sudokuGrid = [0 for i in range(0, geometry.cells)]
+        self.rowMasks = self.colMasks = self.blockMasks = None
+        self.nodes = 0
+        self.backtracks = 0
+        self.blockTime = 0.0
+        self.gridTime = 0.0
+
+        try:
+            grid = self.givensGrid(givens)
+        except ValueError:
+            return "invalid", list(self.sudokuGrid)
+        if (grid is None):
+            return "unsatisfiable", list(self.sudokuGrid)
+
+        start = perf_counter()
+        deadline = None if timeBudget is None else start + timeBudget
+        nodeLimit = geometry.cells
+        while True:
+            solver = SizedGridSolver(grid, geometry, self.random)
+            solved = solver.solve(nodeLimit, deadline)
+            self.nodes += solver.nodes
+            self.backtracks += solver.backtracks
+            self.gridTime = perf_counter() - start
+
+            if (solved):
+                self.sudokuGrid = solver.grid
+                return "solved", list(self.sudokuGrid)
+            if (not solver.stopped):
+                return "unsatisfiable", list(self.sudokuGrid)
+            if (deadline is not None and perf_counter() > deadline):
+                return "timeout", list(self.sudokuGrid)
+            nodeLimit *= 2
+
+    def generatePuzzle(self, clues, timeBudget=None):
+        """
+        Description:
+            Generates a sudoku puzzle with a unique solution by removing values from a generated grid. Values are
+            removed in a random order as long as the puzzle keeps a single solution. If a pass ends with more clues
+            than requested, new grids are tried until the time budget runs out. After generation the grid of this
+            class holds the puzzle's solution.
+        Parameters:
+            clues (int): The number of values the puzzle should keep. Puzzles need at least 17 clues.
+            timeBudget (float): The most seconds to spend. The puzzle with the fewest clues found so far is returned
+                once the budget is spent. Without a budget a single pass is made.
+        Returns:
+            Returns a int array representing a sudoku puzzle, with 0 in every empty position.
+        """
+        # Checks that the number of clues is valid. Puzzles are only generated for 9X9 grids.
+        if (clues < 17 or clues > 81 or self.size != 9):
+            self.sudokuGrid = [0 for i in range(0, 81)]
+            return list(self.sudokuGrid)
+
+        deadline = None if timeBudget is None else perf_counter() + timeBudget
+        bestPuzzle = None
+        bestSolution = None
+        bestClues = 82
+        positions = [position for position in range(0, 81)]
+
+        while True:
+            solution = self.generate()
+            puzzle = list(solution)
+            remaining = 81
+            self.random.shuffle(positions)
+
+            # Remove values while the puzzle still has exactly one solution.
+            for position in positions:
+                if (remaining <= clues or (deadline is not None and perf_counter() > deadline)):
+                    break
+                value = puzzle[position]
+                puzzle[position] = 0
+                if (GridSolver(puzzle).countSolutions(2) == 1):
+                    remaining -= 1
+                else:
+                    puzzle[position] = value
+
+            if (remaining < bestClues):
+                bestPuzzle = puzzle
+                bestSolution = solution
+                bestClues = remaining
+
+            if (bestClues <= clues or deadline is None or perf_counter() > deadline):
+                break
+
+        self.sudokuGrid = bestSolution
+        return bestPuzzle
+
     def getGrid(self):
         """
         Description:
@@ -276,76 +1295,235 @@ class Sudoku:
         """
         return list(self.sudokuGrid)
 
+    def stats(self):
+        """
+        Description:
+            Gets the search and timing counters of the last generation.
+        Returns:
+            A dictionary with the nodes, backtracks, blockTime, and gridTime of the last generation.
+        """
+        return dict(nodes=self.nodes, backtracks=self.backtracks, blockTime=self.blockTime, gridTime=self.gridTime)
+
+
+    @staticmethod
+    def encodeGrid(sudokuGrid):
+        """
+        Description:
+            Packs a sudoku grid into 41 bytes, 4 bits per position. Each byte holds two positions with the earlier
+            position in the high 4 bits, and the low 4 bits of the last byte are 0.
+        Parameters:
+            sudokuGrid (int[]): The sudoku grid to be packed.
+        Returns:
+            A bytes object holding the packed grid.
+        """
+        return bytes([(sudokuGrid[position] << 4) | sudokuGrid[position + 1] for position in range(0, 80, 2)] +
+                     [sudokuGrid[80] << 4])
 
     @staticmethod
-    def validate(sudokuGrid):
+    def decodeGrid(packedGrid):
+        """
+        Description:
+            Unpacks a sudoku grid packed by encodeGrid.
+        Parameters:
+            packedGrid (bytes): The 41 bytes of a packed grid.
+        Returns:
+            Returns a int array representing a sudoku grid.
+        """
+        sudokuGrid = []
+        for byte in packedGrid[0:40]:
+            sudokuGrid.append(byte >> 4)
+            sudokuGrid.append(byte & 15)
+        sudokuGrid.append(packedGrid[40] >> 4)
+        return sudokuGrid
+
+    @staticmethod
+    def relabelTable(random):
+        """
+        Description:
+            Makes a byte translation table that renames the values 1 to 9 with a random permutation.
+        Parameters:
+            random (Random): The random number generator.
+        Returns:
+            Returns a bytes translation table.
+        """
+        labels = list(VALUES)
+        random.shuffle(labels)
+        return bytes.maketrans(VALUES, bytes(labels))
+
+    @staticmethod
+    def fixValue(sudokuGrid, position, value):
+        """
+        Description:
+            Swaps the value at a position with the fixed value everywhere in a grid, which gives another valid grid
+            with the fixed value at the position.
+        Parameters:
+            sudokuGrid (bytes): The sudoku grid, one byte per position.
+            position (int): The position of the fixed value.
+            value (int): The value that is fixed.
+        Returns:
+            Returns a bytes object representing the sudoku grid.
+        """
+        if (sudokuGrid[position] == value):
+            return sudokuGrid
+        return sudokuGrid.translate(VALUE_SWAPS[sudokuGrid[position]][value])
+
+    @staticmethod
+    def relabelGrid(sudokuGrid, position=None, value=None, random=None):
+        """
+        Description:
+            Renames the values of a 9X9 grid with a random permutation, which gives another valid grid. Relabelling a
+            uniformly chosen grid gives a uniformly chosen grid, so one generated grid can serve several requests.
+        Parameters:
+            sudokuGrid (int[]): The sudoku grid to be relabelled.
+            position (int): A position whose value should become the fixed value, or None.
+            value (int): The value that is fixed.
+            random (Random): The random number generator. Defaults to a new one.
+        Returns:
+            Returns a int array representing the relabelled grid.
+        """
+        grid = bytes(sudokuGrid).translate(Sudoku.relabelTable(random or Random()))
+        if (position is not None):
+            grid = Sudoku.fixValue(grid, position, value)
+        return list(grid)
+
+    @staticmethod
+    def validate(sudokuGrid, size=9):
         """
         Description:
             Determines that a given grid is a valid sudoku grid.
         Parameters:
             sudokuGrid (int[]): The sudoku grid to be tested.
+            size (int): The number of values, rows, columns, and blocks of the grid.
         Returns:
             True if the given sudoku grid is valid, otherwise false.
         """
-        if (len(sudokuGrid) != 81):
-            return False
+        if (size != 9):
+            if (size not in SIZES or len(sudokuGrid) != size * size):
+                return False
 
-        # Create verifiers for rows, columns, and blocks.
-        rowVerifiers = [VerifierTemplate.getTemplate() for i in range(0, 9)]
-        colVerifiers = [VerifierTemplate.getTemplate() for i in range(0, 9)]
-        blockVerifiers = [VerifierTemplate.getTemplate() for i in range(0, 9)]
+            # Every unit must hold each value once.
+            values = set(range(1, size + 1))
+            return all(set(sudokuGrid[position] for position in unit) == values
+                       for unit in Geometry.forSize(size).units)
 
-        valid = True
-        position = 0
+        if (len(sudokuGrid) != 81):
+            return False
 
-        # Creates an array relating a position to the block it belongs in.
-        bMap1 = [0, 0, 0, 1, 1, 1, 2, 2, 2]
-        bMap2 = [3, 3, 3, 4, 4, 4, 5, 5, 5]
-        bMap3 = [6, 6, 6, 7, 7, 7, 8, 8, 8]
-        blockCoordinates = bMap1 + bMap1 + bMap1 + bMap2 + bMap2 + bMap2 + bMap3 + bMap3 + bMap3
+        # Create masks of the values already seen in rows, columns, and blocks.
+        rowMasks = [0] * 9
+        colMasks = [0] * 9
+        blockMasks = [0] * 9
 
         # Loop though grid until a value is not valid, or the end is reached
-        while (valid and position < 81):
-            block = blockCoordinates[position]
-            row = floor(position / 9)
-            col = position % 9
+        for position in range(0, 81):
             value = sudokuGrid[position]
+            if (value <= 0 or value >= 10):
+                return False
 
-            if value > 0 and value < 10 and not (rowVerifiers[row][value] or colVerifiers[col][value] or blockVerifiers[block][value]):
-                rowVerifiers[row][value] = True
-                colVerifiers[col][value] = True
-                blockVerifiers[block][value] = True
-                position += 1
-            else:
-                valid = False
+            bit = 1 << (value - 1)
+            row = ROWS[position]
+            col = COLUMNS[position]
+            block = BLOCKS[position]
+            if ((rowMasks[row] | colMasks[col] | blockMasks[block]) & bit):
+                return False
+
+            rowMasks[row] |= bit
+            colMasks[col] |= bit
+            blockMasks[block] |= bit
+        return True
+
+    @staticmethod
+    def validateMany(sudokuGrids, returnUnits=False, encoded=False):
+        """
+        Description:
+            Determines which of many grids are valid sudoku grids, checking every row, column, and block of all of
+            the grids at once. Requires NumPy.
+        Parameters:
+            sudokuGrids (ndarray): An (N, 81) array of grids, or a buffer of grids packed as 81 bytes each.
+            returnUnits (boolean): Flag used to determine whether to also return the first invalid unit of each grid.
+            encoded (boolean): Flag that is set when the grids are 41 byte records made by encodeGrid, as in corpus
+                files and packed responses, given as an (N, 41) array or a buffer. Their values are unpacked with NumPy.
+        Returns:
+            A boolean array that is True for every valid grid. If returnUnits is set, also returns an int array holding
+            the first invalid unit of each grid (0 - 8 for rows, 9 - 17 for columns, 18 - 26 for blocks) or -1.
+        """
+        if (numpy is None):
+            raise ImportError("validateMany requires numpy")
+
+        recordSize = 41 if encoded else 81
+        if (isinstance(sudokuGrids, (bytes, bytearray, memoryview))):
+            if (len(sudokuGrids) % recordSize != 0):
+                raise ValueError("A buffer of packed grids must be a multiple of {} bytes long".format(recordSize))
+            sudokuGrids = numpy.frombuffer(sudokuGrids, dtype=numpy.uint8).reshape(-1, recordSize)
+        else:
+            sudokuGrids = numpy.asarray(sudokuGrids)
+            if (sudokuGrids.ndim != 2 or sudokuGrids.shape[1] != recordSize):
+                raise ValueError("Grids must be an (N, {}) array".format(recordSize))
+
+        units = numpy.array(UNITS)
+        valid = numpy.empty(len(sudokuGrids), dtype=bool)
+        firstUnits = numpy.empty(len(sudokuGrids), dtype=numpy.int16)
+
+        # Check the grids in chunks to bound the memory used by the (N, 27, 9) unit array.
+        for start in range(0, len(sudokuGrids), 65536):
+            chunk = sudokuGrids[start:start + 65536]
+            if (encoded):
+                # Each byte holds two positions, the earlier one in the high 4 bits.
+                records = chunk.astype(numpy.uint8)
+                chunk = numpy.empty((len(records), 82), dtype=numpy.uint8)
+                chunk[:, 0::2] = records >> 4
+                chunk[:, 1::2] = records & 15
+                chunk = chunk[:, 0:81]
+
+            # Convert each value to its bit, with values outside of 1 to 9 becoming 0.
+            inRange = (chunk >= 1) & (chunk <= 9)
+            bits = numpy.where(inRange, numpy.left_shift(1, numpy.clip(chunk, 1, 9).astype(numpy.uint16) - 1), 0)
+
+            # A unit is valid only if its 9 values have 9 different bits.
+            unitValid = numpy.bitwise_or.reduce(bits[:, units], axis=2) == ALL_VALUES
+            valid[start:start + 65536] = unitValid.all(axis=1)
+            firstUnits[start:start + 65536] = numpy.argmin(unitValid, axis=1)
+
+        if (returnUnits):
+            return valid, numpy.where(valid, -1, firstUnits)
         return valid
 
     def printVerifiers(self):
         """
         Description:
-            Prints out dictionaries telling what values are in certain rows, columns, and blocks. Used primarily for testing purposes.
+            Prints out the values that are still available in certain rows, columns, and blocks. Used primarily for testing purposes.
         """
         print("Row")
-        row = 0
-        for rowVerifier in self.rowVerifiers:
-            print("Row {}: {}".format(row, rowVerifier))
-            row += 1
+        for row in range(0, 9):
+            print("Row {}: {}".format(row, Sudoku.maskValues(self.rowMasks[row])))
         print()
 
         print("Col")
-        col = 0
-        for colVerifier in self.colVerifiers:
-            print("Column {}: {}".format(col, colVerifier))
-            col += 1
+        for col in range(0, 9):
+            print("Column {}: {}".format(col, Sudoku.maskValues(self.colMasks[col])))
         print()
 
         print("Block")
-        block = 0
-        for blockVerifier in self.blockVerifiers:
-            print("{}: {}".format(block, blockVerifier))
-            block += 1
+        for block in range(0, 9):
+            print("{}: {}".format(block, Sudoku.maskValues(self.blockMasks[block])))
         print()
 
+    @staticmethod
+    def maskValues(mask):
+        """
+        Description:
+            Converts a bit mask into the values it represents.
+        Parameters:
+            mask (int): A bit mask where bit n - 1 is set if n is present.
+        Returns:
+            An array of the values present in the mask, from lowest to highest.
+        """
+        values = []
+        while (mask):
+            values.append(LOWEST_VALUE[mask])
+            mask &= mask - 1
+        return values
+
     @staticmethod
     def PrintGrid(sudokuGrid):
         """
@@ -362,4 +1540,107 @@ class Sudoku:
                 sudokuString += "\n"
             position += 1
         print(sudokuString)
-#End of Sudoku Class#
\ No newline at end of file
+#End of Sudoku Class#
+
+class SymmetryGenerator:
+    """
+    Description:
+        A class used to generate 9X9 sudoku grids by transforming a seed grid. The seed grid is created with one
+        search, and every other grid is derived from it with random transforms that keep a grid valid: an optional
+        transposition, band and row swaps, stack and column swaps, and a relabelling of the values. Each derived
+        grid costs O(81) work.
+    Variables:
+        seedGrid (int[]): The grid that new grids are derived from.
+        reseedEvery (int): The number of grids derived before a new seed grid is searched for. 0 never reseeds.
+        derived (int): The number of grids derived from the current seed grid.
+        random (Random): The random number generator used to pick transforms.
+        seedRows (bytes[][]): The rows of the seed grid and of its transposition.
+        relabels (bytes[]): A pool of random value relabelling tables. Two are combined for every grid.
+    Methods:
+        reseed((int[]))
+        derive()
+        generate()
+        generateFixed(int, int)
+    """
+
+    # Size of the pool of relabelling tables.
+    relabelPoolSize = 1024
+
+    def __init__(self, seedGrid=None, reseedEvery=10000):
+        """
+        Description:
+            Constructor for the SymmetryGenerator class.
+        Parameters:
+            seedGrid (int[]): The grid to derive grids from. A new grid is generated if none is given.
+            reseedEvery (int): The number of grids derived before a new seed grid is searched for.
+        """
+        self.reseedEvery = reseedEvery
+        self.random = Random()
+        self.reseed(seedGrid)
+
+    def reseed(self, seedGrid=None):
+        """
+        Description:
+            Replaces the seed grid and the pool of relabelling tables.
+        Parameters:
+            seedGrid (int[]): The new seed grid. A new grid is generated if none is given.
+        """
+        if (seedGrid is None):
+            seedGrid = Sudoku().generate()
+
+        self.seedGrid = list(seedGrid)
+        self.derived = 0
+        self.seedRows = (tuple(bytes(seedGrid[row * 9:row * 9 + 9]) for row in range(0, 9)),
+                         tuple(bytes(seedGrid[col * 9 + row] for col in range(0, 9)) for row in range(0, 9)))
+
+        self.relabels = [Sudoku.relabelTable(self.random) for i in range(0, self.relabelPoolSize)]
+
+    def derive(self):
+        """
+        Description:
+            Derives a new grid from the seed grid.
+        Returns:
+            Returns a bytes object representing a sudoku grid.
+        """
+        if (self.reseedEvery and self.derived >= self.reseedEvery):
+            self.reseed()
+        self.derived += 1
+
+        # Split one random number into the transposition, row order, column order, and two relabelling tables.
+        bits = self.random.getrandbits(64)
+        bits, transpose = divmod(bits, 2)
+        bits, rowOrder = divmod(bits, 1296)
+        bits, colOrder = divmod(bits, 1296)
+        bits, firstRelabel = divmod(bits, self.relabelPoolSize)
+        secondRelabel = bits % self.relabelPoolSize
+
+        rows = ROW_GETTERS[rowOrder](self.seedRows[transpose])
+        grid = bytes(COLUMN_GETTERS[colOrder](b"".join(rows)))
+        return grid.translate(self.relabels[firstRelabel]).translate(self.relabels[secondRelabel])
+
+    def generate(self):
+        """
+        Description:
+            Generates a sudoku grid.
+        Returns:
+            Returns a int array representing a sudoku grid.
+        """
+        return list(self.derive())
+
+    def generateFixed(self, position, value):
+        """
+        Description:
+            Generates a sudoku grid with a fixed value at a position, by swapping the value at the position with the
+            fixed value everywhere in a derived grid.
+        Parameters:
+            position (int): The position of the fixed value.
+            value (int): The value that is fixed.
+        Returns:
+            Returns a int array representing a sudoku grid.
+        """
+        # Checks that the given position and value params are valid.
+        if (position < 0 or position >= 81 or value <= 0 or value > 9):
+            return [0 for i in range(0, 81)]
+
+        return list(Sudoku.fixValue(self.derive(), position, value))
+# End of SymmetryGenerator
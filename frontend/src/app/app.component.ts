@@ -1,4 +1,5 @@
 import { Component } from '@angular/core';
+import { Observable } from 'rxjs';
 
 import { BackendApiService } from './backend-api.service';
 import { BackendResponse } from './backend-response'
@@ -9,7 +10,7 @@ import { BackendResponse } from './backend-response'
   Variables:
     colors (number): The number of colors options available. Note: New color css classes need to be added to work with higher values.
     colorId (number): The current color-choice-n class being used.
-    focus (number): The current value being frozen/fixed. -1 indicates no values being fixed;
+    focus (number[]): The positions of the values being frozen/fixed. Empty when no values are being fixed.
     loading (boolean): Flag that determines if the app is loading a new grid.
     sudokuGrid (number[]): Values for the sudoku grid.
     success (boolean): Flag that indicates whether getting a sudoku grid was successful or not.
@@ -26,7 +27,7 @@ import { BackendResponse } from './backend-response'
 export class AppComponent {
   colors: number = 5;
   colorId: number;
-  focus: number = -1;
+  focus: number[] = [];
   loading: boolean = true;
   sudokuGrid: number[];
   success: boolean = true;
@@ -71,10 +72,14 @@ export class AppComponent {
 
   /*
     Description:
-      Fixes the position of the clicked value in the grid.
+      Fixes the position of the clicked value in the grid, or unfixes it if it is already fixed.
   */
   gridClick(position: number): void {
-    this.focus = position;
+    if (this.focus.indexOf(position) == -1) {
+      this.focus = this.focus.concat([position]);
+    } else {
+      this.focus = this.focus.filter(fixed => fixed != position);
+    }
   }
 
   /*
@@ -84,20 +89,23 @@ export class AppComponent {
   refresh(): void {
     this.loading = true;
 
-    // Makes a call to the backend for a sudoku grid.
-    // If no position is fixed, or if the grid is from an error get a regular grid. Otherwise get a grid with the fixed position value.
-    if (this.focus == -1 || this.sudokuGrid[0] == 0) {
-      this.backendApiService.getGrid().subscribe(res => {
-        this.sudokuGrid = res.data;
-        this.success = (res.success == 'true');
-        this.loading = false;
-      });
+    // Gets a sudoku grid. If no position is fixed, or if the grid is from an error get a regular grid. If one position
+    // is fixed get a grid with the fixed position value, and if several are fixed get a completion of the fixed values
+    // from the backend. Regular and fixed grids usually come from the service's prefetched boards, in which case the
+    // response arrives straight away and the loading spinner is never shown.
+    let request: Observable<BackendResponse>;
+    if (this.focus.length == 0 || this.sudokuGrid[0] == 0) {
+      request = this.backendApiService.getGrid();
+    } else if (this.focus.length == 1) {
+      request = this.backendApiService.getGridFixed(this.focus[0], this.sudokuGrid[this.focus[0]]);
     } else {
-      this.backendApiService.getGridFixed(this.focus, this.sudokuGrid[this.focus]).subscribe(res => {
-        this.sudokuGrid = res.data;
-        this.success = (res.success == 'true');
-        this.loading = false;
-      });
+      request = this.backendApiService.getGridCompleted(this.focus, this.focus.map(position => this.sudokuGrid[position]));
     }
+
+    request.subscribe(res => {
+      this.sudokuGrid = res.data;
+      this.success = (res.success == 'true');
+      this.loading = false;
+    });
   }
 }
@@ -1,12 +1,72 @@
 import { TestBed } from '@angular/core/testing';
+import { HttpClientTestingModule, HttpTestingController } from '@angular/common/http/testing';
 
 import { BackendApiService } from './backend-api.service';
 
 describe('BackendApiService', () => {
-  beforeEach(() => TestBed.configureTestingModule({}));
+  beforeEach(() => TestBed.configureTestingModule({
+    imports: [HttpClientTestingModule]
+  }));
 
   it('should be created', () => {
     const service: BackendApiService = TestBed.get(BackendApiService);
     expect(service).toBeTruthy();
   });
+
+  it('should decode packed grids', () => {
+    const service: BackendApiService = TestBed.get(BackendApiService);
+    const grid: number[] = service.decodeGrid(btoa(String.fromCharCode(0x79, 0x62) + "\0".repeat(38) + String.fromCharCode(0x30)));
+    expect(grid.length).toEqual(81);
+    expect(grid.slice(0, 4)).toEqual([7, 9, 6, 2]);
+    expect(grid[80]).toEqual(3);
+  });
+
+  it('should serve fixed grids from prefetched boards', () => {
+    const service: BackendApiService = TestBed.get(BackendApiService);
+    const httpMock: HttpTestingController = TestBed.get(HttpTestingController);
+    const board: number[] = [
+      7, 9, 6, 2, 1, 3, 5, 8, 4, 3, 1, 2, 4, 5, 8, 6, 9, 7, 4, 8, 5, 7, 6, 9, 2, 3, 1, 2, 3, 9, 1, 7, 6, 8, 4, 5,
+      8, 5, 1, 3, 2, 4, 7, 6, 9, 6, 7, 4, 8, 9, 5, 3, 1, 2, 5, 4, 8, 9, 3, 2, 1, 7, 6, 1, 2, 3, 6, 4, 7, 9, 5, 8,
+      9, 6, 7, 5, 8, 1, 4, 2, 3];
+    service.boardQueue = [board];
+
+    let grid: number[];
+    service.getGridFixed(10, 7).subscribe(res => grid = res.data);
+    expect(grid[10]).toEqual(7);
+    for (let row = 0; row < 9; row++) {
+      expect(new Set(grid.slice(row * 9, row * 9 + 9)).size).toEqual(9);
+    }
+
+    // Taking the board starts a refill from the batch endpoint.
+    const packed: string = btoa(String.fromCharCode(0x79, 0x62) + "\0".repeat(38) + String.fromCharCode(0x30));
+    const refill = httpMock.expectOne(req => req.url.endsWith("/sudoku/boards"));
+    expect(refill.request.params.get("count")).toEqual(String(service.prefetchSize));
+    refill.flush(JSON.stringify({ data: packed, format: "base64", success: "true" }) + "\n");
+    expect(service.boardQueue.length).toEqual(1);
+    expect(service.refilling).toBe(false);
+
+    service.getGrid().subscribe(res => grid = res.data);
+    expect(grid.slice(0, 4)).toEqual([7, 9, 6, 2]);
+    httpMock.expectOne(req => req.url.endsWith("/sudoku/boards"));
+  });
+
+  it('should skip malformed prefetched boards and keep refilling', () => {
+    const service: BackendApiService = TestBed.get(BackendApiService);
+    const httpMock: HttpTestingController = TestBed.get(HttpTestingController);
+    const packed: string = btoa(String.fromCharCode(0x79, 0x62) + "\0".repeat(38) + String.fromCharCode(0x30));
+
+    service.refillQueue();
+    const lines: string[] = [
+      JSON.stringify({ data: new Array<number>(81).fill(0), success: "false" }),
+      JSON.stringify({ data: "not base64!", format: "base64", success: "true" }),
+      JSON.stringify({ data: packed, format: "base64", success: "true" }),
+      '{"data": "eWI'];
+    httpMock.expectOne(req => req.url.endsWith("/sudoku/boards")).flush(lines.join("\n"));
+    expect(service.boardQueue.length).toEqual(1);
+    expect(service.refilling).toBe(false);
+
+    // A later refill still goes to the backend.
+    service.refillQueue();
+    httpMock.expectOne(req => req.url.endsWith("/sudoku/boards"));
+  });
 });
@@ -1,18 +1,26 @@
 import { Injectable } from '@angular/core';
 import { HttpClient, HttpParams } from '@angular/common/http';
 import { Observable, of } from 'rxjs';
-import { catchError, timeout } from 'rxjs/operators';
+import { catchError, finalize, map, timeout } from 'rxjs/operators';
 
-import { BackendResponse } from './backend-response'
+import { BackendResponse, CompleteBackendResponse, PackedBackendResponse } from './backend-response'
 
 /*
   Desription:
-    A service used to make API calls to the backend.
+    A service used to make API calls to the backend. A small queue of boards is prefetched from the backend's batch
+    endpoint and refilled in the background, so most refreshes are served without waiting for the backend.
   Variables:
     backendURL (string): Endpoint for the backend.
+    prefetchSize (number): The most boards kept in the queue.
+    boardQueue (number[][]): The prefetched boards, in the order they arrived.
+    refilling (boolean): Flag that determines if a refill of the queue is in progress.
   Method:
     getGrid()
     getGridFixed(number, number)
+    getGridCompleted(number[], number[])
+    refillQueue()
+    fixValue(number[], number, number)
+    decodeGrid(string)
     errorHandler()
 */
 @Injectable({
@@ -20,21 +28,35 @@ import { BackendResponse } from './backend-response'
 })
 export class BackendApiService {
   backendURL: string = "http://" + window.location.hostname + ":5000";
+  prefetchSize: number = 8;
+  boardQueue: number[][] = [];
+  refilling: boolean = false;
 
   constructor(private http: HttpClient) { }
 
   /*
     Description:
-      Makes a call to backend and gets a sudoku grid.
+      Gets a sudoku grid, from the prefetched boards if there are any, otherwise from the backend.
     Returns:
       An array containing values for a sudoku grid.
   */
   getGrid(): Observable<BackendResponse> {
-    return this.http.get<BackendResponse>(this.backendURL + "/sudoku/board")
+    const board: number[] = this.boardQueue.shift();
+    this.refillQueue();
+    if (board) {
+      return of({ data: board, success: 'true' });
+    }
+
+    const params: HttpParams = new HttpParams()
+      .set("format", "base64");
+    return this.http.get<PackedBackendResponse>(this.backendURL + "/sudoku/board", { params })
       .pipe(
         // Stoping attempting to get response after 3 seconds.
         timeout(3000),
 
+        // Unpack the grid.
+        map(res => ({ data: this.decodeGrid(res.data), success: res.success })),
+
         // Handle error, and resume
         catchError(this.errorHandler())
       );
@@ -42,7 +64,8 @@ export class BackendApiService {
 
   /*
     Description:
-      Makes a call to backend and gets a sudoku grid with a fixed value at a position.
+      Gets a sudoku grid with a fixed value at a position. A prefetched board has two values swapped so the position
+      holds the value, and the backend is only called when there are no prefetched boards.
     Parameters:
       position (number): The position in the grid that is fixed.
       value (number): The value the fixed position should have.
@@ -50,16 +73,120 @@ export class BackendApiService {
       An array containing values for a sudoku grid with a fixed value in a certain position.
   */
   getGridFixed(position:number, value: number): Observable<BackendResponse> {
+    const board: number[] = this.boardQueue.shift();
+    this.refillQueue();
+    if (board) {
+      return of({ data: this.fixValue(board, position, value), success: 'true' });
+    }
+
     const params: HttpParams = new HttpParams()
       .set("position", String(position))
-      .set("value", String(value));
-    return this.http.get<BackendResponse>(this.backendURL + "/sudoku/fixedBoard", { params })
+      .set("value", String(value))
+      .set("format", "base64");
+    return this.http.get<PackedBackendResponse>(this.backendURL + "/sudoku/fixedBoard", { params })
+    .pipe(
+      timeout(3000),
+      map(res => ({ data: this.decodeGrid(res.data), success: res.success })),
+      catchError(this.errorHandler())
+    );
+  }
+
+  /*
+    Description:
+      Makes a call to backend and gets a sudoku grid that keeps the values at several positions.
+    Parameters:
+      positions (number[]): The positions in the grid that are fixed.
+      values (number[]): The values the fixed positions should have, in the same order as the positions.
+    Returns:
+      An array containing values for a sudoku grid with the given values in their positions.
+  */
+  getGridCompleted(positions: number[], values: number[]): Observable<BackendResponse> {
+    const givens: number[][] = positions.map((position, i) => [position, values[i]]);
+
+    // The backend's time budget stays under the 3 second timeout.
+    return this.http.post<CompleteBackendResponse>(this.backendURL + "/sudoku/complete", { givens: givens, budget: 2000 })
     .pipe(
       timeout(3000),
+      map(res => ({ data: res.data, success: res.success })),
       catchError(this.errorHandler())
     );
   }
 
+  /*
+    Description:
+      Fills the queue of prefetched boards from the backend's batch endpoint in the background. Boards arrive as
+      newline delimited JSON, one packed board per line, and lines that cannot be read are skipped. A failed refill is
+      dropped, and grids are then requested one at a time until the next refill.
+  */
+  refillQueue(): void {
+    const count: number = this.prefetchSize - this.boardQueue.length;
+    if (this.refilling || count <= 0) {
+      return;
+    }
+
+    this.refilling = true;
+    const params: HttpParams = new HttpParams()
+      .set("count", String(count))
+      .set("format", "base64");
+    this.http.get(this.backendURL + "/sudoku/boards", { params, responseType: 'text' })
+      .pipe(
+        timeout(3000),
+        // The flag is cleared however the refill ends, so a bad response never stops later refills.
+        finalize(() => this.refilling = false)
+      )
+      .subscribe(res => {
+        for (const line of res.split("\n")) {
+          if (line.length == 0 || this.boardQueue.length >= this.prefetchSize) {
+            continue;
+          }
+          try {
+            const board: PackedBackendResponse = JSON.parse(line);
+            if (board.success == 'true') {
+              this.boardQueue.push(this.decodeGrid(board.data));
+            }
+          } catch (error) {
+            // A truncated or malformed line is skipped.
+          }
+        }
+      }, error => {});
+  }
+
+  /*
+    Description:
+      Swaps the value at a position with the fixed value everywhere in a grid, as Sudoku.fixValue does on the
+      backend. Prefetched boards are already randomly labelled by the backend, and each is shown once, so the swap
+      is enough to show one with any value at any position.
+    Parameters:
+      grid (number[]): The values of the sudoku grid.
+      position (number): The position that should hold the value.
+      value (number): The value the position should have.
+    Returns:
+      An array containing values for the sudoku grid with the fixed value.
+  */
+  fixValue(grid: number[], position: number, value: number): number[] {
+    const current: number = grid[position];
+    return grid.map(gridValue => gridValue === current ? value : gridValue === value ? current : gridValue);
+  }
+
+  /*
+    Description:
+      Unpacks a grid sent by the backend as a base64 string. Each byte holds 2 positions, with the earlier
+      position in the high 4 bits.
+    Parameters:
+      packed (string): The base64 string of the packed grid.
+    Returns:
+      An array containing values for a sudoku grid.
+  */
+  decodeGrid(packed: string): number[] {
+    const bytes: string = atob(packed);
+    const grid: number[] = new Array<number>(81);
+    for (let position = 0; position < 81; position++) {
+      const byte: number = bytes.charCodeAt(position >> 1);
+      grid[position] = (position % 2 == 0) ? byte >> 4 : byte & 15;
+    }
+    return grid;
+  }
+
   /*
     Description:
       Handles errors during API calls.
@@ -9,3 +9,33 @@ export interface BackendResponse {
   data: number[];
   success: string;
 }
+
+/*
+  Description:
+    Interface used to work with responses from the backend when completing a grid.
+  Variables:
+    data (number): The array of values for the completed sudoku grid.
+    status (string): "solved", "unsatisfiable", "timeout", or "invalid".
+    size (number): The number of values, rows, columns, and blocks of the grid.
+    success (string): A string value representing a boolean value.
+*/
+export interface CompleteBackendResponse {
+  data: number[];
+  status: string;
+  size: number;
+  success: string;
+}
+
+/*
+  Description:
+    Interface used to work with packed responses from the backend.
+  Variables:
+    data (string): Base64 string of the grid packed 4 bits per position, 2 positions per byte.
+    format (string): The format of the data, always "base64".
+    success (string): A string value representing a boolean value.
+*/
+export interface PackedBackendResponse {
+  data: string;
+  format: string;
+  success: string;
+}
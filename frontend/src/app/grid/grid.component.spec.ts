@@ -22,4 +22,11 @@ describe('GridComponent', () => {
   it('should create', () => {
     expect(component).toBeTruthy();
   });
+
+  it('should report every fixed position', () => {
+    component.focus = [3, 40];
+    expect(component.isFocused(3)).toBe(true);
+    expect(component.isFocused(40)).toBe(true);
+    expect(component.isFocused(4)).toBe(false);
+  });
 });
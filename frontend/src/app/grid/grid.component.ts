@@ -7,11 +7,12 @@ import { Component, OnInit, Input, Output, EventEmitter } from '@angular/core';
     counter (number): An array used to help create sudoku grid.
   Variables (Inputs):
     colorId (number): The current color-choice-n class being used.
-    focus (number): The current value being frozen/fixed. -1 indicates no values being fixed;
+    focus (number[]): The positions of the values being frozen/fixed. Empty when no values are being fixed.
     sudokuGrid (number[]): Values for the sudoku grid.
   Variables (Output):
-    focusEmitter (EventEmitter<number>): Emits to parent component that the fixed value has changed, and what value it is.
+    focusEmitter (EventEmitter<number>): Emits to parent component the position that was clicked, to be fixed or unfixed.
   Methods:
+    isFocused(number)
     onClick(number)
 */
 @Component({
@@ -24,7 +25,7 @@ export class GridComponent implements OnInit {
 
   @Input() colorId: number;
   @Input() sudokuGrid: number[];
-  @Input() focus: number;
+  @Input() focus: number[] = [];
 
   @Output() focusEmitter: EventEmitter<number> = new EventEmitter<number>();
 
@@ -34,15 +35,19 @@ export class GridComponent implements OnInit {
 
   /*
     Description:
-      When a value in the grid is clicked, send the parent componet the new position being fixed.
+      Determines if the value at a position is fixed.
+  */
+  isFocused(position: number): boolean {
+    return this.focus.indexOf(position) != -1;
+  }
+
+  /*
+    Description:
+      When a value in the grid is clicked, send the parent componet the position. The parent fixes the position, or
+      unfixes it if it is already fixed.
   */
   onClick(position: number): void {
-    // If the position that is already fixed is clicked, unfocus it. Otherwise set the new fixed position.
-    if (position == this.focus) {
-      this.focusEmitter.emit(-1);
-    } else {
-      this.focusEmitter.emit(position);
-    }
+    this.focusEmitter.emit(position);
   }
 
 }